@@ -2,36 +2,55 @@
 管理员相关API - 完整实现
 """
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_admin
-from app.core.security import verify_password, create_access_token
-from app.schemas.admin import AdminLoginRequest, AdminLoginResponse, ApproveRequest, RejectRequest
+from app.core.responses import ORJSONResponse
+from app.core.security import verify_and_update_password_async, create_access_token, evict_admin_tokens
+from app.schemas.admin import AdminLoginRequest, AdminLoginResponse, ApproveRequest, RejectRequest, PostExportRequest
 from app.schemas.common import ResponseModel
 from app.crud import crud_admin, crud_profile, crud_invitation
 from app.services.post_generator import generate_post_content
-from app.services.invitation import generate_invitation_code, calculate_expire_time
+from app.services.invitation import calculate_expire_time
 from app.core.config import settings
-from app.models.user_profile import UserProfile
 from app.models.invitation_code import InvitationCode
 from datetime import timedelta
 from collections import defaultdict
 import logging
 import asyncio
+import uuid
 from app.core.city_coordinates import CITY_COORDINATES
 
 from app.crud.crud_settings import get_all_settings, get_setting, set_setting, get_setting_bool
+from app.crud.crud_invitation import InvitationCodeConflictError
 from app.services.ai_review_trigger import trigger_ai_review
-from app.services.ai_post_generator import generate_ai_post_html
+from app.services.ai_post_generator import generate_ai_post_html, profile_to_post_dict
+from app.services.post_export import iter_posts_zip, export_filename
+from app.services import profile_export
+from app.services.post_templates import list_post_styles
+from app.services.invitation_sweeper import sweep_invitations
+from app.services import storage
+from app.core import profiling
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def _generate_post_background(profile_id: int):
-    """后台异步生成 AI 文案并上传 COS，保存链接到数据库"""
+
+def _upload_post_html(serial_number: str, html_content: str) -> str:
+    """上传公众号文案 HTML，返回访问地址"""
+    cos_key = f"posts/{serial_number}/{uuid.uuid4().hex[:8]}.html"
+    return storage.put_object(cos_key, html_content.encode("utf-8"), "text/html; charset=utf-8")
+
+
+async def _generate_post_background(profile_id: int):
+    """
+    后台异步生成 AI 文案并上传 COS，保存链接到数据库
+    ★ async 后台任务在主事件循环上执行，与其他请求共用 AI 客户端连接池；COS 上传放到线程中
+    """
     from app.db.base import SessionLocal
     db = None
-    loop = None
     try:
         db = SessionLocal()
         profile = crud_profile.get_profile_by_id(db, profile_id)
@@ -62,31 +81,13 @@ def _generate_post_background(profile_id: int):
             "photos": profile.photos,
         }
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(generate_ai_post_html(profile_dict))
+        result = await generate_ai_post_html(profile_dict)
         html_content = result["html"]
 
         # 上传 COS
         cos_url = None
         try:
-            from qcloud_cos import CosConfig, CosS3Client
-            import uuid
-            config = CosConfig(
-                Region=settings.COS_REGION,
-                SecretId=settings.COS_SECRET_ID,
-                SecretKey=settings.COS_SECRET_KEY,
-            )
-            client = CosS3Client(config)
-            file_id = uuid.uuid4().hex[:8]
-            cos_key = f"posts/{profile.serial_number}/{file_id}.html"
-            client.put_object(
-                Bucket=settings.COS_BUCKET,
-                Body=html_content.encode("utf-8"),
-                Key=cos_key,
-                ContentType="text/html; charset=utf-8",
-            )
-            cos_url = f"{settings.COS_DOMAIN}/{cos_key}"
+            cos_url = await asyncio.to_thread(_upload_post_html, profile.serial_number, html_content)
         except Exception as e:
             logger.warning(f"文案COS上传失败: {e}")
 
@@ -101,24 +102,32 @@ def _generate_post_background(profile_id: int):
     finally:
         if db:
             db.close()
-        if loop:
-            loop.close()
+
 
 @router.post("/login", response_model=AdminLoginResponse)
 async def admin_login(
         request: AdminLoginRequest,
         db: Session = Depends(get_db)
 ):
-    """管理员登录"""
+    """
+    管理员登录
+    ★ bcrypt 校验在独立线程池中执行，不阻塞事件循环
+    """
     admin = crud_admin.get_admin_by_username(db, request.username)
     if not admin:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户名或密码错误")
-    if not verify_password(request.password, admin.password_hash):
+    valid, new_hash = await verify_and_update_password_async(request.password, admin.password_hash)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户名或密码错误")
     if not admin.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="账号已被禁用")
+    if new_hash:
+        crud_admin.update_password_hash(db, admin.id, new_hash)
+        logger.info(f"管理员密码已按新的 cost 重新哈希: {admin.username}")
 
-    access_token = create_access_token(data={"sub": admin.username, "admin_id": admin.id})
+    access_token = create_access_token(data={
+        "sub": admin.username, "admin_id": admin.id, "ver": admin.token_version or 0
+    })
     crud_admin.update_last_login(db, admin.id)
 
     return AdminLoginResponse(
@@ -127,6 +136,17 @@ async def admin_login(
     )
 
 
+@router.post("/logout", response_model=ResponseModel)
+async def admin_logout(admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)):
+    """
+    管理员登出
+    ★ 该管理员已签发的所有 token 立即在本进程失效，其他进程最迟 ADMIN_TOKEN_CACHE_TTL 秒后失效
+    """
+    crud_admin.bump_token_version(db, admin["admin_id"])
+    evict_admin_tokens(admin["admin_id"])
+    return ResponseModel(success=True, message="已退出登录")
+
+
 @router.get("/profiles/pending", response_model=ResponseModel)
 async def get_pending_profiles(
         page: int = 1, limit: int = 20,
@@ -141,11 +161,11 @@ async def get_pending_profiles(
             "id": profile.id, "serial_number": profile.serial_number,
             "name": profile.name, "gender": profile.gender, "age": profile.age,
             "work_location": profile.work_location,
-            "create_time": profile.create_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "create_time": profile.create_time,
             "status": profile.status
         })
-    return ResponseModel(success=True, message="获取成功",
-                         data={"total": len(data), "page": page, "limit": limit, "list": data})
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功",
+                                        data={"total": len(data), "page": page, "limit": limit, "list": data}))
 
 
 @router.get("/profiles/list", response_model=ResponseModel)
@@ -155,22 +175,38 @@ async def list_profiles(
 ):
     """按状态获取资料列表"""
     skip = (page - 1) * limit
-    query = db.query(UserProfile)
-    if status != "all":
-        query = query.filter(UserProfile.status == status)
-    profiles = query.order_by(UserProfile.create_time.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    profiles, total = crud_profile.list_profile_rows(db, status=status, skip=skip, limit=limit)
     data = []
     for profile in profiles:
         data.append({
             "id": profile.id, "serial_number": profile.serial_number,
             "name": profile.name, "gender": profile.gender, "age": profile.age,
             "work_location": profile.work_location,
-            "create_time": profile.create_time.strftime("%Y-%m-%d %H:%M:%S") if profile.create_time else None,
+            "create_time": profile.create_time,
             "status": profile.status,
         })
-    return ResponseModel(success=True, message="获取成功",
-                         data={"total": total, "page": page, "limit": limit, "list": data})
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功",
+                                        data={"total": total, "page": page, "limit": limit, "list": data}))
+
+
+@router.get("/profiles/export")
+async def export_profiles(
+        format: str = "csv", status: str = "all",
+        admin: dict = Depends(get_current_admin)
+):
+    """
+    导出资料（CSV / Excel）
+    ★ 流式输出，数据量大时内存占用平稳
+    """
+    if format not in profile_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}")
+
+    filename = profile_export.export_filename(format)
+    return StreamingResponse(
+        profile_export.iter_profiles_export(format, status),
+        media_type=profile_export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/profile/{profile_id}/detail", response_model=ResponseModel)
@@ -215,15 +251,15 @@ async def get_profile_detail(
         "photos": profile.photos,
         "status": profile.status,
         "rejection_reason": profile.rejection_reason,
-        "create_time": profile.create_time.strftime("%Y-%m-%d %H:%M:%S") if profile.create_time else None,
-        "reviewed_at": profile.reviewed_at.strftime("%Y-%m-%d %H:%M:%S") if profile.reviewed_at else None,
+        "create_time": profile.create_time,
+        "reviewed_at": profile.reviewed_at,
         "reviewed_by": profile.reviewed_by,
         "review_notes": profile.review_notes,
         "invitation_code_used": profile.invitation_code_used,
         "admin_contact": profile.admin_contact
     }
 
-    return ResponseModel(success=True, message="获取成功", data=profile_dict)
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功", data=profile_dict))
 
 
 @router.get("/profile/{profile_id}/preview-post", response_model=ResponseModel)
@@ -276,6 +312,7 @@ async def preview_post(
 @router.post("/profile/{profile_id}/generate-post", response_model=ResponseModel)
 async def generate_post_file(
         profile_id: int,
+        style: str = None,
         admin: dict = Depends(get_current_admin),
         db: Session = Depends(get_db),
 ):
@@ -308,29 +345,13 @@ async def generate_post_file(
         "photos": profile.photos,
     }
 
-    result = await generate_ai_post_html(profile_dict)
+    result = await generate_ai_post_html(profile_dict, style)
     html_content = result["html"]
 
     # 上传到 COS
     cos_url = None
     try:
-        from qcloud_cos import CosConfig, CosS3Client
-        import uuid
-        config = CosConfig(
-            Region=settings.COS_REGION,
-            SecretId=settings.COS_SECRET_ID,
-            SecretKey=settings.COS_SECRET_KEY,
-        )
-        client = CosS3Client(config)
-        file_id = uuid.uuid4().hex[:8]
-        cos_key = f"posts/{profile.serial_number}/{file_id}.html"
-        client.put_object(
-            Bucket=settings.COS_BUCKET,
-            Body=html_content.encode("utf-8"),
-            Key=cos_key,
-            ContentType="text/html; charset=utf-8",
-        )
-        cos_url = f"{settings.COS_DOMAIN}/{cos_key}"
+        cos_url = await run_in_threadpool(_upload_post_html, profile.serial_number, html_content)
 
         # ★ 保存链接到数据库
         crud_profile.update_profile(db, profile_id, {"post_url": cos_url})
@@ -350,6 +371,72 @@ async def generate_post_file(
     )
 
 
+@router.get("/post-styles", response_model=ResponseModel)
+async def get_post_styles(admin: dict = Depends(get_current_admin)):
+    """获取可选的公众号文案风格"""
+    return ResponseModel(success=True, message="获取成功", data={
+        "styles": list_post_styles(),
+        "default": settings.POST_TEMPLATE_STYLE,
+    })
+
+
+@router.post("/posts/export")
+async def export_posts(
+        request: PostExportRequest,
+        admin: dict = Depends(get_current_admin),
+        db: Session = Depends(get_db),
+):
+    """
+    批量导出公众号文案（ZIP）
+    ★ 按状态或ID列表筛选，并发生成，边生成边输出
+    ★ upload=true 时上传 COS 并返回下载链接
+    """
+    if not request.status and not request.ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请指定 status 或 ids")
+
+    profiles = crud_profile.get_profiles_by_filter(
+        db, status=request.status, ids=request.ids, limit=settings.POST_EXPORT_MAX + 1
+    )
+    if not profiles:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="没有符合条件的资料")
+    if len(profiles) > settings.POST_EXPORT_MAX:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"单次最多导出{settings.POST_EXPORT_MAX}份文案")
+
+    # 先转成字典，流式输出期间不再占用数据库会话
+    profile_dicts = [profile_to_post_dict(p) for p in profiles]
+    filename = export_filename()
+    chunks = iter_posts_zip(profile_dicts, style=request.style, use_ai=request.use_ai)
+
+    if not request.upload:
+        return StreamingResponse(
+            chunks,
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    import tempfile
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tmp:
+        async for chunk in chunks:
+            tmp.write(chunk)
+        size = tmp.tell()
+        tmp.seek(0)
+
+        try:
+            download_url = await run_in_threadpool(
+                storage.put_object, f"posts/exports/{filename}", tmp, "application/zip"
+            )
+        except Exception as e:
+            logger.error(f"批量文案COS上传失败: {e}")
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="文案包上传失败")
+
+    return ResponseModel(success=True, message=f"已导出{len(profile_dicts)}份文案", data={
+        "count": len(profile_dicts),
+        "size": size,
+        "download_url": download_url,
+    })
+
+
 @router.post("/profile/{profile_id}/approve", response_model=ResponseModel)
 async def approve_profile(
         profile_id: int, request: ApproveRequest,
@@ -364,21 +451,16 @@ async def approve_profile(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=f"当前状态({profile.status})不允许审核")
 
-    crud_profile.approve_profile(db=db, profile_id=profile_id,
-                                 reviewed_by=admin.get('sub'), notes=request.notes)
-
-    generated_codes = []
-    for _ in range(settings.DEFAULT_INVITATION_QUOTA):
-        code = generate_invitation_code()
-        expire_at = calculate_expire_time()
-        crud_invitation.create_invitation_code(
-            db=db, code=code, created_by=profile.id, created_by_type="user",
-            notes=f"用户{profile.serial_number}的邀请码", expire_at=expire_at
+    # 审核通过、生成邀请码、更新配额一次提交
+    try:
+        generated_codes = crud_profile.approve_profile_with_codes(
+            db=db, profile=profile, reviewed_by=admin.get('sub'), notes=request.notes,
+            code_notes=f"用户{profile.serial_number}的邀请码"
         )
-        generated_codes.append(code)
-
-    crud_profile.update_profile(db=db, profile_id=profile.id,
-                                data={"invitation_quota": settings.DEFAULT_INVITATION_QUOTA})
+    except InvitationCodeConflictError as e:
+        logger.error(f"审核通过失败（邀请码生成）: profile_id={profile_id}, {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="邀请码生成冲突，请稍后重试")
 
     # ★ 审核通过后自动生成 AI 文案（后台异步，不阻塞响应）
     background_tasks.add_task(_generate_post_background, profile_id)
@@ -410,31 +492,41 @@ async def generate_invitations(
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
     """批量生成邀请码"""
-    if count > 100:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="单次最多生成100个邀请码")
+    if count > settings.INVITATION_GENERATE_MAX:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"单次最多生成{settings.INVITATION_GENERATE_MAX}个邀请码")
 
-    generated_codes = []
     expire_at = calculate_expire_time() if expire_days > 0 else None
-    for _ in range(count):
-        code = generate_invitation_code()
-        crud_invitation.create_invitation_code(
-            db=db, code=code, created_by=0, created_by_type="admin",
+    try:
+        generated_codes = crud_invitation.create_invitation_codes_bulk(
+            db=db, count=count, created_by=0, created_by_type="admin",
             notes=notes or "管理员生成", expire_at=expire_at
         )
-        generated_codes.append(code)
+    except InvitationCodeConflictError as e:
+        logger.error(f"生成邀请码失败: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="邀请码生成冲突，请稍后重试")
 
     return ResponseModel(success=True, message=f"成功生成{count}个邀请码",
                          data={"codes": generated_codes, "count": count})
 
 
+@router.post("/invitation/sweep", response_model=ResponseModel)
+async def sweep_invitation_codes(admin: dict = Depends(get_current_admin)):
+    """立即执行一次过期邀请码清扫和名额校准"""
+    result = await run_in_threadpool(sweep_invitations)
+    return ResponseModel(success=True, message="清扫完成", data=result)
+
+
 @router.get("/dashboard/stats", response_model=ResponseModel)
 async def get_dashboard_stats(
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
     """仪表盘统计"""
-    pending = db.query(UserProfile).filter(UserProfile.status == 'pending').count()
-    approved = db.query(UserProfile).filter(UserProfile.status == 'approved').count()
-    published = db.query(UserProfile).filter(UserProfile.status == 'published').count()
+    status_counts = crud_profile.count_profiles_by_status(db)
+    pending = status_counts.get('pending', 0)
+    approved = status_counts.get('approved', 0)
+    published = status_counts.get('published', 0)
     total_codes = db.query(InvitationCode).count()
     used_codes = db.query(InvitationCode).filter(InvitationCode.is_used == True).count()
     return ResponseModel(success=True, message="获取成功", data={
@@ -445,21 +537,21 @@ async def get_dashboard_stats(
 
 @router.get("/invitation/list", response_model=ResponseModel)
 async def list_invitations(
-        page: int = 1, limit: int = 50,
+        page: int = 1, limit: int = 50, live_only: bool = False,
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
-    """获取邀请码列表"""
+    """获取邀请码列表（live_only=true 只看未使用且可用的）"""
     skip = (page - 1) * limit
-    invitations = db.query(InvitationCode).order_by(InvitationCode.create_time.desc()).offset(skip).limit(limit).all()
+    invitations = crud_invitation.list_invitations(db, skip=skip, limit=limit, live_only=live_only)
     data = []
     for inv in invitations:
         data.append({
             "code": inv.code, "is_used": inv.is_used, "created_by_type": inv.created_by_type,
             "notes": inv.notes,
-            "created_at": inv.create_time.strftime("%Y-%m-%d %H:%M:%S") if inv.create_time else None,
-            "used_at": inv.used_at.strftime("%Y-%m-%d %H:%M:%S") if inv.used_at else None,
+            "created_at": inv.create_time,
+            "used_at": inv.used_at,
         })
-    return ResponseModel(success=True, message="获取成功", data={"list": data, "total": len(data)})
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功", data={"list": data, "total": len(data)}))
 
 
 @router.get("/network/tree", response_model=ResponseModel)
@@ -467,7 +559,7 @@ async def get_invitation_network(
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
     """获取邀请关系网络树"""
-    all_profiles = db.query(UserProfile).order_by(UserProfile.create_time.asc()).all()
+    all_profiles = crud_profile.get_network_rows(db)
     profile_map = {p.id: p for p in all_profiles}
 
     children_map = {}
@@ -544,7 +636,7 @@ async def get_invitation_network(
         "top_inviters": inviters[:5],
         "worst_inviters": list(reversed(inviters[-3:])) if len(inviters) >= 3 else [],
     }
-    return ResponseModel(success=True, message="获取成功", data={"tree": tree, "stats": stats})
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功", data={"tree": tree, "stats": stats}))
 
 
 @router.get("/network/user/{user_id}", response_model=ResponseModel)
@@ -553,15 +645,15 @@ async def get_user_network_detail(
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
     """获取单个用户的邀请网络详情"""
-    profile = db.query(UserProfile).filter(UserProfile.id == user_id).first()
+    profile = crud_profile.get_network_row(db, user_id)
     if not profile:
         raise HTTPException(status_code=404, detail="用户不存在")
 
-    invitees = db.query(UserProfile).filter(UserProfile.invited_by == user_id).all()
+    invitees = crud_profile.get_invitee_rows(db, user_id)
 
     inviter = None
     if profile.invited_by:
-        inviter_profile = db.query(UserProfile).filter(UserProfile.id == profile.invited_by).first()
+        inviter_profile = crud_profile.get_network_row(db, profile.invited_by)
         if inviter_profile:
             inviter = {"id": inviter_profile.id, "name": inviter_profile.name,
                        "serial_number": inviter_profile.serial_number, "status": inviter_profile.status}
@@ -579,7 +671,7 @@ async def get_user_network_detail(
     rejected = sum(1 for i in invitees if i.status == 'rejected')
     reviewed = approved + rejected
 
-    return ResponseModel(success=True, message="获取成功", data={
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功", data={
         "user": {
             "id": profile.id, "name": profile.name, "serial_number": profile.serial_number,
             "gender": profile.gender, "age": profile.age, "work_location": profile.work_location,
@@ -591,7 +683,7 @@ async def get_user_network_detail(
         "quality": {"invited_count": len(invitees), "approved_count": approved,
                      "rejected_count": rejected,
                      "approval_rate": round(approved / reviewed * 100, 1) if reviewed > 0 else None}
-    })
+    }))
 
 
 def extract_city(work_location: str) -> str | None:
@@ -614,9 +706,7 @@ async def get_map_users(
         admin: dict = Depends(get_current_admin), db: Session = Depends(get_db)
 ):
     """获取用户地理分布数据"""
-    all_profiles = db.query(UserProfile).filter(
-        UserProfile.work_location.isnot(None), UserProfile.work_location != ""
-    ).all()
+    all_profiles = crud_profile.get_map_rows(db)
 
     city_groups = defaultdict(list)
     for p in all_profiles:
@@ -646,12 +736,12 @@ async def get_map_users(
     total_users = sum(c["count"] for c in cities)
     total_cities = len([c for c in cities if c["lat"]])
 
-    return ResponseModel(success=True, message="获取成功", data={
+    return ORJSONResponse(ResponseModel(success=True, message="获取成功", data={
         "cities": cities,
         "stats": {"total_users": total_users, "total_cities": total_cities,
                   "top_city": cities[0]["city"] if cities else None,
                   "top_city_count": cities[0]["count"] if cities else 0}
-    })
+    }))
 
 # ============================================================
 # 新增端点：系统设置（AI审核开关等）
@@ -815,6 +905,7 @@ async def batch_ai_review(
 @router.post("/profile/{profile_id}/generate-post", response_model=ResponseModel)
 async def generate_post_file(
         profile_id: int,
+        style: str = None,
         admin: dict = Depends(get_current_admin),
         db: Session = Depends(get_db),
 ):
@@ -854,35 +945,14 @@ async def generate_post_file(
     }
 
     # 生成 HTML
-    result = await generate_ai_post_html(profile_dict)
+    result = await generate_ai_post_html(profile_dict, style)
     html_content = result["html"]
     title = result["title"]
 
     # 上传到 COS
     cos_url = None
     try:
-        from qcloud_cos import CosConfig, CosS3Client
-        from io import BytesIO
-        import uuid
-
-        config = CosConfig(
-            Region=settings.COS_REGION,
-            SecretId=settings.COS_SECRET_ID,
-            SecretKey=settings.COS_SECRET_KEY,
-        )
-        client = CosS3Client(config)
-
-        file_id = uuid.uuid4().hex[:8]
-        cos_key = f"posts/{profile.serial_number}/{file_id}.html"
-
-        client.put_object(
-            Bucket=settings.COS_BUCKET,
-            Body=html_content.encode("utf-8"),
-            Key=cos_key,
-            ContentType="text/html; charset=utf-8",
-        )
-
-        cos_url = f"{settings.COS_DOMAIN}/{cos_key}"
+        cos_url = await run_in_threadpool(_upload_post_html, profile.serial_number, html_content)
         logger.info(f"文案已上传: {cos_url}")
 
     except Exception as e:
@@ -899,3 +969,28 @@ async def generate_post_file(
             "serial_number": profile.serial_number,
         },
     )
+
+
+# ============================================================
+# 采样分析结果（请求带 X-Profile: 1 或 ?_profile=1 时生成）
+# ============================================================
+
+@router.get("/debug/profiles", response_model=ResponseModel)
+async def list_profiling_results(
+        admin: dict = Depends(get_current_admin),
+):
+    """已保存的采样结果列表（按请求 / 持续采样）"""
+    items = await run_in_threadpool(profiling.list_profiles)
+    return ResponseModel(success=True, message="获取成功", data={"total": len(items), "items": items})
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def download_profiling_result(
+        profile_id: str,
+        admin: dict = Depends(get_current_admin),
+):
+    """下载采样结果（collapsed stack 文本，可用 flamegraph.pl / speedscope 打开）"""
+    path = profiling.get_profile_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="采样结果不存在")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{profile_id}.collapsed")
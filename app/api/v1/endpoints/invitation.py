@@ -1,58 +1,46 @@
 """
 邀请码相关API - 完整实现
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.core.deps import get_db, get_current_user_openid
+from app.core.config import settings
+from app.core.deps import get_db, get_current_user
+from app.core.security import create_user_token
+from app.core.rate_limit import SlidingWindowLimiter, enforce_rate_limit, get_client_ip
 from app.schemas.invitation import InvitationVerifyRequest, InvitationVerifyResponse, MyCodesResponse, AutoLoginRequest
 from app.schemas.common import ResponseModel
 from app.crud import crud_invitation, crud_profile
 from app.services.wechat import get_openid_from_code
-from datetime import datetime
+from app.services.invitation_filter import invitation_code_may_exist
 from typing import List
 
 router = APIRouter()
 
+# 邀请码校验限流（防止猜码）
+verify_ip_limiter = SlidingWindowLimiter(settings.INVITATION_VERIFY_IP_LIMIT, settings.INVITATION_VERIFY_WINDOW)
+verify_openid_limiter = SlidingWindowLimiter(settings.INVITATION_VERIFY_OPENID_LIMIT, settings.INVITATION_VERIFY_WINDOW)
+
 
 @router.post("/verify", response_model=InvitationVerifyResponse)
 async def verify_invitation(
         request: InvitationVerifyRequest,
+        http_request: Request,
         db: Session = Depends(get_db)
 ):
     """
     验证邀请码并绑定用户
+    ★ 按 IP / openid 限流，不存在的邀请码由布隆过滤器在内存中直接拒绝，不查数据库也不调微信接口
+    ★ 新用户通过一条条件 UPDATE 原子核销邀请码，并发使用同一个码只有一个能成功
     """
-    # 1. 验证邀请码是否存在
-    invitation = crud_invitation.get_invitation_by_code(db, request.invitation_code)
+    enforce_rate_limit(verify_ip_limiter, get_client_ip(http_request))
 
-    if not invitation:
+    if not invitation_code_may_exist(db, request.invitation_code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="邀请码不存在"
         )
 
-    # 2. 检查邀请码是否已使用
-    if invitation.is_used:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="邀请码已被使用"
-        )
-
-    # 3. 检查是否过期
-    if invitation.expire_at and invitation.expire_at < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="邀请码已过期"
-        )
-
-    # 4. 检查是否被禁用
-    if not invitation.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"邀请码已被禁用: {invitation.disable_reason or '未知原因'}"
-        )
-
-    # 5. 通过微信code获取openid
+    # 1. 通过微信code获取openid
     openid = await get_openid_from_code(request.wx_code)
 
     if not openid:
@@ -61,23 +49,41 @@ async def verify_invitation(
             detail="微信登录失败，请重试"
         )
 
-    # 6. 检查用户是否已经注册过
-    existing_profile = crud_profile.get_profile_by_openid(db, openid)
-    has_profile = existing_profile is not None
+    enforce_rate_limit(verify_openid_limiter, openid)
+
+    # 2. 检查用户是否已经注册过
+    brief = crud_profile.get_profile_brief(db, openid)
+    has_profile = brief is not None
 
-    # 7. 如果是新用户，标记邀请码为已使用
-    if not has_profile:
-        crud_invitation.mark_invitation_as_used(
+    if has_profile:
+        # 老用户只校验邀请码，不核销
+        error = crud_invitation.get_invitation_error(
+            crud_invitation.get_invitation_by_code(db, request.invitation_code)
+        )
+    elif crud_invitation.redeem_invitation_code(
             db=db,
             code=request.invitation_code,
             used_by_openid=openid
+    ):
+        error = None
+    else:
+        # 3. 核销失败时再查一次，给出具体原因
+        error = crud_invitation.get_invitation_error(
+            crud_invitation.get_invitation_by_code(db, request.invitation_code)
+        ) or "邀请码已被使用"
+
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
         )
 
     return InvitationVerifyResponse(
         success=True,
         message="验证成功",
         openid=openid,
-        has_profile=has_profile
+        has_profile=has_profile,
+        token=create_user_token(openid, brief.id, brief.status) if brief else create_user_token(openid)
     )
 
 
@@ -95,36 +101,43 @@ async def apply_invitation(db: Session = Depends(get_db)):
 
 @router.get("/my-codes", response_model=ResponseModel)
 async def get_my_codes(
-        openid: str = Depends(get_current_user_openid),
+        user: dict = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     获取我的邀请码
+    ★ token 中带资料ID时一次查询取回邀请码，查不到再按原流程判断资料状态
     """
-    # 获取用户资料
-    profile = crud_profile.get_profile_by_openid(db, openid)
-
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="用户资料不存在"
-        )
-
-    # 只有已发布的用户才有邀请码
-    if profile.status not in ('approved', 'published'):
-        return ResponseModel(
-            success=True,
-            message="资料尚未发布，暂无邀请码",
-            data={
-                "codes": [],
-                "total": 0,
-                "used": 0,
-                "remaining": 0
-            }
-        )
-
-    # 获取用户的邀请码
-    invitations = crud_invitation.get_user_invitation_codes(db, profile.id)
+    openid = user["openid"]
+    invitations = []
+    if user["profile_id"]:
+        invitations = crud_invitation.get_published_user_codes(db, user["profile_id"], openid)
+
+    if not invitations:
+        # 获取用户资料
+        profile = crud_profile.get_profile_by_openid(db, openid)
+
+        if not profile:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="用户资料不存在"
+            )
+
+        # 只有已发布的用户才有邀请码
+        if profile.status not in ('approved', 'published'):
+            return ResponseModel(
+                success=True,
+                message="资料尚未发布，暂无邀请码",
+                data={
+                    "codes": [],
+                    "total": 0,
+                    "used": 0,
+                    "remaining": 0
+                }
+            )
+
+        # 获取用户的邀请码
+        invitations = crud_invitation.get_user_invitation_codes(db, profile.id)
 
     codes_data = []
     used_count = 0
@@ -167,9 +180,9 @@ async def auto_login(
         )
 
     # 2. 检查用户是否已注册
-    existing_profile = crud_profile.get_profile_by_openid(db, openid)
+    brief = crud_profile.get_profile_brief(db, openid)
 
-    if not existing_profile:
+    if not brief:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="非注册用户"
@@ -180,5 +193,6 @@ async def auto_login(
         success=True,
         message="自动登录成功",
         openid=openid,
-        has_profile=True
+        has_profile=True,
+        token=create_user_token(openid, brief.id, brief.status)
     )
@@ -1,32 +1,37 @@
 """
 用户资料相关API - 完整实现
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.core.deps import get_db, get_current_user_openid
-from app.schemas.profile import ProfileSubmitRequest, ProfileResponse
+from app.core.deps import get_db, get_current_user, get_current_user_openid
+from app.core.security import create_user_token
+from app.schemas.profile import ProfileSubmitRequest, ProfilePatchRequest, ProfileResponse
 from app.schemas.common import ResponseModel
-from app.crud import crud_profile, crud_invitation
-from app.utils.helpers import generate_serial_number, calculate_age, calculate_constellation
+from app.crud import crud_profile, crud_invitation, crud_sequence
+from app.utils.helpers import calculate_age, calculate_constellation
 from app.models.invitation_code import InvitationCode
 from app.core.config import settings
-from app.services.invitation import generate_invitation_code, calculate_expire_time
 import logging
 
-from app.crud.crud_settings import get_setting_bool
+from app.crud.crud_settings import get_setting_bool, get_settings_version
+from app.crud.crud_invitation import InvitationCodeConflictError
+from app.services.ai_review import affects_ai_review
+from app.services import storage
+from app.core.http_cache import make_etag, cached_json_response, CACHE_PRIVATE_REVALIDATE
+from app.core.responses import dumps
 from fastapi import BackgroundTasks
-import asyncio
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def _run_ai_review_background(profile_id: int):
+async def _run_ai_review_background(profile_id: int):
     """
     后台执行 AI 审核
     ★ 开关判断在 trigger_ai_review 内部通过数据库查询完成
     ★ 如果开关关闭，trigger 会直接返回 skip，不会调用 AI
+    ★ async 后台任务在主事件循环上执行，与其他请求共用 AI 客户端连接池
     """
     from app.db.base import SessionLocal
     from app.services.ai_review_trigger import trigger_ai_review
@@ -37,20 +42,15 @@ def _run_ai_review_background(profile_id: int):
         return
 
     db = None
-    loop = None
     try:
         db = SessionLocal()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(trigger_ai_review(db, profile_id))
+        result = await trigger_ai_review(db, profile_id)
         logger.info(f"AI后台审核: profile_id={profile_id}, action={result['action']}")
     except Exception as e:
         logger.error(f"AI后台审核失败: profile_id={profile_id}, error={e}")
     finally:
         if db:
             db.close()
-        if loop:
-            loop.close()
 
 
 def _cleanup_user_cos_photos(openid: str):
@@ -60,34 +60,12 @@ def _cleanup_user_cos_photos(openid: str):
     静默失败，不影响主流程
     """
     try:
-        if not settings.COS_SECRET_ID or not settings.COS_DOMAIN:
+        if not storage.is_configured():
             return
 
-        from qcloud_cos import CosConfig, CosS3Client
-
-        config = CosConfig(
-            Region=settings.COS_REGION,
-            SecretId=settings.COS_SECRET_ID,
-            SecretKey=settings.COS_SECRET_KEY,
-        )
-        client = CosS3Client(config)
-
-        prefix = f"{settings.COS_UPLOAD_PREFIX}/{openid}/"
-
-        response = client.list_objects(
-            Bucket=settings.COS_BUCKET,
-            Prefix=prefix,
-            MaxKeys=100,
-        )
-
-        contents = response.get('Contents', [])
-        if contents:
-            delete_objects = [{'Key': obj['Key']} for obj in contents]
-            client.delete_objects(
-                Bucket=settings.COS_BUCKET,
-                Delete={'Object': delete_objects, 'Quiet': 'true'},
-            )
-            logger.info(f"清理COS照片成功: {openid}, 共 {len(delete_objects)} 个文件")
+        deleted = storage.delete_prefix(f"{settings.COS_UPLOAD_PREFIX}/{openid}/")
+        if deleted:
+            logger.info(f"清理COS照片成功: {openid}, 共 {deleted} 个文件")
     except Exception as e:
         logger.warning(f"清理COS照片失败（不影响删除操作）: {e}")
 
@@ -101,17 +79,15 @@ async def submit_profile(
 ):
     """
     提交用户资料
+    ★ 返回带新资料ID和状态的 token，客户端替换后续请求的凭证
     """
-    existing_profile = crud_profile.get_profile_by_openid(db, openid)
-
-    if existing_profile:
+    if crud_profile.profile_exists(db, openid):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="您已经提交过资料，请使用更新接口"
         )
 
-    last_number = crud_profile.get_last_serial_number(db)
-    serial_number = generate_serial_number(last_number)
+    serial_number = crud_sequence.next_serial_number(db)
 
     profile_data = request.dict()
     profile_data['serial_number'] = serial_number
@@ -143,57 +119,61 @@ async def submit_profile(
     if profile_data.get('expectation') and hasattr(profile_data['expectation'], 'dict'):
         profile_data['expectation'] = profile_data['expectation'].dict()
 
-    profile = crud_profile.create_profile(db, openid, profile_data)
+    # ★ 审核放行 / 拒绝测试邀请码（用于微信审核场景）：资料和审核结果一起提交
+    used_code = (profile_data.get('invitation_code_used') or '').upper()
+    is_bypass = used_code in [c.upper() for c in settings.REVIEW_BYPASS_CODES or []]
+    is_reject = not is_bypass and used_code in [c.upper() for c in settings.REVIEW_REJECT_CODES or []]
+
+    profile = crud_profile.create_profile(db, openid, profile_data, commit=not (is_bypass or is_reject))
+    profile_id = profile.id
 
     # ★ 检查是否为审核放行邀请码（用于微信审核场景 - 自动通过）
-    used_code = profile_data.get('invitation_code_used', '')
-    bypass_codes = settings.REVIEW_BYPASS_CODES
-    if bypass_codes and used_code.upper() in [c.upper() for c in bypass_codes]:
-        # 自动通过审核
-        crud_profile.approve_profile(
-            db=db,
-            profile_id=profile.id,
-            reviewed_by="AUTO_BYPASS",
-            notes="审核放行邀请码自动通过"
-        )
-        # 生成邀请码配额
-        for _ in range(settings.DEFAULT_INVITATION_QUOTA):
-            code = generate_invitation_code()
-            expire_at = calculate_expire_time()
-            crud_invitation.create_invitation_code(
-                db=db, code=code, created_by=profile.id, created_by_type="user",
-                notes=f"用户{profile.serial_number}的邀请码（放行）", expire_at=expire_at
+    if is_bypass:
+        # 自动通过审核并生成邀请码配额（一次提交）
+        try:
+            crud_profile.approve_profile_with_codes(
+                db=db,
+                profile=profile,
+                reviewed_by="AUTO_BYPASS",
+                notes="审核放行邀请码自动通过",
+                code_notes=f"用户{serial_number}的邀请码（放行）"
+            )
+        except InvitationCodeConflictError as e:
+            # 资料和审核结果在同一个事务里，已一起回滚，用户可以直接重新提交
+            logger.error(f"放行邀请码自动通过失败: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="提交失败，请稍后重试"
             )
-        crud_profile.update_profile(db=db, profile_id=profile.id,
-                                    data={"invitation_quota": settings.DEFAULT_INVITATION_QUOTA})
-        logger.info(f"放行邀请码自动通过: {used_code}, profile_id={profile.id}")
+        logger.info(f"放行邀请码自动通过: {used_code}, profile_id={profile_id}")
 
         return ResponseModel(
             success=True,
             message="提交成功，已自动通过审核",
             data={
-                "profile_id": profile.id,
-                "serial_number": profile.serial_number
+                "profile_id": profile_id,
+                "serial_number": serial_number,
+                "token": create_user_token(openid, profile_id, "approved")
             }
         )
 
     # ★ 检查是否为审核拒绝测试邀请码（用于微信审核场景 - 自动拒绝）
-    reject_codes = settings.REVIEW_REJECT_CODES
-    if reject_codes and used_code.upper() in [c.upper() for c in reject_codes]:
+    if is_reject:
         crud_profile.reject_profile(
             db=db,
-            profile_id=profile.id,
+            profile_id=profile_id,
             reviewed_by="AUTO_TEST",
             reason="信息不完整，请补充后重新提交。"
         )
-        logger.info(f"拒绝测试邀请码自动拒绝: {used_code}, profile_id={profile.id}")
+        logger.info(f"拒绝测试邀请码自动拒绝: {used_code}, profile_id={profile_id}")
 
         return ResponseModel(
             success=True,
             message="提交成功",
             data={
-                "profile_id": profile.id,
-                "serial_number": profile.serial_number
+                "profile_id": profile_id,
+                "serial_number": serial_number,
+                "token": create_user_token(openid, profile_id, "rejected")
             }
         )
 
@@ -204,20 +184,23 @@ async def submit_profile(
         message="提交成功，等待审核",
         data={
             "profile_id": profile.id,
-            "serial_number": profile.serial_number
+            "serial_number": profile.serial_number,
+            "token": create_user_token(openid, profile.id, "pending")
         }
     )
 
 
 @router.get("/my", response_model=ResponseModel)
 async def get_my_profile(
-        openid: str = Depends(get_current_user_openid),
+        request: Request,
+        user: dict = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     获取我的资料
+    ★ 支持 ETag，资料未变化时返回 304
     """
-    profile = crud_profile.get_profile_by_openid(db, openid)
+    profile = crud_profile.get_own_profile(db, user["openid"], user["profile_id"])
 
     if not profile:
         raise HTTPException(
@@ -225,38 +208,44 @@ async def get_my_profile(
             detail="资料不存在"
         )
 
-    return ResponseModel(
-        success=True,
-        message="获取成功",
-        data={
-            "id": profile.id,
-            "serial_number": profile.serial_number,
-            "status": profile.status,
-            "rejection_reason": profile.rejection_reason,
-            "create_time": profile.create_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "published_at": profile.published_at.strftime("%Y-%m-%d %H:%M:%S") if profile.published_at else None,
-            "invitation_quota": profile.invitation_quota,
-            "name": profile.name,
-            "gender": profile.gender,
-            "birthday": profile.birthday,
-            "age": profile.age,
-            "height": profile.height,
-            "weight": profile.weight,
-            "marital_status": profile.marital_status,
-            "body_type": profile.body_type,
-            "hometown": profile.hometown,
-            "work_location": profile.work_location,
-            "industry": profile.industry,
-            "constellation": profile.constellation,
-            "mbti": profile.mbti,
-            "health_condition": profile.health_condition,
-            "wechat_id": profile.wechat_id,
-            "hobbies": profile.hobbies,
-            "lifestyle": profile.lifestyle,
-            "activity_expectation": profile.activity_expectation,
-            "special_requirements": profile.special_requirements,
-            "photos": profile.photos,
-        }
+    data = {
+        "id": profile.id,
+        "serial_number": profile.serial_number,
+        "status": profile.status,
+        "rejection_reason": profile.rejection_reason,
+        "create_time": profile.create_time,
+        "published_at": profile.published_at,
+        "invitation_quota": profile.invitation_quota,
+        "name": profile.name,
+        "gender": profile.gender,
+        "birthday": profile.birthday,
+        "age": profile.age,
+        "height": profile.height,
+        "weight": profile.weight,
+        "marital_status": profile.marital_status,
+        "body_type": profile.body_type,
+        "hometown": profile.hometown,
+        "work_location": profile.work_location,
+        "industry": profile.industry,
+        "constellation": profile.constellation,
+        "mbti": profile.mbti,
+        "health_condition": profile.health_condition,
+        "wechat_id": profile.wechat_id,
+        "hobbies": profile.hobbies,
+        "lifestyle": profile.lifestyle,
+        "activity_expectation": profile.activity_expectation,
+        "special_requirements": profile.special_requirements,
+        "photos": profile.photos,
+    }
+
+    # ★ ETag 按响应内容计算，不带 Last-Modified：update_time 在 MySQL 中只精确到秒，
+    #   同一秒内的两次修改时间戳相同，按时间判断会返回过期的 304
+    etag = make_etag("my-profile", dumps(data).decode("utf-8"))
+
+    return cached_json_response(
+        request,
+        ResponseModel(success=True, message="获取成功", data=data),
+        etag=etag, cache_control=CACHE_PRIVATE_REVALIDATE,
     )
 
 
@@ -264,13 +253,13 @@ async def get_my_profile(
 async def update_profile(
         request: ProfileSubmitRequest,
         background_tasks: BackgroundTasks,
-        openid: str = Depends(get_current_user_openid),
+        user: dict = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     更新资料（仅pending或rejected状态可更新）
     """
-    profile = crud_profile.get_profile_by_openid(db, openid)
+    profile = crud_profile.get_own_profile(db, user["openid"], user["profile_id"])
 
     if not profile:
         raise HTTPException(
@@ -314,15 +303,84 @@ async def update_profile(
     )
 
 
+@router.patch("/update", response_model=ResponseModel)
+async def patch_profile(
+        request: ProfilePatchRequest,
+        background_tasks: BackgroundTasks,
+        user: dict = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    部分更新资料（仅pending或rejected状态可更新）
+    ★ 只传需要修改的字段，只写入值确实变化的列
+    ★ 只有必填字段、期待对象或自由文本变化时才重新触发 AI 审核
+    """
+    profile = crud_profile.get_own_profile(db, user["openid"], user["profile_id"])
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="资料不存在"
+        )
+
+    if profile.status not in ['pending', 'rejected']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"当前状态({profile.status})不允许修改"
+        )
+
+    update_data = request.dict(exclude_unset=True)
+
+    # 期待对象按子字段合并，只传了部分子字段时不清空其他子字段
+    if update_data.get('expectation') is not None:
+        update_data['expectation'] = {**(profile.expectation or {}), **update_data['expectation']}
+
+    # 生日变化时重新计算年龄和星座
+    if update_data.get('birthday') and update_data['birthday'] != profile.birthday:
+        try:
+            update_data['age'] = calculate_age(update_data['birthday'])
+            update_data['constellation'] = calculate_constellation(update_data['birthday'])
+        except (ValueError, TypeError):
+            pass
+
+    changed = crud_profile.patch_profile(db, profile, update_data, commit=False)
+    if not changed:
+        return ResponseModel(
+            success=True,
+            message="资料没有变化",
+            data={"profile_id": profile.id, "status": profile.status, "changed_fields": []}
+        )
+
+    if profile.status == 'rejected':
+        profile.status = 'pending'
+        profile.rejection_reason = None
+    db.commit()
+
+    rerun_review = affects_ai_review(changed)
+    if rerun_review:
+        background_tasks.add_task(_run_ai_review_background, profile.id)
+
+    return ResponseModel(
+        success=True,
+        message="更新成功",
+        data={
+            "profile_id": profile.id,
+            "status": profile.status,
+            "changed_fields": changed,
+            "ai_review": rerun_review
+        }
+    )
+
+
 @router.post("/archive", response_model=ResponseModel)
 async def archive_profile(
-        openid: str = Depends(get_current_user_openid),
+        user: dict = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     """
     下架资料
     """
-    profile = crud_profile.get_profile_by_openid(db, openid)
+    profile = crud_profile.get_own_profile(db, user["openid"], user["profile_id"])
 
     if not profile:
         raise HTTPException(
@@ -346,7 +404,7 @@ async def archive_profile(
 
 @router.delete("/delete", response_model=ResponseModel)
 async def delete_profile(
-        openid: str = Depends(get_current_user_openid),
+        user: dict = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
     """
@@ -354,7 +412,7 @@ async def delete_profile(
     ★ 支持 pending、rejected、approved、published 状态
     ★ 删除时自动清理COS上该用户所有照片
     """
-    profile = crud_profile.get_profile_by_openid(db, openid)
+    profile = crud_profile.get_own_profile(db, user["openid"], user["profile_id"])
 
     if not profile:
         raise HTTPException(
@@ -370,7 +428,7 @@ async def delete_profile(
         )
 
     # ★ 清理COS上该用户的所有照片（按目录批量删除）
-    _cleanup_user_cos_photos(openid)
+    _cleanup_user_cos_photos(profile.openid)
 
     # 删除数据库记录
     crud_profile.delete_profile(db, profile.id)
@@ -382,10 +440,16 @@ async def delete_profile(
 
 
 @router.get("/ai-review-enabled", response_model=ResponseModel)
-async def get_ai_review_enabled(db: Session = Depends(get_db)):
+async def get_ai_review_enabled(request: Request, db: Session = Depends(get_db)):
     """
     公开端点：查询 AI 自动审核是否开启
     小程序前端用于判断是否需要预填模板
+    ★ ETag 取自配置版本号，客户端可缓存 SETTINGS_CACHE_TTL 秒
     """
     enabled = get_setting_bool(db, "ai_auto_review")
-    return ResponseModel(success=True, message="ok", data={"enabled": enabled})
+    return cached_json_response(
+        request,
+        ResponseModel(success=True, message="ok", data={"enabled": enabled}),
+        etag=make_etag("ai-review-enabled", get_settings_version(db), enabled),
+        cache_control=f"public, max-age={settings.SETTINGS_CACHE_TTL}",
+    )
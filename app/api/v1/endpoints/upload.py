@@ -1,13 +1,15 @@
 """
-文件上传相关API - COS版本
-上传照片到腾讯云COS对象存储
+文件上传相关API
+上传照片到对象存储（腾讯云COS，开发/压测时可切换为本地存储，见 app/services/storage.py）
 目录结构: photos/{user_openid}/{uuid}.{ext}
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.deps import get_db, get_current_user_openid
 from app.core.config import settings
 from app.schemas.common import ResponseModel
+from app.services import storage
 from pydantic import BaseModel
 import uuid
 import logging
@@ -17,31 +19,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def _get_cos_client():
-    """获取COS客户端实例"""
-    try:
-        from qcloud_cos import CosConfig, CosS3Client
-
-        config = CosConfig(
-            Region=settings.COS_REGION,
-            SecretId=settings.COS_SECRET_ID,
-            SecretKey=settings.COS_SECRET_KEY,
-        )
-        return CosS3Client(config)
-    except ImportError:
-        logger.error("cos-python-sdk-v5 未安装，请运行: pip install cos-python-sdk-v5")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="COS SDK未安装"
-        )
-    except Exception as e:
-        logger.error(f"COS客户端初始化失败: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="COS配置错误"
-        )
-
-
 @router.post("/photo", response_model=ResponseModel)
 async def upload_photo(
         file: UploadFile = File(...),
@@ -49,7 +26,7 @@ async def upload_photo(
         db: Session = Depends(get_db)
 ):
     """
-    上传照片到COS
+    上传照片
     存储路径: photos/{openid}/{uuid}.{ext}
     """
     # 1. 验证文件类型
@@ -82,31 +59,19 @@ async def upload_photo(
     unique_filename = f"{photo_id}.{file_ext}"
     cos_key = f"{settings.COS_UPLOAD_PREFIX}/{openid}/{unique_filename}"
 
-    # 4. 上传到COS
+    # 4. 上传（同步 SDK，放到线程池避免阻塞事件循环）
     try:
-        client = _get_cos_client()
-
-        response = client.put_object(
-            Bucket=settings.COS_BUCKET,
-            Body=content,
-            Key=cos_key,
-            ContentType=file.content_type or f"image/{file_ext}",
+        file_url = await run_in_threadpool(
+            storage.put_object, cos_key, content, file.content_type or f"image/{file_ext}"
         )
-
-        logger.info(f"COS上传成功: {cos_key}, ETag: {response.get('ETag', '')}")
-
-    except HTTPException:
-        raise
+        logger.info(f"照片上传成功: {cos_key}")
     except Exception as e:
-        logger.error(f"COS上传失败: {e}")
+        logger.error(f"照片上传失败: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="照片上传失败，请稍后重试"
         )
 
-    # 5. 生成访问URL
-    file_url = f"{settings.COS_DOMAIN}/{cos_key}"
-
     return ResponseModel(
         success=True,
         message="上传成功",
@@ -118,6 +83,20 @@ async def upload_photo(
     )
 
 
+def _owned_key(key: str, openid: str) -> str:
+    """
+    规范化 key 并校验属于当前用户的照片目录，否则 403
+    ★ 先规范化再比前缀，防止 photos/{自己}/../{别人}/a.jpg 绕过
+    """
+    normalized = storage.normalize_key(key)
+    if normalized is None or not normalized.startswith(f"{settings.COS_UPLOAD_PREFIX}/{openid}/"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权删除此照片"
+        )
+    return normalized
+
+
 class DeletePhotoRequest(BaseModel):
     url: str
 
@@ -141,34 +120,23 @@ async def delete_photo(
             detail="照片URL不能为空"
         )
 
-    # COS照片
-    if settings.COS_DOMAIN and photo_url.startswith(settings.COS_DOMAIN):
-        cos_key = photo_url.replace(settings.COS_DOMAIN + "/", "")
+    cos_key = storage.key_from_url(photo_url)
 
+    # 当前存储中的照片
+    if cos_key is not None:
         # ★ 安全校验：确保只能删除自己目录下的照片
-        expected_prefix = f"{settings.COS_UPLOAD_PREFIX}/{openid}/"
-        if not cos_key.startswith(expected_prefix):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权删除此照片"
-            )
+        cos_key = _owned_key(cos_key, openid)
 
         try:
-            client = _get_cos_client()
-            client.delete_object(
-                Bucket=settings.COS_BUCKET,
-                Key=cos_key,
-            )
-            logger.info(f"COS删除成功: {cos_key}")
-        except HTTPException:
-            raise
+            await run_in_threadpool(storage.delete_object, cos_key)
+            logger.info(f"照片删除成功: {cos_key}")
         except Exception as e:
-            logger.warning(f"COS删除失败（可能文件不存在）: {e}")
+            logger.warning(f"照片删除失败（可能文件不存在）: {e}")
 
     # 本地照片（兼容旧数据）
     elif photo_url.startswith("/uploads/"):
         import os
-        local_path = "." + photo_url
+        local_path = os.path.join(".", "uploads", _owned_key(photo_url[len("/uploads/"):], openid))
         if os.path.exists(local_path):
             try:
                 os.remove(local_path)
@@ -194,29 +162,11 @@ async def delete_all_photos(
     prefix = f"{settings.COS_UPLOAD_PREFIX}/{openid}/"
 
     try:
-        client = _get_cos_client()
-
-        # 列出该用户目录下所有文件
-        response = client.list_objects(
-            Bucket=settings.COS_BUCKET,
-            Prefix=prefix,
-            MaxKeys=100,
-        )
-
-        # 批量删除
-        contents = response.get('Contents', [])
-        if contents:
-            delete_objects = [{'Key': obj['Key']} for obj in contents]
-            client.delete_objects(
-                Bucket=settings.COS_BUCKET,
-                Delete={'Object': delete_objects, 'Quiet': 'true'},
-            )
-            logger.info(f"批量删除成功: {openid} 目录下 {len(delete_objects)} 个文件")
+        deleted = await run_in_threadpool(storage.delete_prefix, prefix)
+        if deleted:
+            logger.info(f"批量删除成功: {openid} 目录下 {deleted} 个文件")
         else:
             logger.info(f"用户 {openid} 目录下无文件")
-
-    except HTTPException:
-        raise
     except Exception as e:
         logger.warning(f"批量删除失败: {e}")
 
@@ -0,0 +1,57 @@
+"""
+熔断器
+★ 连续失败 failure_threshold 次后熔断，cooldown 秒内直接拒绝调用，不再等待超时
+★ 冷却结束后放行一次试探调用（半开），成功则恢复，失败则继续熔断
+★ 试探调用被取消时调用方必须 release_trial，否则试探名额一直被占用，熔断永远不会恢复
+"""
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """熔断中，调用被拒绝"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._failures >= self.failure_threshold > 0
+
+    def before_call(self) -> bool:
+        """
+        调用前检查，熔断中抛出 CircuitOpenError
+        返回本次调用是否为半开状态下的试探调用
+        """
+        with self._lock:
+            if not self.is_open:
+                return False
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} 熔断中")
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """试探调用没有结果（被取消）时释放试探名额，不计成功也不计失败"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.is_open:
+                self._opened_at = time.monotonic()
@@ -0,0 +1,178 @@
+"""
+响应压缩中间件（gzip / brotli）
+★ 只压缩白名单内的文本类型（JSON / HTML / CSV 等），图片、zip、xlsx 本身已压缩，直接透传
+★ 一次性响应小于 COMPRESSION_MIN_SIZE 时不压缩
+★ 流式响应（导出）边输出边压缩，每块 flush，客户端不用等全部生成完
+★ 安装 brotli（requirements-optional.txt）后优先使用 br，否则使用 gzip
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+# 可压缩的 Content-Type（不含参数部分）
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "text/xml",
+})
+
+
+class _GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31：带 gzip 头
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types=COMPRESSIBLE_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = frozenset(content_types)
+
+    def _choose_encoder(self, headers: Headers):
+        accepted = _accepted_encodings(headers)
+        if brotli is not None and "br" in accepted:
+            return lambda: _BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return lambda: _GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        make_encoder = self._choose_encoder(Headers(scope=scope))
+        if make_encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send, make_encoder)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, make_encoder):
+        self.middleware = middleware
+        self._send = send
+        self._make_encoder = make_encoder
+        self._start: Optional[Message] = None
+        self._encoder = None
+        self._passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if self._start["status"] < 200 or self._start["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.middleware.content_types
+
+    async def send(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # 等到第一块响应体再决定是否压缩（需要知道是否流式、大小）
+            self._start = message
+            return
+
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._encoder is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            if not self._compressible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+
+            self._encoder = self._make_encoder()
+            headers["Content-Encoding"] = self._encoder.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                # 一次性响应：整体压缩，更新长度
+                body = self._encoder.compress(body) + self._encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # 流式响应：长度未知
+            del headers["Content-Length"]
+            await self._send(self._start)
+
+        if more_body:
+            chunk = self._encoder.compress(body) + self._encoder.flush()
+        else:
+            chunk = self._encoder.compress(body) + self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
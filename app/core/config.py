@@ -16,14 +16,36 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
 
+    # ===== 生产部署（run_prod.py） =====
+    WORKERS: int = 0  # worker 进程数，0 表示按可用 CPU 核数
+    WORKERS_MAX: int = 8  # 自动计算时的上限（每个 worker 都有自己的连接池）
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30  # 关闭时等待进行中的请求和后台任务的秒数
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # 信任其 X-Forwarded-For 的反向代理地址
+
     DATABASE_URL: str = "sqlite:///./rainbow_register.db"
+    DB_POOL_SIZE: int = 5  # 连接池常驻连接数（每个 worker 进程）
+    DB_MAX_OVERFLOW: int = 10  # 高峰时额外允许的连接数
+    DB_POOL_TIMEOUT: int = 30  # 等待空闲连接的秒数，超时报错
 
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 7200
+    USER_TOKEN_EXPIRE_MINUTES: int = 43200  # 小程序用户 token 有效期（30 天）
+    USER_TOKEN_CACHE_SIZE: int = 10000  # 用户 token 验签缓存条目数
+    USER_TOKEN_REQUIRED: bool = False  # 为 True 时不再接受直接传 openid 的旧版客户端
+    ADMIN_TOKEN_CACHE_SIZE: int = 1024  # 管理员 token 验证缓存条目数
+    ADMIN_TOKEN_CACHE_TTL: int = 60  # 缓存的 token 多久重新核对一次版本号（秒），即其他进程登出的最长生效延迟
+    BCRYPT_ROUNDS: int = 12  # bcrypt cost，调整后旧密码在下次登录时自动重新哈希
+    PASSWORD_HASH_WORKERS: int = 2  # 密码哈希线程数
 
     WECHAT_APP_ID: str = ""
     WECHAT_APP_SECRET: str = ""
+    WECHAT_API_BASE: str = "https://api.weixin.qq.com"
+    WECHAT_TIMEOUT: float = 5.0  # 微信接口超时（秒）
+    WECHAT_MAX_CONNECTIONS: int = 20
+    WECHAT_SESSION_CACHE_TTL: int = 300  # code → openid 缓存时间（秒），wx_code 本身 5 分钟有效
+    WECHAT_BREAKER_THRESHOLD: int = 5  # 连续失败多少次后熔断
+    WECHAT_BREAKER_COOLDOWN: float = 30  # 熔断持续时间（秒）
 
     UPLOAD_DIR: str = "./uploads/photos"
     MAX_UPLOAD_SIZE: int = 5242880
@@ -36,10 +58,27 @@ class Settings(BaseSettings):
     COS_BUCKET: str = "tbowo-1259330613"
     COS_DOMAIN: str = "https://tbowo-1259330613.cos.ap-shanghai.myqcloud.com"
     COS_UPLOAD_PREFIX: str = "photos"  # COS中的目录前缀
+    STORAGE_BACKEND: str = "cos"  # cos / local（本地目录，开发和压测用）
+    LOCAL_STORAGE_DIR: str = "./uploads"  # 本地存储目录，对外地址为 /uploads/{key}
+
+    SERIAL_BLOCK_SIZE: int = 1  # 资料编号每次预取的数量，1 表示逐个分配（编号连续）
 
     INVITATION_CODE_LENGTH: int = 6
     INVITATION_EXPIRE_DAYS: int = 7
     DEFAULT_INVITATION_QUOTA: int = 2
+    INVITATION_GENERATE_MAX: int = 1000  # 管理员单次批量生成上限
+    INVITATION_SWEEP_INTERVAL: int = 3600  # 过期邀请码清扫间隔（秒），0 表示不启动
+
+    # 邀请码校验防刷
+    INVITATION_BLOOM_ENABLED: bool = True
+    INVITATION_BLOOM_CAPACITY: int = 100000  # 布隆过滤器最小容量
+    INVITATION_BLOOM_ERROR_RATE: float = 0.001
+    INVITATION_BLOOM_SYNC_INTERVAL: float = 5  # 增量同步其他进程生成的邀请码的间隔（秒），0 表示不同步
+    INVITATION_BLOOM_SYNC_OVERLAP: int = 300  # 每次同步回扫的时间（秒），覆盖乱序提交的事务
+    INVITATION_BLOOM_FALLBACK_LIMIT: int = 20  # 每个同步周期内未命中时回查数据库的次数上限，0 表示不回查
+    INVITATION_VERIFY_WINDOW: int = 60  # 限流窗口（秒）
+    INVITATION_VERIFY_IP_LIMIT: int = 20  # 每个 IP 窗口内最多校验次数，0 表示不限
+    INVITATION_VERIFY_OPENID_LIMIT: int = 10  # 每个 openid 窗口内最多校验次数，0 表示不限
 
     # ★ 审核放行邀请码（使用这些邀请码提交的资料自动通过审核）
     REVIEW_BYPASS_CODES: Union[List[str], str] = ""
@@ -53,6 +92,40 @@ class Settings(BaseSettings):
     AI_API_URL: str = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
     AI_API_TYPE: str = "openai"  # 智谱用 openai 兼容格式
     AI_MODEL: str = "glm-4.7-flash"  # 免费模型
+    AI_TIMEOUT: float = 60  # 单次调用超时（秒）
+    AI_MAX_CONNECTIONS: int = 20  # 共享 HTTP 客户端的连接数上限
+
+    # 系统设置缓存：每隔多少秒检查一次其他进程是否修改过配置
+    SETTINGS_CACHE_TTL: int = 5
+
+    # ===== 公众号文案模板 =====
+    POST_TEMPLATE_STYLE: str = "classic"  # 默认文案风格，见 app/services/post_templates.py
+    POST_TEMPLATE_CACHE_DIR: str = ""  # Jinja2 字节码缓存目录，留空则只在进程内缓存
+    POST_EXPORT_CONCURRENCY: int = 4  # 批量导出时同时进行的 AI 调用数
+    POST_EXPORT_MAX: int = 500  # 单次批量导出的最大资料数
+
+    # ===== 响应压缩 =====
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 需安装 brotli，动态压缩建议 4~5
+
+    # ===== 日志与监控 =====
+    LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""  # /metrics 访问令牌（Authorization: Bearer <token>），为空时不注册 /metrics
+    METRICS_MULTIPROC_DIR: str = ""  # 多 worker 汇总指标的共享目录，run_prod.py 多 worker 启动时未配置则自动使用临时目录
+    METRICS_MULTIPROC_FLUSH_INTERVAL: float = 2  # 每个 worker 定期写入共享目录的间隔（秒）
+    SLOW_REQUEST_MS: int = 1000  # 超过该耗时的请求记一条慢请求日志，0 关闭
+
+    # ===== 采样分析 =====
+    PROFILING_ENABLED: bool = True  # 允许管理员用 X-Profile: 1 / ?_profile=1 对单个请求采样
+    PROFILING_SAMPLE_INTERVAL_MS: int = 5  # 单请求采样间隔
+    PROFILING_OUTPUT_DIR: str = "profiling"
+    PROFILING_KEEP: int = 50  # 最多保留的采样结果份数
+    PROFILING_CONTINUOUS_ENABLED: bool = False  # 常驻低频采样
+    PROFILING_CONTINUOUS_INTERVAL_MS: int = 100
+    PROFILING_CONTINUOUS_WINDOW: int = 300  # 持续采样每多少秒保存一份
 
     CORS_ORIGINS: Union[List[str], str] = "*"
 
@@ -1,12 +1,15 @@
 """
 依赖注入
 """
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.base import SessionLocal
-from app.core.security import verify_token
+from app.core.config import settings
+from app.core.security import (
+    verify_token, verify_user_token, get_cached_admin_token, cache_admin_token, USER_TOKEN_TYPE
+)
 
 # Security schemes - these make the "Authorize" button appear in Swagger UI
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -21,19 +24,75 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user_openid(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-) -> str:
+) -> dict:
     """
-    从请求头获取用户openid
+    从请求头获取用户信息 {openid, profile_id, status}
     用户端API使用
+    ★ 签名 token 本地验签，不查数据库
+    ★ 兼容旧版客户端直接传 openid（此时 profile_id / status 为 None），USER_TOKEN_REQUIRED 开启后拒绝
     """
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing authorization header"
         )
-    return credentials.credentials
+
+    token = credentials.credentials
+    if token.count(".") == 2:
+        user = verify_user_token(token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+        return user
+
+    if settings.USER_TOKEN_REQUIRED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    return {"openid": token, "profile_id": None, "status": None}
+
+
+def get_current_user_openid(user: dict = Depends(get_current_user)) -> str:
+    """
+    从请求头获取用户openid
+    用户端API使用
+    """
+    return user["openid"]
+
+
+def authenticate_admin_token(token: str) -> Optional[dict]:
+    """
+    验证管理员 token，通过时返回 payload，否则返回 None
+    ★ 验证结果缓存（按 token 哈希），命中时不验签也不查库
+    ★ 未命中时验签并核对 token 版本号，登出后版本号递增，旧 token 失效
+    """
+    payload = get_cached_admin_token(token)
+    if payload:
+        return payload
+
+    payload = verify_token(token)
+    # 用户 token 与管理员 token 使用同一个密钥签名，必须按声明区分，否则用户 token 可以访问管理端
+    if not payload or payload.get("typ") == USER_TOKEN_TYPE or not payload.get("admin_id"):
+        return None
+
+    from app.crud.crud_admin import get_admin_token_state
+
+    db = SessionLocal()
+    try:
+        state = get_admin_token_state(db, payload["admin_id"])
+    finally:
+        db.close()
+
+    if not state or not state.is_active or state.token_version != payload.get("ver", 0):
+        return None
+
+    cache_admin_token(token, payload)
+    return payload
 
 
 def get_current_admin(
@@ -49,11 +108,10 @@ def get_current_admin(
             detail="Missing authorization header"
         )
 
-    payload = verify_token(credentials.credentials)
+    payload = authenticate_admin_token(credentials.credentials)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
-
-    return payload
\ No newline at end of file
+    return payload
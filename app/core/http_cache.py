@@ -0,0 +1,78 @@
+"""
+HTTP 条件请求缓存：ETag / Last-Modified / 304
+轮询接口在数据未变化时只返回 304 空响应
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.core.responses import ORJSONResponse
+
+# Cache-Control 策略
+CACHE_PUBLIC_SHORT = "public, max-age=60"
+CACHE_REVALIDATE = "no-cache"
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """由若干版本信息生成弱 ETag（响应可能被压缩，只保证语义一致）"""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _to_utc(dt: datetime) -> datetime:
+    # 数据库中的时间按 UTC 存储，SQLite 读出来不带时区
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """按 If-None-Match（优先）/ If-Modified-Since 判断客户端缓存是否仍然有效"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        current = _strip_weak(etag)
+        return any(_strip_weak(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _to_utc(last_modified) <= _to_utc(since)
+
+    return False
+
+
+def cached_json_response(
+    request: Request,
+    content: Any,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = CACHE_REVALIDATE,
+) -> Response:
+    """
+    带缓存头的 JSON 响应
+    content 可以是一个返回响应体的函数，命中 304 时不会调用
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if callable(content):
+        content = content()
+    return ORJSONResponse(content=content, headers=headers)
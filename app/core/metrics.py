@@ -0,0 +1,540 @@
+"""
+进程内指标与请求耗时统计（Prometheus 文本格式，/metrics 暴露）
+★ 不依赖 prometheus_client，计数器 / 直方图在本进程内累计
+★ 多 worker（run_prod.py）共用一个端口，抓取会随机落到某个 worker：配置 METRICS_MULTIPROC_DIR 后
+  每个 worker 每 METRICS_MULTIPROC_FLUSH_INTERVAL 秒把自己的数值写到该目录下的 <pid>.json，/metrics 汇总所有 worker 后输出
+  （计数器 / 直方图累加，已退出 worker 的计数保留；Gauge 按 multiprocess_mode 累加或带 pid 标签，只算存活的 worker）
+★ 请求维度：按路由模板统计耗时直方图、状态码、并发中的请求数、每个请求的数据库耗时
+★ 数据库：SQLAlchemy cursor 事件统计每条 SQL 耗时
+★ 外部调用：track_upstream 统计 COS / AI / 微信接口耗时与失败数
+"""
+import asyncio
+import bisect
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 外部接口（AI 调用可能数十秒）
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 单条 SQL
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labelvalues: Sequence) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}")
+        return tuple(str(v) for v in labelvalues)
+
+    def _samples(self, values: Dict[Tuple[str, ...], object], labelnames: Tuple[str, ...]) -> List[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> list:
+        """当前数值（可 JSON 序列化），多进程汇总用"""
+        with self._lock:
+            return [[list(k), copy.deepcopy(v)] for k, v in self._values.items()]
+
+    def _merge(self, snapshots: Iterable[Tuple[int, bool, list]]) -> Tuple[Dict[Tuple[str, ...], object], Tuple[str, ...]]:
+        """汇总各进程快照 (pid, 是否存活, 快照)，返回 (数值, 标签名)"""
+        raise NotImplementedError
+
+    def render(self, snapshots: Optional[Iterable[Tuple[int, bool, list]]] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if snapshots is None:
+            with self._lock:
+                lines.extend(self._samples(self._values, self.labelnames))
+        else:
+            values, labelnames = self._merge(snapshots)
+            lines.extend(self._samples(values, labelnames))
+        return lines
+
+
+def _simple_samples(name: str, values, labelnames) -> List[str]:
+    return [f"{name}{_format_labels(labelnames, k)} {_format_number(v)}" for k, v in sorted(values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self, values, labelnames) -> List[str]:
+        return _simple_samples(self.name, values, labelnames)
+
+    def _merge(self, snapshots):
+        merged: Dict[Tuple[str, ...], float] = {}
+        for _, _, snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                merged[key] = merged.get(key, 0.0) + value
+        return merged, self.labelnames
+
+
+class Gauge(_Metric):
+    """
+    multiprocess_mode 为多进程汇总方式：
+    sum 存活 worker 的数值相加；all 每个存活 worker 单独输出，带 pid 标签
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 multiprocess_mode: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ("sum", "all"):
+            raise ValueError(f"不支持的 multiprocess_mode: {multiprocess_mode}")
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, *labelvalues):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def _samples(self, values, labelnames) -> List[str]:
+        return _simple_samples(self.name, values, labelnames)
+
+    def _merge(self, snapshots):
+        merged: Dict[Tuple[str, ...], float] = {}
+        for pid, alive, snapshot in snapshots:
+            if not alive:
+                continue
+            for key, value in snapshot:
+                key = tuple(key)
+                if self.multiprocess_mode == "all":
+                    merged[key + (str(pid),)] = value
+                else:
+                    merged[key] = merged.get(key, 0.0) + value
+        if self.multiprocess_mode == "all":
+            return merged, self.labelnames + ("pid",)
+        return merged, self.labelnames
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues):
+        key = self._key(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各分桶计数（最后一个为 +Inf）, 总和, 总数]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, values, labelnames) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                labels = _format_labels(labelnames, key, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _merge(self, snapshots):
+        merged: Dict[Tuple[str, ...], list] = {}
+        for _, _, snapshot in snapshots:
+            for key, (counts, total, count) in snapshot:
+                key = tuple(key)
+                state = merged.get(key)
+                if state is None:
+                    state = merged[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                # 分桶定义变化（升级后旧文件）时不合并分桶
+                if len(counts) == len(state[0]):
+                    state[0] = [a + b for a, b in zip(state[0], counts)]
+                    state[1] += total
+                    state[2] += count
+        return merged, self.labelnames
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Windows 上 os.kill 会结束进程，不能用来探测
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Registry:
+    def __init__(self, multiprocess_dir: Optional[str] = None, flush_interval: float = 2.0):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+        self.multiprocess_dir = multiprocess_dir or None
+        self.flush_interval = flush_interval
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """抓取前调用，用于刷新连接池占用等即时数值"""
+        self._collectors.append(collector)
+
+    def configure_multiprocess(self, directory: Optional[str], flush_interval: float = 2.0):
+        """开启多进程汇总（directory 为空时关闭）"""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory or None
+        self.flush_interval = flush_interval
+
+    def _collect(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"指标采集失败: {e}")
+
+    def flush(self, force: bool = False):
+        """
+        把本进程的数值写到共享目录（未开启多进程汇总时忽略）
+        ★ 距上次写入不足 flush_interval 秒时跳过（force 时总是写入）
+        """
+        if not self.multiprocess_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            self._flushed_at = now
+            data = {"pid": os.getpid(), "metrics": {m.name: m.snapshot() for m in self._metrics}}
+            path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"指标写入共享目录失败: {e}")
+        finally:
+            self._flush_lock.release()
+
+    def _read_snapshots(self) -> List[Tuple[int, bool, dict]]:
+        """读取其他 worker 的快照 (pid, 是否存活, {指标名: 快照})"""
+        snapshots = []
+        for entry in os.scandir(self.multiprocess_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                pid = int(data["pid"])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if pid == os.getpid():
+                continue
+            snapshots.append((pid, _pid_alive(pid), data.get("metrics", {})))
+        return snapshots
+
+    def render(self) -> str:
+        self._collect()
+        lines = []
+        if self.multiprocess_dir:
+            self.flush(force=True)
+            others = self._read_snapshots()
+            for metric in self._metrics:
+                snapshots = [(os.getpid(), True, metric.snapshot())]
+                snapshots += [(pid, alive, data.get(metric.name, [])) for pid, alive, data in others]
+                lines.extend(metric.render(snapshots))
+        else:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PROCESS_START_TIME = REGISTRY.register(Gauge(
+    "process_start_time_seconds", "进程启动时间（Unix 时间戳）", multiprocess_mode="all"))
+PROCESS_START_TIME.set(time.time())
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP 请求数", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（到响应体发送完毕）", ("method", "route")))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "正在处理的 HTTP 请求数"))
+HTTP_REQUEST_DB_DURATION = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "单个请求内数据库耗时合计", ("method", "route")))
+
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "单条 SQL 耗时", ("operation",), buckets=DB_BUCKETS))
+DB_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "db_pool_connections_checked_out", "连接池中正在使用的连接数", multiprocess_mode="all"))
+
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "外部接口调用耗时",
+    ("service", "operation", "outcome"), buckets=UPSTREAM_BUCKETS))
+
+
+# ============================================================
+# 请求内统计
+# ============================================================
+
+class RequestStats:
+    """单个请求累计的数据库 / 外部调用耗时"""
+    __slots__ = ("db_seconds", "db_queries", "upstream_seconds")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.upstream_seconds = 0.0
+
+
+# 同步接口在线程池中执行时会复制 context，拿到的是同一个 RequestStats 对象
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """
+    统计一次外部调用
+    with track_upstream("wechat", "jscode2session"):
+        ...
+    块内抛出异常记为 error
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_DURATION.observe(elapsed, service, operation, outcome)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.upstream_seconds += elapsed
+
+
+# ============================================================
+# 数据库
+# ============================================================
+
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _sql_operation(statement: str) -> str:
+    head = statement.lstrip()[:10].split(None, 1)
+    op = head[0].upper() if head else ""
+    return op if op in _DB_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine):
+    """给 SQLAlchemy 引擎挂上耗时统计"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        DB_QUERY_DURATION.observe(elapsed, _sql_operation(statement))
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_seconds += elapsed
+            stats.db_queries += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_metrics_query_start"):
+            conn.info["_metrics_query_start"].pop()
+
+    def _collect_pool():
+        checkedout = getattr(engine.pool, "checkedout", None)
+        if checkedout is not None:
+            DB_POOL_CHECKED_OUT.set(checkedout())
+
+    REGISTRY.add_collector(_collect_pool)
+
+
+# ============================================================
+# 中间件
+# ============================================================
+
+def _route_template(scope: Scope) -> str:
+    """
+    路由模板（/api/v1/admin/profiles/{profile_id}），避免按真实路径产生大量标签
+    ★ 使用框架匹配到的路由模板，不按路径参数的值反推
+    ★ 当前 FastAPI 嵌套 include_router 时 route.path 只有子路由内的相对路径，完整模板在
+      scope["fastapi"]["effective_route_context"].path；没有该字段（旧版本复制路由）时 route.path 即完整模板
+    """
+    route = scope.get("route")
+    if route is not None:
+        context = (scope.get("fastapi") or {}).get("effective_route_context")
+        return getattr(context, "path", None) or route.path
+    if scope.get("endpoint") is None:
+        return "unmatched"
+    # 静态文件等挂载应用，不区分具体文件
+    app_root_path = scope.get("app_root_path", "")
+    root_path = scope.get("root_path", "")
+    return f"{root_path[len(app_root_path):]}/{{path}}"
+
+
+class MetricsMiddleware:
+    """
+    记录请求耗时、状态码、并发数与数据库耗时
+    耗时计到响应体最后一块发出为止，不包含响应后执行的 BackgroundTasks
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: int = 1000):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            elapsed = time.perf_counter() - start
+            method = scope["method"]
+            route = _route_template(scope)
+            HTTP_REQUESTS.inc(method, route, status_code)
+            HTTP_REQUEST_DURATION.observe(elapsed, method, route)
+            HTTP_REQUEST_DB_DURATION.observe(stats.db_seconds, method, route)
+            if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+                logger.warning(
+                    f"慢请求 method={method} route={route} status={status_code} "
+                    f"duration_ms={elapsed * 1000:.1f} db_ms={stats.db_seconds * 1000:.1f} "
+                    f"db_queries={stats.db_queries} upstream_ms={stats.upstream_seconds * 1000:.1f}"
+                )
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            record()
+            _request_stats.reset(token)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+async def _flush_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        REGISTRY.flush(force=True)
+
+
+def start_metrics_flusher() -> Optional[asyncio.Task]:
+    """
+    定期把本进程指标写到共享目录（未开启多进程汇总时不启动）
+    ★ 空闲的 worker 不处理请求也要写，否则其他 worker 汇总时读到的是旧数值
+    """
+    if not REGISTRY.multiprocess_dir:
+        return None
+    return asyncio.create_task(_flush_loop(max(REGISTRY.flush_interval, 0.1)))
+
+
+async def stop_metrics_flusher(task: Optional[asyncio.Task]):
+    """停止定期写入，并写入最后一次（保留本进程最终计数）"""
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    REGISTRY.flush(force=True)
@@ -0,0 +1,348 @@
+"""
+线上采样分析（按请求 / 持续）
+★ 管理员请求带 X-Profile: 1 头或 ?_profile=1 参数时，请求期间对进程内线程做栈采样，
+  结果按 collapsed stack 格式保存（flamegraph.pl / speedscope 可直接打开），响应头返回 X-Profile-Id
+★ 采样的是整个进程（事件循环 + 线程池），同时处理的其他请求也会计入，排查单个慢接口时足够
+★ 持续采样：低频率常驻采样，每个时间窗口落一份文件
+★ 空闲线程（阻塞在 select / 锁 / 队列上）默认不计入
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# 线程阻塞等待时所在的栈顶函数（文件名, 函数名）
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("thread.py", "_worker"),  # concurrent.futures 线程池等待任务
+}
+
+_SITE_MARKERS = ("site-packages" + os.sep, "dist-packages" + os.sep)
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+_CWD = os.getcwd() + os.sep
+
+
+def _short_filename(filename: str) -> str:
+    for marker in _SITE_MARKERS:
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    for prefix in (_STDLIB, _CWD):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+class StackSampler:
+    """按固定间隔采样所有线程的 Python 栈，累计为 collapsed stack 计数"""
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+        self._thread_names: Dict[int, str] = {}
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own)
+            self._on_tick()
+
+    def _on_tick(self):
+        pass
+
+    def _frame_label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_filename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _thread_name(self, thread_id: int) -> str:
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(thread_id, f"thread-{thread_id}")
+        return name
+
+    def sample(self, exclude: Optional[int] = None):
+        """采样一次"""
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == exclude:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(self._frame_label(frame.f_code))
+                frame = frame.f_back
+            frames.append(self._thread_name(thread_id))
+            frames.reverse()
+            stacks.append(";".join(frames))
+
+        with self._lock:
+            self.samples += 1
+            self._counts.update(stacks)
+
+    def drain(self) -> Counter:
+        """取出并清空已累计的结果"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self.samples = 0
+        return counts
+
+
+def render_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+# ============================================================
+# 结果保存
+# ============================================================
+
+def _output_dir() -> str:
+    os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+    return settings.PROFILING_OUTPUT_DIR
+
+
+def save_profile(counts: Counter, meta: dict) -> str:
+    """保存一份采样结果：{id}.collapsed + {id}.json（元信息），返回 id"""
+    profile_id = meta.get("id") or uuid.uuid4().hex
+    meta = dict(meta, id=profile_id, stacks=len(counts), created_at=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+    directory = _output_dir()
+
+    with open(os.path.join(directory, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+        f.write(render_collapsed(counts))
+    with open(os.path.join(directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    _prune(directory)
+    return profile_id
+
+
+def _prune(directory: str):
+    """只保留最近 PROFILING_KEEP 份"""
+    metas = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in metas[settings.PROFILING_KEEP:]:
+        profile_id = entry.name[:-len(".json")]
+        for suffix in (".json", ".collapsed"):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[dict]:
+    """已保存的采样结果（新的在前）"""
+    directory = settings.PROFILING_OUTPUT_DIR
+    if not os.path.isdir(directory):
+        return []
+    items = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as f:
+                items.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    items.sort(key=lambda m: m.get("created_at", ""), reverse=True)
+    return items
+
+
+def get_profile_path(profile_id: str) -> Optional[str]:
+    """采样结果文件路径，不存在返回 None"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_OUTPUT_DIR, f"{profile_id}.collapsed")
+    return path if os.path.isfile(path) else None
+
+
+# ============================================================
+# 按请求采样
+# ============================================================
+
+# 同一时间只采样一个请求（采样的是整个进程，并发采样没有意义）
+_request_profile_lock = threading.Lock()
+
+
+def _profile_requested(scope: Scope) -> bool:
+    if Headers(scope=scope).get("x-profile", "").lower() in ("1", "true", "yes"):
+        return True
+    query_string = scope.get("query_string", b"")
+    if b"_profile=" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("_profile", [])
+    return any(v.lower() in ("1", "true", "yes") for v in values)
+
+
+def _bearer_token(scope: Scope) -> Optional[str]:
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+class ProfilingMiddleware:
+    """
+    请求级采样分析
+    只对携带有效管理员 token 的请求生效，其他请求即使带了标记也按正常流程处理
+    """
+
+    def __init__(self, app: ASGIApp, interval_ms: int = 5):
+        self.app = app
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        from app.core.deps import authenticate_admin_token
+
+        token = _bearer_token(scope)
+        admin = await run_in_threadpool(authenticate_admin_token, token) if token else None
+        if not admin:
+            await self.app(scope, receive, send)
+            return
+
+        if not _request_profile_lock.acquire(blocking=False):
+            logger.info("已有请求在采样中，本次请求不采样")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # ★ stop() 要 join 采样线程（最多一个采样间隔），放到线程里，不阻塞事件循环
+            await asyncio.to_thread(sampler.stop)
+            _request_profile_lock.release()
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            meta = {
+                "id": profile_id,
+                "kind": "request",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": duration_ms,
+                "samples": sampler.samples,
+                "interval_ms": self.interval * 1000,
+                "admin": admin.get("sub"),
+            }
+            try:
+                await run_in_threadpool(save_profile, sampler.drain(), meta)
+                logger.info(f"请求采样已保存: {profile_id} {scope['method']} {scope['path']} {duration_ms}ms")
+            except Exception as e:
+                logger.error(f"保存请求采样失败: {e}")
+
+
+# ============================================================
+# 持续采样
+# ============================================================
+
+class ContinuousProfiler(StackSampler):
+    """常驻低频采样，每 window 秒保存一份"""
+
+    def __init__(self, interval: float, window: int):
+        super().__init__(interval)
+        self.window = window
+        self._window_start = time.time()
+
+    def _on_tick(self):
+        if time.time() - self._window_start >= self.window:
+            self.flush()
+
+    def flush(self):
+        window_start, self._window_start = self._window_start, time.time()
+        samples = self.samples
+        counts = self.drain()
+        if not counts:
+            return
+        try:
+            save_profile(counts, {
+                "kind": "continuous",
+                "samples": samples,
+                "interval_ms": self.interval * 1000,
+                "window_start": datetime.utcfromtimestamp(window_start).strftime("%Y-%m-%d %H:%M:%S"),
+                "pid": os.getpid(),
+            })
+        except Exception as e:
+            logger.error(f"保存持续采样失败: {e}")
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+
+def start_continuous_profiler() -> Optional[ContinuousProfiler]:
+    """按配置启动持续采样，未开启时返回 None"""
+    if not settings.PROFILING_CONTINUOUS_ENABLED:
+        return None
+    profiler = ContinuousProfiler(
+        settings.PROFILING_CONTINUOUS_INTERVAL_MS / 1000,
+        settings.PROFILING_CONTINUOUS_WINDOW,
+    )
+    profiler.start()
+    logger.info(f"持续采样已启动: 间隔 {settings.PROFILING_CONTINUOUS_INTERVAL_MS}ms，"
+                f"每 {settings.PROFILING_CONTINUOUS_WINDOW}s 保存一份")
+    return profiler
@@ -0,0 +1,83 @@
+"""
+滑动窗口限流（进程内）
+★ 每个 key 记录窗口内的请求时间戳，超出次数即拒绝，单次判断为微秒级
+★ 多进程部署时每个进程单独计数，实际上限约为 limit × 进程数
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, Request, status
+
+
+class SlidingWindowLimiter:
+    """滑动窗口限流器：window 秒内同一个 key 最多 limit 次"""
+
+    def __init__(self, limit: int, window: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> Optional[float]:
+        """
+        记录一次请求
+        返回 None 表示放行，否则返回需要等待的秒数
+        """
+        if self.limit <= 0:
+            return None
+
+        now = time.monotonic()
+        cutoff = now - self.window
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                if len(self._hits) >= self.max_keys:
+                    self._prune(cutoff)
+                hits = self._hits[key] = deque()
+
+            while hits and hits[0] <= cutoff:
+                hits.popleft()
+
+            if len(hits) >= self.limit:
+                return hits[0] + self.window - now
+
+            hits.append(now)
+            return None
+
+    def reset(self, key: str = None):
+        """清除某个 key（不传则全部清除）"""
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
+
+    def _prune(self, cutoff: float):
+        # key 数量超限时清掉窗口内已无请求的 key，仍然超限则整体清空
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[key]
+        if len(self._hits) >= self.max_keys:
+            self._hits.clear()
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    客户端 IP
+    ★ 不直接读 X-Forwarded-For / X-Real-IP（客户端可以伪造，绕过按 IP 限流）
+    ★ 部署在 nginx 后面时由 uvicorn 的 proxy_headers 只对 FORWARDED_ALLOW_IPS 中的代理改写 client
+    """
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limit(limiter: SlidingWindowLimiter, key: str):
+    """超出限流时抛出 429"""
+    retry_after = limiter.hit(key)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="请求过于频繁，请稍后再试",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
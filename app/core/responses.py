@@ -0,0 +1,61 @@
+"""
+JSON 响应
+★ 基于 orjson 序列化，比标准库 json + jsonable_encoder 快一个数量级
+★ 时间统一格式化为 "%Y-%m-%d %H:%M:%S"，接口里不用再逐个 strftime
+★ 大数据量接口直接返回 ORJSONResponse，跳过 FastAPI 对 response_model 的校验和序列化
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装 orjson 时退回标准库
+    orjson = None
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _default(obj: Any) -> Any:
+    """orjson / json 无法直接序列化的类型"""
+    if isinstance(obj, datetime):
+        # 与 strftime(DATETIME_FORMAT) 结果相同（去掉微秒和时区），速度约快 3 倍
+        return obj.isoformat(" ", "seconds")[:19]
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return _shallow_dump(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _shallow_dump(model: BaseModel) -> dict:
+    # 只展开一层字段，嵌套的模型 / 时间交给 _default 处理，避免 model_dump 深拷贝整棵 data
+    return dict(model)
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON 字节"""
+    if isinstance(content, BaseModel):
+        content = _shallow_dump(content)
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    """orjson 序列化的 JSON 响应，content 可以直接传 ResponseModel"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,26 +2,71 @@
 安全相关：密码加密、JWT生成等
 使用 PyJWT 替代 python-jose
 """
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 import jwt  # PyJWT
 from app.core.config import settings
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码加密上下文（cost 变化后旧哈希会被 needs_update 识别，登录时自动重新哈希）
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # bcrypt限制：密码最多72字节
 MAX_PASSWORD_LENGTH = 72
 
+# bcrypt 专用线程池：哈希计算不阻塞事件循环，并发数受 PASSWORD_HASH_WORKERS 限制
+_password_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _truncate_password(password: str) -> str:
+    """截断到72字节"""
+    if len(password.encode('utf-8')) > MAX_PASSWORD_LENGTH:
+        return password.encode('utf-8')[:MAX_PASSWORD_LENGTH].decode('utf-8', errors='ignore')
+    return password
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _password_executor
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    # 截断到72字节
-    if len(plain_password.encode('utf-8')) > MAX_PASSWORD_LENGTH:
-        plain_password = plain_password.encode('utf-8')[:MAX_PASSWORD_LENGTH].decode('utf-8', errors='ignore')
+    return pwd_context.verify(_truncate_password(plain_password), hashed_password)
 
-    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，哈希参数过时（如 BCRYPT_ROUNDS 调整）时同时返回新哈希
+    返回 (是否正确, 新哈希或 None)
+    """
+    return pwd_context.verify_and_update(_truncate_password(plain_password), hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """在 bcrypt 线程池中执行 verify_and_update_password"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_executor(), verify_and_update_password, plain_password, hashed_password
+    )
+
+
+def shutdown_password_executor():
+    """关闭 bcrypt 线程池（应用关闭时调用）"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
 
 
 def get_password_hash(password: str) -> str:
@@ -79,4 +124,102 @@ def verify_token(token: str) -> Optional[dict]:
         return None
     except Exception:
         # 其他错误
-        return None
\ No newline at end of file
+        return None
+
+
+# ========== 小程序用户 token ==========
+
+USER_TOKEN_TYPE = "user"
+
+# token → (payload, 过期时间戳)，避免同一个 token 反复验签
+_user_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_user_token_lock = threading.Lock()
+
+
+def create_user_token(openid: str, profile_id: Optional[int] = None, status: Optional[str] = None) -> str:
+    """
+    签发用户 token
+    ★ 携带 openid、资料ID和签发时的资料状态；状态可能过期，只用于不影响正确性的快速判断
+    """
+    return create_access_token(
+        {"typ": USER_TOKEN_TYPE, "sub": openid, "pid": profile_id, "st": status},
+        expires_delta=timedelta(minutes=settings.USER_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def verify_user_token(token: str) -> Optional[dict]:
+    """
+    验证用户 token，返回 {openid, profile_id, status}
+    ★ 验签结果按 token 缓存到过期为止（LRU，最多 USER_TOKEN_CACHE_SIZE 个）
+    """
+    now = time.time()
+    with _user_token_lock:
+        entry = _user_token_cache.get(token)
+        if entry is not None:
+            if entry[1] > now:
+                _user_token_cache.move_to_end(token)
+                return entry[0]
+            del _user_token_cache[token]
+
+    payload = verify_token(token)
+    if not payload or payload.get("typ") != USER_TOKEN_TYPE or not payload.get("sub"):
+        return None
+
+    user = {"openid": payload["sub"], "profile_id": payload.get("pid"), "status": payload.get("st")}
+    if settings.USER_TOKEN_CACHE_SIZE > 0:
+        with _user_token_lock:
+            _user_token_cache[token] = (user, payload["exp"])
+            while len(_user_token_cache) > settings.USER_TOKEN_CACHE_SIZE:
+                _user_token_cache.popitem(last=False)
+    return user
+
+
+# ========== 管理员 token 验证缓存 ==========
+
+# sha256(token) → (payload, 过期时间戳, 校验时间戳)
+_admin_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_admin_token_lock = threading.Lock()
+
+
+def _admin_token_key(token: str) -> str:
+    # 缓存中不保存原始 token
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_admin_token(token: str) -> Optional[dict]:
+    """
+    从缓存取已验证的管理员 token
+    ★ 超过 exp 或距上次校验超过 ADMIN_TOKEN_CACHE_TTL 秒时视为未命中，需要重新验证
+    """
+    key = _admin_token_key(token)
+    now = time.time()
+    with _admin_token_lock:
+        entry = _admin_token_cache.get(key)
+        if entry is None:
+            return None
+        payload, expires_at, checked_at = entry
+        if expires_at <= now or now - checked_at >= settings.ADMIN_TOKEN_CACHE_TTL:
+            del _admin_token_cache[key]
+            return None
+        _admin_token_cache.move_to_end(key)
+        return payload
+
+
+def cache_admin_token(token: str, payload: dict):
+    """缓存验证通过的管理员 token"""
+    if settings.ADMIN_TOKEN_CACHE_SIZE <= 0:
+        return
+    with _admin_token_lock:
+        _admin_token_cache[_admin_token_key(token)] = (payload, payload.get("exp", 0), time.time())
+        while len(_admin_token_cache) > settings.ADMIN_TOKEN_CACHE_SIZE:
+            _admin_token_cache.popitem(last=False)
+
+
+def evict_admin_tokens(admin_id: Optional[int] = None):
+    """清除某个管理员（不传则全部）的缓存 token"""
+    with _admin_token_lock:
+        if admin_id is None:
+            _admin_token_cache.clear()
+            return
+        for key in [k for k, (payload, _, _) in _admin_token_cache.items() if payload.get("admin_id") == admin_id]:
+            del _admin_token_cache[key]
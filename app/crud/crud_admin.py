@@ -1,6 +1,7 @@
 """
 管理员CRUD操作
 """
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models.admin_user import AdminUser
 from app.core.security import get_password_hash
@@ -30,4 +31,25 @@ def update_last_login(db: Session, admin_id: int):
     admin = db.query(AdminUser).filter(AdminUser.id == admin_id).first()
     if admin:
         admin.last_login = datetime.utcnow()
-        db.commit()
\ No newline at end of file
+        db.commit()
+
+
+def get_admin_token_state(db: Session, admin_id: int):
+    """只查 token 版本号和激活状态（验证 token 用），不存在返回 None"""
+    return db.query(AdminUser.token_version, AdminUser.is_active).filter(AdminUser.id == admin_id).first()
+
+
+def bump_token_version(db: Session, admin_id: int):
+    """token 版本号 +1，使该管理员已签发的 token 全部失效"""
+    db.execute(
+        update(AdminUser)
+        .where(AdminUser.id == admin_id)
+        .values(token_version=AdminUser.token_version + 1)
+    )
+    db.commit()
+
+
+def update_password_hash(db: Session, admin_id: int, password_hash: str):
+    """更新密码哈希（登录时按新的 cost 重新哈希）"""
+    db.execute(update(AdminUser).where(AdminUser.id == admin_id).values(password_hash=password_hash))
+    db.commit()
@@ -1,10 +1,25 @@
 """
 邀请码CRUD操作
 """
+from sqlalchemy import insert, update, or_, select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.invitation_code import InvitationCode
+from app.models.user_profile import UserProfile
+from app.services.invitation import generate_invitation_codes
+from app.services.invitation_filter import add_invitation_codes
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Iterable, Set
+
+# IN 查询每批的参数个数（兼容 SQLite 旧版本 999 个参数的上限）
+CODE_LOOKUP_CHUNK_SIZE = 500
+# 过期清扫每批处理的行数
+SWEEP_BATCH_SIZE = 500
+
+
+def _live_filter():
+    """未使用且可用（与部分索引条件一致）"""
+    return (InvitationCode.is_used == False, InvitationCode.is_active == True)
 
 
 def get_invitation_by_code(db: Session, code: str) -> Optional[InvitationCode]:
@@ -31,27 +46,115 @@ def create_invitation_code(
     db.add(invitation)
     db.commit()
     db.refresh(invitation)
+    add_invitation_codes([invitation.code])
     return invitation
 
 
-def mark_invitation_as_used(
+def get_existing_codes(db: Session, codes: Iterable[str]) -> Set[str]:
+    """查询哪些邀请码已存在（分批 IN 查询）"""
+    codes = list(codes)
+    existing = set()
+    for i in range(0, len(codes), CODE_LOOKUP_CHUNK_SIZE):
+        chunk = codes[i:i + CODE_LOOKUP_CHUNK_SIZE]
+        rows = db.query(InvitationCode.code).filter(InvitationCode.code.in_(chunk)).all()
+        existing.update(row.code for row in rows)
+    return existing
+
+
+class InvitationCodeConflictError(Exception):
+    """多次重试后仍无法生成足够的不重复邀请码"""
+
+
+def create_invitation_codes_bulk(
+        db: Session,
+        count: int,
+        created_by: int = 0,
+        created_by_type: str = "admin",
+        notes: str = None,
+        expire_at: datetime = None,
+        max_attempts: int = 5,
+        commit: bool = True
+) -> List[str]:
+    """
+    批量创建邀请码
+    ★ 先一次性查出已存在的候选码并剔除，再用一条多行 INSERT 写入
+    ★ 并发写入导致撞码时回滚到保存点，只重新生成这一批
+    ★ commit=False 时不提交，由调用方和其他改动一起提交
+    ★ 重试 max_attempts 轮仍不够时回滚并抛出 InvitationCodeConflictError
+    """
+    codes: List[str] = []
+    for _ in range(max_attempts):
+        need = count - len(codes)
+        if need <= 0:
+            break
+
+        candidates = generate_invitation_codes(need) - set(codes)
+        fresh = candidates - get_existing_codes(db, candidates)
+        if not fresh:
+            continue
+
+        rows = [{
+            "code": code,
+            "created_by": created_by,
+            "created_by_type": created_by_type,
+            "notes": notes,
+            "expire_at": expire_at,
+        } for code in fresh]
+        try:
+            with db.begin_nested():
+                db.execute(insert(InvitationCode), rows)
+        except IntegrityError:
+            continue
+        codes.extend(fresh)
+
+    if len(codes) < count:
+        db.rollback()
+        raise InvitationCodeConflictError(f"邀请码生成冲突过多，仅生成 {len(codes)}/{count} 个")
+
+    if commit:
+        db.commit()
+    # 未提交时提前加入过滤器也无妨：过滤器只用于排除不存在的码，命中后仍以数据库为准
+    add_invitation_codes(codes)
+    return codes
+
+
+def redeem_invitation_code(
         db: Session,
         code: str,
         used_by_openid: str,
         user_id: int = None
 ) -> bool:
-    """标记邀请码为已使用"""
-    invitation = get_invitation_by_code(db, code)
-    if not invitation:
-        return False
+    """
+    核销邀请码
+    ★ 一条条件 UPDATE 完成校验和标记：未使用、可用、未过期才会更新
+    ★ 影响行数为 1 才算成功，两个用户同时使用同一个码只有一个能成功
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        update(InvitationCode)
+        .where(
+            InvitationCode.code == code,
+            *_live_filter(),
+            or_(InvitationCode.expire_at.is_(None), InvitationCode.expire_at > now),
+        )
+        .values(is_used=True, used_by=user_id, used_by_openid=used_by_openid, used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
 
-    invitation.is_used = True
-    invitation.used_by = user_id
-    invitation.used_by_openid = used_by_openid
-    invitation.used_at = datetime.utcnow()
 
-    db.commit()
-    return True
+def get_invitation_error(invitation: Optional[InvitationCode]) -> Optional[str]:
+    """邀请码不可用的原因，可用时返回 None"""
+    if not invitation:
+        return "邀请码不存在"
+    if invitation.is_used:
+        return "邀请码已被使用"
+    if invitation.expire_at and invitation.expire_at < datetime.utcnow():
+        return "邀请码已过期"
+    if not invitation.is_active:
+        return f"邀请码已被禁用: {invitation.disable_reason or '未知原因'}"
+    return None
 
 
 def get_user_invitation_codes(db: Session, user_id: int) -> List[InvitationCode]:
@@ -59,4 +162,80 @@ def get_user_invitation_codes(db: Session, user_id: int) -> List[InvitationCode]
     return db.query(InvitationCode).filter(
         InvitationCode.created_by == user_id,
         InvitationCode.created_by_type == "user"
-    ).all()
\ No newline at end of file
+    ).all()
+
+
+def get_published_user_codes(db: Session, user_id: int, openid: str) -> List[InvitationCode]:
+    """
+    获取已发布用户的邀请码（一次查询同时校验资料归属和状态）
+    资料不存在、不属于该 openid 或未发布时返回空列表
+    """
+    return db.query(InvitationCode).join(
+        UserProfile, UserProfile.id == InvitationCode.created_by
+    ).filter(
+        InvitationCode.created_by == user_id,
+        InvitationCode.created_by_type == "user",
+        UserProfile.openid == openid,
+        UserProfile.status.in_(("approved", "published"))
+    ).all()
+
+
+def list_invitations(db: Session, skip: int = 0, limit: int = 50, live_only: bool = False) -> List[InvitationCode]:
+    """邀请码列表（live_only 只看未使用且可用的）"""
+    query = db.query(InvitationCode)
+    if live_only:
+        query = query.filter(*_live_filter())
+    return query.order_by(InvitationCode.create_time.desc()).offset(skip).limit(limit).all()
+
+
+def deactivate_expired_codes(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """
+    批量停用已过期的邀请码
+    ★ 分批更新，每批单独提交，避免长时间持有写锁
+    """
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        ids = [row.id for row in db.query(InvitationCode.id).filter(
+            *_live_filter(),
+            InvitationCode.expire_at.isnot(None),
+            InvitationCode.expire_at <= now,
+        ).limit(batch_size).all()]
+        if not ids:
+            break
+
+        db.execute(
+            update(InvitationCode)
+            .where(InvitationCode.id.in_(ids))
+            .values(is_active=False, disable_reason="已过期")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += len(ids)
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+def reconcile_invitation_quotas(db: Session) -> int:
+    """
+    校准已通过用户的剩余邀请名额 = 该用户名下未使用且可用的邀请码数
+    返回被修正的资料数
+    """
+    live_count = select(func.count(InvitationCode.id)).where(
+        InvitationCode.created_by == UserProfile.id,
+        InvitationCode.created_by_type == "user",
+        *_live_filter(),
+    ).correlate(UserProfile).scalar_subquery()
+
+    result = db.execute(
+        update(UserProfile)
+        .where(
+            UserProfile.status.in_(("approved", "published")),
+            or_(UserProfile.invitation_quota.is_(None), UserProfile.invitation_quota != live_count),
+        )
+        .values(invitation_quota=live_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -1,9 +1,14 @@
 """
 用户资料CRUD操作
 """
+from sqlalchemy import func
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.user_profile import UserProfile
-from typing import Optional, List
+from app.crud.crud_invitation import create_invitation_codes_bulk
+from app.services.invitation import calculate_expire_time
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 
 
@@ -12,24 +17,58 @@ def get_profile_by_openid(db: Session, openid: str) -> Optional[UserProfile]:
     return db.query(UserProfile).filter(UserProfile.openid == openid).first()
 
 
+def profile_exists(db: Session, openid: str) -> bool:
+    """openid 是否已提交过资料（只查主键）"""
+    return db.query(UserProfile.id).filter(UserProfile.openid == openid).first() is not None
+
+
+def get_profile_brief(db: Session, openid: str):
+    """只查资料ID和状态（签发 token 用），不存在返回 None"""
+    return db.query(UserProfile.id, UserProfile.status).filter(UserProfile.openid == openid).first()
+
+
 def get_profile_by_id(db: Session, profile_id: int) -> Optional[UserProfile]:
     """通过ID获取资料"""
     return db.query(UserProfile).filter(UserProfile.id == profile_id).first()
 
 
-def create_profile(db: Session, openid: str, data: dict) -> UserProfile:
+def get_own_profile(db: Session, openid: str, profile_id: Optional[int] = None) -> Optional[UserProfile]:
+    """
+    获取当前用户自己的资料
+    ★ token 带资料ID时按主键查询并核对 openid（资料删除后重新提交时 token 中的ID已失效）
+    ★ 查不到或不属于该用户时按 openid 查询
+    ★ 状态以返回的资料为准，不用 token 中的状态：审核通过 / 拒绝 / AI 审核后 token 中的状态已过期
+    """
+    if profile_id:
+        profile = get_profile_by_id(db, profile_id)
+        if profile and profile.openid == openid:
+            return profile
+    return get_profile_by_openid(db, openid)
+
+
+def _save(db: Session, obj, commit: bool):
+    """
+    commit=True 时提交并刷新；commit=False 时只 flush（拿到自增ID），由调用方统一提交
+    """
+    if commit:
+        db.commit()
+        db.refresh(obj)
+    else:
+        db.flush()
+
+
+def create_profile(db: Session, openid: str, data: dict, commit: bool = True) -> UserProfile:
     """创建用户资料"""
     profile = UserProfile(
         openid=openid,
         **data
     )
     db.add(profile)
-    db.commit()
-    db.refresh(profile)
+    _save(db, profile, commit)
     return profile
 
 
-def update_profile(db: Session, profile_id: int, data: dict) -> Optional[UserProfile]:
+def update_profile(db: Session, profile_id: int, data: dict, commit: bool = True) -> Optional[UserProfile]:
     """更新资料"""
     profile = get_profile_by_id(db, profile_id)
     if not profile:
@@ -39,11 +78,27 @@ def update_profile(db: Session, profile_id: int, data: dict) -> Optional[UserPro
         setattr(profile, key, value)
 
     profile.update_time = datetime.utcnow()
-    db.commit()
-    db.refresh(profile)
+    _save(db, profile, commit)
     return profile
 
 
+def patch_profile(db: Session, profile: UserProfile, data: dict, commit: bool = True) -> List[str]:
+    """
+    部分更新资料：只写入值确实变化的字段
+    ★ 未变化的 JSON 字段（照片、爱好、期待对象）不会被重写
+    返回发生变化的字段名列表，没有变化时不写库
+    """
+    changed = [key for key, value in data.items() if getattr(profile, key) != value]
+    if not changed:
+        return changed
+
+    for key in changed:
+        setattr(profile, key, data[key])
+    profile.update_time = datetime.utcnow()
+    _save(db, profile, commit)
+    return changed
+
+
 def delete_profile(db: Session, profile_id: int) -> bool:
     """删除用户资料"""
     profile = get_profile_by_id(db, profile_id)
@@ -54,13 +109,83 @@ def delete_profile(db: Session, profile_id: int) -> bool:
     return True
 
 
-def get_pending_profiles(db: Session, skip: int = 0, limit: int = 20) -> List[UserProfile]:
+# ========== 列表类查询：只查需要的列，返回轻量 Row（按属性名访问，与模型对象用法一致） ==========
+
+# 列表卡片
+PROFILE_LIST_COLUMNS = (
+    UserProfile.id, UserProfile.serial_number, UserProfile.name, UserProfile.gender,
+    UserProfile.age, UserProfile.work_location, UserProfile.create_time, UserProfile.status,
+)
+# 邀请关系网络
+PROFILE_NETWORK_COLUMNS = PROFILE_LIST_COLUMNS + (UserProfile.referred_by, UserProfile.invited_by)
+# 地图分布
+PROFILE_MAP_COLUMNS = (
+    UserProfile.id, UserProfile.name, UserProfile.serial_number, UserProfile.gender,
+    UserProfile.age, UserProfile.status, UserProfile.work_location, UserProfile.industry,
+)
+
+
+def get_pending_profiles(db: Session, skip: int = 0, limit: int = 20) -> List[Row]:
     """获取待审核列表"""
-    return db.query(UserProfile).filter(
+    return db.query(*PROFILE_LIST_COLUMNS).filter(
         UserProfile.status == 'pending'
     ).order_by(UserProfile.create_time.desc()).offset(skip).limit(limit).all()
 
 
+def list_profile_rows(db: Session, status: str = None, skip: int = 0, limit: int = 20) -> Tuple[List[Row], int]:
+    """按状态分页获取资料列表，返回 (当前页, 总数)"""
+    query = db.query(*PROFILE_LIST_COLUMNS)
+    if status and status != "all":
+        query = query.filter(UserProfile.status == status)
+    rows = query.order_by(UserProfile.create_time.desc()).offset(skip).limit(limit).all()
+    return rows, query.order_by(None).count()
+
+
+def get_network_rows(db: Session) -> List[Row]:
+    """邀请关系网络所需的全部资料（按创建时间）"""
+    return db.query(*PROFILE_NETWORK_COLUMNS).order_by(UserProfile.create_time.asc()).all()
+
+
+def get_network_row(db: Session, profile_id: int) -> Optional[Row]:
+    """单个用户的网络信息"""
+    return db.query(*PROFILE_NETWORK_COLUMNS).filter(UserProfile.id == profile_id).first()
+
+
+def get_invitee_rows(db: Session, profile_id: int) -> List[Row]:
+    """某用户邀请的所有用户"""
+    return db.query(*PROFILE_LIST_COLUMNS).filter(UserProfile.invited_by == profile_id).all()
+
+
+def get_map_rows(db: Session) -> List[Row]:
+    """填写了工作地的用户（地图分布）"""
+    return db.query(*PROFILE_MAP_COLUMNS).filter(
+        UserProfile.work_location.isnot(None), UserProfile.work_location != ""
+    ).all()
+
+
+def count_profiles_by_status(db: Session) -> Dict[str, int]:
+    """各状态资料数量（一次 GROUP BY）"""
+    return dict(db.query(UserProfile.status, func.count(UserProfile.id)).group_by(UserProfile.status).all())
+
+
+def get_profiles_by_filter(
+        db: Session,
+        status: str = None,
+        ids: List[int] = None,
+        limit: int = None
+) -> List[UserProfile]:
+    """按状态和/或ID列表获取资料（按编号顺序）"""
+    query = db.query(UserProfile)
+    if status and status != "all":
+        query = query.filter(UserProfile.status == status)
+    if ids:
+        query = query.filter(UserProfile.id.in_(ids))
+    query = query.order_by(UserProfile.id.asc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
 def get_last_serial_number(db: Session) -> int:
     """获取最后一个编号"""
     profile = db.query(UserProfile).filter(
@@ -79,7 +204,8 @@ def approve_profile(
         db: Session,
         profile_id: int,
         reviewed_by: str,
-        notes: str = None
+        notes: str = None,
+        commit: bool = True
 ) -> Optional[UserProfile]:
     """通过审核"""
     profile = get_profile_by_id(db, profile_id)
@@ -91,16 +217,48 @@ def approve_profile(
     profile.review_notes = notes
     profile.reviewed_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(profile)
+    _save(db, profile, commit)
     return profile
 
 
+def approve_profile_with_codes(
+        db: Session,
+        profile: UserProfile,
+        reviewed_by: str,
+        notes: str = None,
+        code_notes: str = None,
+        quota: int = None
+) -> List[str]:
+    """
+    通过审核并生成邀请码配额
+    ★ 状态更新、邀请码写入、配额更新在同一个事务内，只提交一次
+    返回生成的邀请码
+    """
+    quota = settings.DEFAULT_INVITATION_QUOTA if quota is None else quota
+    now = datetime.utcnow()
+
+    profile.status = 'approved'
+    profile.reviewed_by = reviewed_by
+    profile.review_notes = notes
+    profile.reviewed_at = now
+    profile.invitation_quota = quota
+    profile.update_time = now
+    db.flush()
+
+    codes = create_invitation_codes_bulk(
+        db=db, count=quota, created_by=profile.id, created_by_type="user",
+        notes=code_notes, expire_at=calculate_expire_time(), commit=False
+    )
+    db.commit()
+    return codes
+
+
 def reject_profile(
         db: Session,
         profile_id: int,
         reviewed_by: str,
-        reason: str
+        reason: str,
+        commit: bool = True
 ) -> Optional[UserProfile]:
     """拒绝审核"""
     profile = get_profile_by_id(db, profile_id)
@@ -112,6 +270,5 @@ def reject_profile(
     profile.rejection_reason = reason
     profile.reviewed_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(profile)
+    _save(db, profile, commit)
     return profile
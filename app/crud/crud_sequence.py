@@ -0,0 +1,116 @@
+"""
+序列计数器CRUD操作
+★ 一条原子 UPDATE 完成递增（支持 RETURNING 的数据库一次往返），并发分配不会重复
+★ 在独立连接上立即提交，行锁不会持有到业务事务结束；业务事务回滚时编号作废，与数据库序列一致
+★ SERIAL_BLOCK_SIZE > 1 时每次预取一段编号在进程内分配，进程重启会留下空号
+"""
+import threading
+from typing import Dict, List
+
+from sqlalchemy import Integer, cast, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sequence_counter import SequenceCounter
+from app.models.user_profile import UserProfile
+from app.utils.helpers import format_serial_number
+
+SERIAL_SEQUENCE = "profile_serial"
+
+# 进程内预取的编号段：序列名 → [下一个可用值, 段内最大值]
+_blocks: Dict[str, List[int]] = {}
+_blocks_lock = threading.Lock()
+
+
+def get_max_serial_number(db: Session) -> int:
+    """现有资料中的最大编号（非数字编号忽略）"""
+    return db.query(func.max(cast(UserProfile.serial_number, Integer))).filter(
+        UserProfile.serial_number.isnot(None)
+    ).scalar() or 0
+
+
+def _ensure_sequence(conn, name: str, initial: int):
+    """序列不存在时按初始值创建（多进程同时创建时忽略主键冲突）"""
+    exists = conn.execute(select(SequenceCounter.value).where(SequenceCounter.name == name)).first()
+    if exists is not None:
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(SequenceCounter).values(name=name, value=initial))
+    except IntegrityError:
+        pass
+
+
+def _increment(conn, name: str, count: int):
+    """原子递增，返回递增后的值；序列不存在返回 None"""
+    stmt = update(SequenceCounter).where(SequenceCounter.name == name).values(
+        value=SequenceCounter.value + count
+    )
+    if conn.dialect.update_returning:
+        return conn.execute(stmt.returning(SequenceCounter.value)).scalar()
+
+    # 不支持 RETURNING 时在同一事务内回读（UPDATE 已持有行锁，读到的是本次结果）
+    if conn.execute(stmt).rowcount == 0:
+        return None
+    return conn.execute(select(SequenceCounter.value).where(SequenceCounter.name == name)).scalar()
+
+
+def allocate_sequence(db: Session, name: str, count: int = 1) -> int:
+    """
+    分配 count 个连续值，返回其中最大的一个
+    序列不存在时自动创建，编号序列以现有最大编号为起点
+    """
+    with db.get_bind().connect() as conn:
+        with conn.begin():
+            value = _increment(conn, name, count)
+        if value is not None:
+            return value
+
+        initial = get_max_serial_number(db) if name == SERIAL_SEQUENCE else 0
+        with conn.begin():
+            _ensure_sequence(conn, name, initial)
+            return _increment(conn, name, count)
+
+
+def next_sequence_value(db: Session, name: str) -> int:
+    """取序列的下一个值（SERIAL_BLOCK_SIZE > 1 时优先使用进程内预取的编号段）"""
+    block_size = max(settings.SERIAL_BLOCK_SIZE, 1)
+    if block_size == 1:
+        return allocate_sequence(db, name)
+
+    with _blocks_lock:
+        block = _blocks.get(name)
+        if block is None or block[0] > block[1]:
+            end = allocate_sequence(db, name, block_size)
+            block = _blocks[name] = [end - block_size + 1, end]
+        value = block[0]
+        block[0] += 1
+        return value
+
+
+def next_serial_number(db: Session) -> str:
+    """分配一个资料编号"""
+    return format_serial_number(next_sequence_value(db, SERIAL_SEQUENCE))
+
+
+def sync_serial_sequence(db: Session) -> int:
+    """
+    把编号序列推进到不小于现有最大编号（脚本直接写入编号后调用）
+    返回同步后的序列值
+    """
+    max_serial = get_max_serial_number(db)
+    with db.get_bind().connect() as conn:
+        with conn.begin():
+            _ensure_sequence(conn, SERIAL_SEQUENCE, max_serial)
+            conn.execute(
+                update(SequenceCounter)
+                .where(SequenceCounter.name == SERIAL_SEQUENCE, SequenceCounter.value < max_serial)
+                .values(value=max_serial)
+            )
+            value = conn.execute(
+                select(SequenceCounter.value).where(SequenceCounter.name == SERIAL_SEQUENCE)
+            ).scalar()
+    with _blocks_lock:
+        _blocks.pop(SERIAL_SEQUENCE, None)
+    return value
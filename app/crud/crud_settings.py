@@ -1,7 +1,13 @@
 """
 系统设置 CRUD 操作
+★ 读取走进程内缓存：首次读取时加载全部配置，之后直接读内存
+★ 多进程部署时，每隔 SETTINGS_CACHE_TTL 秒查询一次配置版本号，版本变化才重新加载
 """
+import threading
+import time
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.system_setting import SystemSetting
 from typing import Optional, Dict
 from datetime import datetime
@@ -18,11 +24,65 @@ DEFAULT_SETTINGS = {
 }
 
 
+# ============================================================
+# 进程内配置缓存
+# ============================================================
+_cache_lock = threading.Lock()
+_cache_values: Dict[str, str] = {}
+_cache_version: Optional[int] = None  # None 表示尚未加载或已失效
+_cache_checked_at = 0.0
+
+
+def _query_settings_version(db: Session) -> int:
+    """
+    配置版本号 = 各行 version 之和 + 行数
+    每次修改/新增都会让它严格递增，且多个进程同时修改也不会互相覆盖
+    """
+    total, count = db.query(
+        func.coalesce(func.sum(SystemSetting.version), 0),
+        func.count(SystemSetting.id),
+    ).one()
+    return int(total) + int(count)
+
+
+def _ensure_cache(db: Session):
+    """缓存未加载或超过检查间隔时，按版本号决定是否重新加载"""
+    global _cache_values, _cache_version, _cache_checked_at
+
+    now = time.monotonic()
+    if _cache_version is not None and now - _cache_checked_at < settings.SETTINGS_CACHE_TTL:
+        return
+
+    with _cache_lock:
+        if _cache_version is not None and now - _cache_checked_at < settings.SETTINGS_CACHE_TTL:
+            return
+        version = _query_settings_version(db)
+        if version != _cache_version:
+            rows = db.query(SystemSetting.key, SystemSetting.value).all()
+            _cache_values = {key: value for key, value in rows}
+            _cache_version = version
+        _cache_checked_at = now
+
+
+def invalidate_settings_cache():
+    """使本进程的配置缓存失效，下次读取时重新加载"""
+    global _cache_version
+    with _cache_lock:
+        _cache_version = None
+
+
+def get_settings_version(db: Session) -> int:
+    """当前缓存对应的配置版本号"""
+    _ensure_cache(db)
+    return _cache_version
+
+
 def get_setting(db: Session, key: str) -> Optional[str]:
-    """获取单个配置值"""
-    row = db.query(SystemSetting).filter(SystemSetting.key == key).first()
-    if row:
-        return row.value
+    """获取单个配置值（读缓存）"""
+    _ensure_cache(db)
+    value = _cache_values.get(key)
+    if value is not None:
+        return value
     # 如果数据库没有，返回默认值
     default = DEFAULT_SETTINGS.get(key)
     return default["value"] if default else None
@@ -41,12 +101,14 @@ def set_setting(db: Session, key: str, value: str, updated_by: str = "system") -
         row.value = value
         row.updated_by = updated_by
         row.updated_at = datetime.utcnow()
+        row.version = SystemSetting.version + 1
     else:
         desc = DEFAULT_SETTINGS.get(key, {}).get("description", "")
         row = SystemSetting(key=key, value=value, description=desc, updated_by=updated_by)
         db.add(row)
     db.commit()
     db.refresh(row)
+    invalidate_settings_cache()
     return row
 
 
@@ -89,3 +151,4 @@ def init_default_settings(db: Session):
             )
             db.add(row)
     db.commit()
+    invalidate_settings_cache()
@@ -5,6 +5,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 # 创建数据库引擎
 # SQLite需要check_same_thread=False
@@ -12,12 +13,26 @@ connect_args = {}
 if "sqlite" in settings.DATABASE_URL:
     connect_args = {"check_same_thread": False}
 
+# 内存 SQLite 使用单连接池，不支持连接池参数
+pool_args = {}
+if ":memory:" not in settings.DATABASE_URL:
+    pool_args = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
-    echo=settings.DEBUG  # 开发模式下打印SQL
+    echo=settings.DEBUG,  # 开发模式下打印SQL
+    **pool_args
 )
 
+# SQL 耗时统计
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
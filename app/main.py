@@ -1,11 +1,83 @@
 """
 Register Backend - FastAPI应用入口
 """
-from fastapi import FastAPI
+import asyncio
+import hmac
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import (
+    REGISTRY, MetricsMiddleware, render_metrics, start_metrics_flusher, stop_metrics_flusher
+)
+from app.core.profiling import ProfilingMiddleware, start_continuous_profiler
+from app.core.http_cache import make_etag, cached_json_response, CACHE_REVALIDATE, CACHE_PUBLIC_SHORT
+from app.services.invitation_sweeper import start_invitation_sweeper, stop_invitation_sweeper
+from app.services.invitation_filter import (
+    rebuild_invitation_filter, start_invitation_filter_sync, stop_invitation_filter_sync
+)
+from app.services.wechat import close_client as close_wechat_client
+from app.services.ai_client import close_client as close_ai_client
+from app.services import storage
+from app.core.security import shutdown_password_executor
+from app.db.base import engine
+
+# uvicorn 只配置自己的 logger，应用日志在这里统一输出
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def _check_database():
+    """启动时建立一个连接，数据库不可用时尽早在日志里暴露"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用生命周期（每个 worker 进程各执行一次）
+    ★ 关闭时服务器已停止接收新请求，并等待进行中的请求和 BackgroundTasks 完成
+      （run_prod.py 中由 GRACEFUL_SHUTDOWN_TIMEOUT 限定），这里再停掉进程内的后台任务、释放客户端和连接池
+    """
+    logger.info(f"{settings.APP_NAME} is starting...")
+    try:
+        await asyncio.to_thread(_check_database)
+    except Exception as e:
+        logger.error(f"数据库连接失败: {e}")
+    if settings.INVITATION_BLOOM_ENABLED:
+        try:
+            await asyncio.to_thread(rebuild_invitation_filter)
+        except Exception as e:
+            # 构建失败时过滤器不生效，校验全部走数据库
+            logger.error(f"邀请码过滤器构建失败: {e}")
+    invitation_sweeper = start_invitation_sweeper()
+    filter_sync = start_invitation_filter_sync()
+    continuous_profiler = start_continuous_profiler()
+    metrics_flusher = start_metrics_flusher()
+
+    yield
+
+    logger.info(f"{settings.APP_NAME} is shutting down...")
+    await stop_invitation_sweeper(invitation_sweeper, timeout=settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+    await stop_invitation_filter_sync(filter_sync, timeout=settings.GRACEFUL_SHUTDOWN_TIMEOUT)
+    if continuous_profiler:
+        await asyncio.to_thread(continuous_profiler.stop)
+    await close_wechat_client()
+    await close_ai_client()
+    await stop_metrics_flusher(metrics_flusher)
+    storage.close_client()
+    shutdown_password_executor()
+    engine.dispose()
+    logger.info(f"{settings.APP_NAME} stopped")
+
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -13,7 +85,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="个人信息登记管理服务",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS中间件
@@ -25,39 +98,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩（最后添加的中间件最先执行：压缩在 CORS 外层，采样分析和耗时统计又在压缩外层）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# 管理员按请求采样分析
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, interval_ms=settings.PROFILING_SAMPLE_INTERVAL_MS)
+
+# 请求耗时统计（放在最外层，耗时包含压缩）
+if settings.METRICS_ENABLED:
+    REGISTRY.configure_multiprocess(settings.METRICS_MULTIPROC_DIR, settings.METRICS_MULTIPROC_FLUSH_INTERVAL)
+    app.add_middleware(MetricsMiddleware, slow_request_ms=settings.SLOW_REQUEST_MS)
+
 # 静态文件服务
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", StaticFiles(directory=settings.LOCAL_STORAGE_DIR), name="uploads")
 
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
 # 健康检查
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """健康检查接口"""
-    return {
-        "status": "ok",
-        "app": settings.APP_NAME,
-        "version": settings.APP_VERSION
-    }
+    return cached_json_response(
+        request,
+        {
+            "status": "ok",
+            "app": settings.APP_NAME,
+            "version": settings.APP_VERSION
+        },
+        etag=make_etag("health", settings.APP_NAME, settings.APP_VERSION),
+        cache_control=CACHE_REVALIDATE,
+    )
 
 # 根路径
 @app.get("/")
-async def root():
+async def root(request: Request):
     """欢迎页面"""
-    return {
-        "message": f"欢迎使用 {settings.APP_NAME}",
-        "version": settings.APP_VERSION,
-        "docs": "/docs",
-        "health": "/health"
-    }
-
-# 启动事件
-@app.on_event("startup")
-async def startup_event():
-    print(f"{settings.APP_NAME} is starting...")
-
-# 关闭事件
-@app.on_event("shutdown")
-async def shutdown_event():
-    print(f"{settings.APP_NAME} is shutting down...")
+    return cached_json_response(
+        request,
+        {
+            "message": f"欢迎使用 {settings.APP_NAME}",
+            "version": settings.APP_VERSION,
+            "docs": "/docs",
+            "health": "/health"
+        },
+        etag=make_etag("root", settings.APP_NAME, settings.APP_VERSION),
+        cache_control=CACHE_PUBLIC_SHORT,
+    )
+
+# 监控指标
+# ★ 未配置 METRICS_TOKEN 时不注册 /metrics，避免指标（路由、耗时、错误数）公开暴露
+if settings.METRICS_ENABLED and settings.METRICS_TOKEN:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(request: Request):
+        """Prometheus 指标（配置 METRICS_MULTIPROC_DIR 时汇总所有 worker），需携带 Authorization: Bearer <METRICS_TOKEN>"""
+        expected = f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+        if not hmac.compare_digest(request.headers.get("authorization", "").encode("utf-8"), expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的指标访问令牌")
+        return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
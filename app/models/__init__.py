@@ -5,5 +5,6 @@ from app.models.user_profile import UserProfile
 from app.models.invitation_code import InvitationCode
 from app.models.admin_user import AdminUser
 from app.models.system_setting import SystemSetting
+from app.models.sequence_counter import SequenceCounter
 
-__all__ = ["UserProfile", "InvitationCode", "AdminUser", "SystemSetting"]
\ No newline at end of file
+__all__ = ["UserProfile", "InvitationCode", "AdminUser", "SystemSetting", "SequenceCounter"]
\ No newline at end of file
@@ -18,6 +18,7 @@ class AdminUser(Base):
     role = Column(String(20), default='admin', comment="角色")
 
     is_active = Column(Boolean, default=True, comment="是否激活")
+    token_version = Column(Integer, default=0, server_default="0", nullable=False, comment="token版本号（登出时递增，旧token失效）")
     last_login = Column(DateTime(timezone=True), comment="最后登录时间")
 
     create_time = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
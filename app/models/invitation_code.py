@@ -1,7 +1,7 @@
 """
 邀请码数据库模型
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, and_
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -38,5 +38,19 @@ class InvitationCode(Base):
     # 时间戳
     create_time = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
 
+    # ★ 部分索引：只索引未使用且可用的邀请码，过期清扫和名额统计只扫描这一小部分
+    __table_args__ = (
+        Index(
+            "ix_invitation_codes_live_expire_at", expire_at,
+            sqlite_where=and_(is_used == False, is_active == True),
+            postgresql_where=and_(is_used == False, is_active == True),
+        ),
+        Index(
+            "ix_invitation_codes_live_created_by", created_by,
+            sqlite_where=and_(is_used == False, is_active == True),
+            postgresql_where=and_(is_used == False, is_active == True),
+        ),
+    )
+
     def __repr__(self):
         return f"<InvitationCode(code={self.code}, is_used={self.is_used})>"
\ No newline at end of file
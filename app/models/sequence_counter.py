@@ -0,0 +1,19 @@
+"""
+序列计数器模型
+用于编号等需要并发安全递增的场景（各数据库通用的"序列"）
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class SequenceCounter(Base):
+    """序列计数器表：每行一个序列，value 为已分配的最大值"""
+    __tablename__ = "sequence_counters"
+
+    name = Column(String(50), primary_key=True, comment="序列名称")
+    value = Column(Integer, nullable=False, default=0, server_default="0", comment="已分配的最大值")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SequenceCounter(name={self.name}, value={self.value})>"
@@ -17,6 +17,8 @@ class SystemSetting(Base):
     description = Column(String(200), comment="配置项说明")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     updated_by = Column(String(50), comment="最后修改人")
+    # 每次修改 +1，各进程通过版本号判断本地缓存是否过期
+    version = Column(Integer, default=0, server_default="0", nullable=False, comment="修改版本号")
 
     def __repr__(self):
         return f"<SystemSetting(key={self.key}, value={self.value})>"
@@ -2,7 +2,7 @@
 管理员相关Schema
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class AdminLoginRequest(BaseModel):
@@ -26,4 +26,13 @@ class ApproveRequest(BaseModel):
 
 class RejectRequest(BaseModel):
     """审核拒绝请求"""
-    reason: str
\ No newline at end of file
+    reason: str
+
+
+class PostExportRequest(BaseModel):
+    """批量导出文案请求（status 与 ids 至少提供一个）"""
+    status: Optional[str] = None
+    ids: Optional[List[int]] = None
+    style: Optional[str] = None
+    use_ai: bool = True
+    upload: bool = False  # True: 上传 COS 返回链接；False: 直接下载 ZIP
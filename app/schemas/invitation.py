@@ -18,6 +18,7 @@ class InvitationVerifyResponse(BaseModel):
     message: str
     openid: Optional[str] = None
     has_profile: bool = False
+    token: Optional[str] = None
 
 
 class MyCodesResponse(BaseModel):
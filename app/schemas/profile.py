@@ -1,7 +1,7 @@
 """
 用户资料相关Schema
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict
 
 
@@ -67,6 +67,47 @@ class ProfileSubmitRequest(BaseModel):
     photos: List[str] = []
 
 
+class ProfilePatchRequest(BaseModel):
+    """部分更新资料请求：只传需要修改的字段"""
+    name: Optional[str] = Field(None, min_length=1, max_length=50)
+    gender: Optional[str] = Field(None, min_length=1, max_length=10)
+    birthday: Optional[str] = None
+    age: Optional[int] = Field(None, ge=18, le=80)
+    height: Optional[int] = Field(None, ge=140, le=220)
+    weight: Optional[int] = Field(None, ge=30, le=200)
+    marital_status: Optional[str] = None
+    body_type: Optional[str] = None
+
+    hometown: Optional[str] = None
+    work_location: Optional[str] = None
+    industry: Optional[str] = None
+
+    constellation: Optional[str] = None
+    mbti: Optional[str] = None
+    health_condition: Optional[str] = None
+    housing_status: Optional[str] = None
+
+    dating_purpose: Optional[str] = None
+    want_children: Optional[str] = None
+    wechat_id: Optional[str] = None
+
+    hobbies: Optional[List[str]] = None
+    lifestyle: Optional[str] = None
+    activity_expectation: Optional[str] = None
+    coming_out_status: Optional[str] = None
+    expectation: Optional[ExpectationSchema] = None
+    special_requirements: Optional[str] = None
+    photos: Optional[List[str]] = None
+
+    @field_validator('name', 'gender', 'age', 'height', 'weight')
+    @classmethod
+    def reject_null(cls, v):
+        """必填字段可以不传，但不能传 null（数据库列不允许为空）"""
+        if v is None:
+            raise ValueError('该字段不能为空')
+        return v
+
+
 class ProfileResponse(BaseModel):
     """资料响应"""
     id: int
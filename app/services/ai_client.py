@@ -0,0 +1,36 @@
+"""
+大模型接口的共享 HTTP 客户端
+★ AI 审核和文案生成共用一个带连接池的 httpx 客户端，避免每次调用重新建立 TLS 连接
+★ 应用关闭时由 lifespan 关闭
+★ 客户端的连接池绑定创建时的事件循环，只能在应用主事件循环中使用（后台任务须为 async 函数），
+  不要在临时创建再关闭的事件循环中调用
+"""
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """共享 HTTP 客户端（首次使用时创建）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.AI_TIMEOUT, connect=min(settings.AI_TIMEOUT, 5.0)),
+            limits=httpx.Limits(
+                max_connections=settings.AI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """关闭共享客户端（应用关闭时调用）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
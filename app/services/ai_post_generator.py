@@ -3,17 +3,34 @@ AI 驱动的公众号文案生成服务
 生成精美的 HTML 文案，可直接粘贴到公众号编辑器
 ★ 使用智谱 GLM 生成文案，然后套入 HTML 模板
 """
-import httpx
 import json
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from app.core.config import settings
+from app.core.metrics import track_upstream
+from app.services.ai_client import get_client
+from app.services.post_templates import render_post
 
 logger = logging.getLogger(__name__)
 
 
+# 生成文案需要的资料字段
+POST_PROFILE_FIELDS = (
+    "serial_number", "gender", "age", "height", "weight", "marital_status",
+    "body_type", "hometown", "work_location", "industry", "health_condition",
+    "constellation", "mbti", "coming_out_status", "dating_purpose", "want_children",
+    "lifestyle", "activity_expectation", "hobbies", "expectation",
+    "special_requirements", "admin_contact", "photos",
+)
+
+
+def profile_to_post_dict(profile) -> Dict[str, Any]:
+    """把 UserProfile 转成文案生成用的字典（与数据库会话解绑）"""
+    return {field: getattr(profile, field) for field in POST_PROFILE_FIELDS}
+
+
 def _build_profile_summary(profile: Dict[str, Any]) -> str:
     """把用户资料整理成 AI 可读的文本摘要"""
     lines = []
@@ -135,8 +152,8 @@ async def _call_ai_for_post(profile_summary: str) -> Optional[Dict[str, str]]:
         }
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(settings.AI_API_URL, headers=headers, json=payload)
+        with track_upstream("llm", "post"):
+            resp = await get_client().post(settings.AI_API_URL, headers=headers, json=payload)
             resp.raise_for_status()
             data = resp.json()
 
@@ -161,22 +178,33 @@ async def _call_ai_for_post(profile_summary: str) -> Optional[Dict[str, str]]:
         return None
 
 
+def _build_tags(profile: Dict[str, Any]) -> List[str]:
+    """基本信息标签"""
+    tags = []
+    if profile.get('age'):
+        tags.append(f"{profile['age']}岁")
+    if profile.get('height'):
+        tags.append(f"{profile['height']}cm")
+    if profile.get('weight'):
+        tags.append(f"{profile['weight']}kg")
+    for key in ('body_type', 'work_location', 'constellation', 'mbti'):
+        if profile.get(key):
+            tags.append(profile[key])
+    return tags
+
+
 def _generate_html(
     profile: Dict[str, Any],
     ai_content: Optional[Dict[str, str]] = None,
+    style: Optional[str] = None,
 ) -> str:
     """
     生成公众号 HTML 文案
     微信公众号编辑器支持内联样式的 HTML
+    ★ 版式由 app/templates/posts/ 下的模板决定，内容统一自动转义
     """
     serial = profile.get('serial_number', '???')
-    gender = profile.get('gender', '')
-    age = profile.get('age', '')
-    height = profile.get('height', '')
-    weight = profile.get('weight', '')
-    location = profile.get('work_location', '')
     admin_contact = profile.get('admin_contact', 'casper_gb')
-    photos = profile.get('photos', [])
 
     # AI 生成的内容，或 fallback
     if ai_content:
@@ -190,112 +218,22 @@ def _generate_html(
         body = _fallback_body(profile)
         closing = f'感兴趣的话，添加管理员微信 {admin_contact} 了解更多哦~'
 
-    # 照片 HTML
-    photos_html = ""
-    if photos:
-        photo_items = ""
-        for i, url in enumerate(photos):
-            photo_items += f'''
-            <div style="margin-bottom: 16px; border-radius: 12px; overflow: hidden;">
-                <img src="{url}" style="width: 100%; display: block; border-radius: 12px;" alt="照片{i+1}" />
-            </div>'''
-        photos_html = f'''
-        <div style="margin: 24px 0;">
-            {photo_items}
-        </div>'''
-
-    # 基本信息标签
-    tags = []
-    if age:
-        tags.append(f"{age}岁")
-    if height:
-        tags.append(f"{height}cm")
-    if weight:
-        tags.append(f"{weight}kg")
-    if profile.get('body_type'):
-        tags.append(profile['body_type'])
-    if location:
-        tags.append(location)
-    if profile.get('constellation'):
-        tags.append(profile['constellation'])
-    if profile.get('mbti'):
-        tags.append(profile['mbti'])
-
-    tags_html = ""
-    for tag in tags:
-        tags_html += f'<span style="display: inline-block; padding: 4px 12px; margin: 4px; background: #f0f4ff; color: #4A90D9; border-radius: 20px; font-size: 13px;">{tag}</span>'
-
-    # 兴趣爱好标签
     hobbies = profile.get('hobbies', [])
-    hobbies_html = ""
-    if hobbies and isinstance(hobbies, list):
-        for h in hobbies:
-            hobbies_html += f'<span style="display: inline-block; padding: 4px 12px; margin: 4px; background: #fff0f5; color: #E8457C; border-radius: 20px; font-size: 13px;">🏷 {h}</span>'
-
-    # 正文段落处理
-    body_paragraphs = ""
-    if body:
-        for p in body.split("\n"):
-            p = p.strip()
-            if p:
-                body_paragraphs += f'<p style="margin: 12px 0; line-height: 1.8; color: #444; font-size: 15px;">{p}</p>'
-
-    html = f'''<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-    <title>{title}</title>
-</head>
-<body style="margin: 0; padding: 0; background: #f5f5f5; font-family: -apple-system, 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', sans-serif;">
-
-<div style="max-width: 600px; margin: 0 auto; background: #fff;">
-
-    <!-- 头部 -->
-    <div style="background: linear-gradient(135deg, #4A90D9, #E8457C); padding: 40px 24px 32px; text-align: center;">
-        <div style="color: rgba(255,255,255,0.8); font-size: 14px; margin-bottom: 8px;">🌈 Rainbow Community</div>
-        <h1 style="color: #fff; font-size: 22px; margin: 0; font-weight: 700;">{title}</h1>
-        <div style="color: rgba(255,255,255,0.7); font-size: 13px; margin-top: 12px;">档案编号 №{serial}</div>
-    </div>
-
-    <!-- 照片区域 -->
-    {photos_html}
-
-    <!-- 基本信息标签 -->
-    <div style="padding: 20px 24px 8px;">
-        <div style="font-size: 16px; font-weight: 600; color: #333; margin-bottom: 12px;">📋 基本信息</div>
-        <div style="line-height: 2;">
-            {tags_html}
-        </div>
-    </div>
-
-    <!-- 兴趣爱好 -->
-    {"<div style='padding: 8px 24px;'><div style='font-size: 16px; font-weight: 600; color: #333; margin-bottom: 12px;'>💫 兴趣爱好</div><div style='line-height: 2;'>" + hobbies_html + "</div></div>" if hobbies_html else ""}
-
-    <!-- 引言 -->
-    {"<div style='padding: 16px 24px; margin: 16px 24px; background: #f8f9ff; border-left: 3px solid #4A90D9; border-radius: 4px;'><p style='margin: 0; color: #555; font-size: 15px; line-height: 1.8; font-style: italic;'>" + intro + "</p></div>" if intro else ""}
-
-    <!-- 正文 -->
-    <div style="padding: 8px 24px 16px;">
-        {body_paragraphs}
-    </div>
-
-    <!-- 结尾 -->
-    <div style="padding: 20px 24px; margin: 0 24px 24px; background: linear-gradient(135deg, #fff0f5, #f0f4ff); border-radius: 12px; text-align: center;">
-        <p style="margin: 0 0 8px; color: #666; font-size: 14px;">{closing}</p>
-        <p style="margin: 0; color: #4A90D9; font-size: 15px; font-weight: 600;">📱 管理员微信：{admin_contact}</p>
-    </div>
-
-    <!-- 底部 -->
-    <div style="padding: 20px 24px; text-align: center; border-top: 1px solid #eee;">
-        <p style="margin: 0; color: #bbb; font-size: 12px;">🌈 每个人都值得被温柔以待</p>
-    </div>
-
-</div>
-</body>
-</html>'''
-
-    return html
+    if not isinstance(hobbies, list):
+        hobbies = []
+
+    context = {
+        "serial": serial,
+        "title": title,
+        "intro": intro,
+        "body_paragraphs": [p.strip() for p in (body or "").split("\n") if p.strip()],
+        "closing": closing,
+        "admin_contact": admin_contact,
+        "photos": profile.get('photos') or [],
+        "tags": _build_tags(profile),
+        "hobbies": hobbies,
+    }
+    return render_post(context, style)
 
 
 def _fallback_body(profile: Dict[str, Any]) -> str:
@@ -332,9 +270,10 @@ def _fallback_body(profile: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
-async def generate_ai_post_html(profile: Dict[str, Any]) -> Dict[str, Any]:
+async def generate_ai_post_html(profile: Dict[str, Any], style: Optional[str] = None) -> Dict[str, Any]:
     """
     主入口：生成 AI 公众号文案 HTML
+    style: 文案风格（见 post_templates.POST_STYLES），不传则使用默认风格
 
     返回:
         {
@@ -348,7 +287,7 @@ async def generate_ai_post_html(profile: Dict[str, Any]) -> Dict[str, Any]:
     # 尝试 AI 生成
     ai_content = await _call_ai_for_post(summary)
 
-    html = _generate_html(profile, ai_content)
+    html = _generate_html(profile, ai_content, style)
 
     return {
         "html": html,
@@ -12,6 +12,8 @@ import json
 import logging
 from typing import Dict, List, Optional, Tuple
 from app.core.config import settings
+from app.core.metrics import track_upstream
+from app.services.ai_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,18 @@ EXPECTATION_FIELDS = {
 }
 
 
+# 用户自由填写、AI 会从中解析信息的文本字段
+TEXT_FIELDS = ("lifestyle", "activity_expectation", "special_requirements")
+
+
+def affects_ai_review(changed_fields) -> bool:
+    """修改的字段是否会影响 AI 审核结果（必填字段、期待对象、自由文本）"""
+    return any(
+        field in REQUIRED_FIELDS or field == "expectation" or field in TEXT_FIELDS
+        for field in changed_fields
+    )
+
+
 def _collect_user_text(profile_data: dict) -> str:
     """
     从「自我描述」「对活动的期望」「备注」三个字段中收集用户填写的所有文本
@@ -173,8 +187,8 @@ async def _call_ai_api(prompt: str, system_prompt: str = "") -> Optional[str]:
         }
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(settings.AI_API_URL, headers=headers, json=payload)
+        with track_upstream("llm", "review"):
+            resp = await get_client().post(settings.AI_API_URL, headers=headers, json=payload)
             resp.raise_for_status()
             data = resp.json()
 
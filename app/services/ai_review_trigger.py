@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 
 def is_ai_review_enabled(db: Session) -> bool:
-    """检查 AI 自动审核是否开启（从数据库读取）"""
+    """检查 AI 自动审核是否开启（读系统设置缓存）"""
     return get_setting_bool(db, "ai_auto_review")
 
 
@@ -1,25 +1,34 @@
 """
 邀请码生成服务
 """
-import random
+import secrets
 import string
 from datetime import datetime, timedelta
+from typing import Set
 from app.core.config import settings
 
+# 排除容易混淆的字符：0O 1Il
+INVITATION_CODE_CHARS = ''.join(
+    c for c in string.ascii_uppercase + string.digits if c not in '0O1Il'
+)
+
 
 def generate_invitation_code() -> str:
     """
     生成邀请码
-    排除容易混淆的字符：0O 1Il
+    使用 secrets 保证不可预测
     """
-    chars = string.ascii_uppercase + string.digits
-    chars = chars.replace('0', '').replace('O', '')
-    chars = chars.replace('1', '').replace('I', '').replace('l', '')
+    return ''.join(secrets.choice(INVITATION_CODE_CHARS) for _ in range(settings.INVITATION_CODE_LENGTH))
+
 
-    code = ''.join(random.choices(chars, k=settings.INVITATION_CODE_LENGTH))
-    return code
+def generate_invitation_codes(count: int) -> Set[str]:
+    """批量生成互不重复的邀请码（仅保证本批内不重复）"""
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_invitation_code())
+    return codes
 
 
 def calculate_expire_time() -> datetime:
     """计算邀请码过期时间"""
-    return datetime.utcnow() + timedelta(days=settings.INVITATION_EXPIRE_DAYS)
\ No newline at end of file
+    return datetime.utcnow() + timedelta(days=settings.INVITATION_EXPIRE_DAYS)
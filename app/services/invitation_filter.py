@@ -0,0 +1,216 @@
+"""
+邀请码布隆过滤器
+★ 未命中的邀请码在内存中直接拒绝，猜码请求不查询数据库
+★ 启动时全量构建；本进程生成的邀请码实时加入；其他进程生成的邀请码由后台任务每
+  INVITATION_BLOOM_SYNC_INTERVAL 秒按 create_time 水位增量同步，每次回扫
+  INVITATION_BLOOM_SYNC_OVERLAP 秒，覆盖乱序提交的事务
+★ 两次同步之间其他进程新生成的码可能未命中，此时按唯一索引回查数据库确认，回查次数
+  每个同步周期最多 INVITATION_BLOOM_FALLBACK_LIMIT 次，超出后直接拒绝
+★ 布隆过滤器只会误判"存在"，命中后仍以数据库为准
+★ 脚本直接写入且 create_time 早于水位的邀请码，在下次全量构建（重启）后生效
+"""
+import hashlib
+import logging
+import math
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.rate_limit import SlidingWindowLimiter
+from app.models.invitation_code import InvitationCode
+
+logger = logging.getLogger(__name__)
+
+# 全量构建时每批读取的行数
+BLOOM_LOAD_BATCH_SIZE = 5000
+
+
+class BloomFilter:
+    """定长位数组 + 双重哈希的布隆过滤器"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+_lock = threading.Lock()
+_filter: Optional[BloomFilter] = None
+_watermark: Optional[datetime] = None  # 已加载邀请码的最大 create_time
+_stop_event: Optional[asyncio.Event] = None
+
+# 未命中时回查数据库的次数上限（整个进程共用一个计数）
+_fallback_limiter = SlidingWindowLimiter(
+    settings.INVITATION_BLOOM_FALLBACK_LIMIT, max(settings.INVITATION_BLOOM_SYNC_INTERVAL, 1)
+)
+FALLBACK_KEY = "fallback"
+
+
+def _new_filter(expected: int) -> BloomFilter:
+    # 预留一倍余量，容量用完后下次全量构建时再扩容
+    capacity = max(settings.INVITATION_BLOOM_CAPACITY, expected * 2)
+    return BloomFilter(capacity, settings.INVITATION_BLOOM_ERROR_RATE)
+
+
+def _select_codes(since: Optional[datetime] = None):
+    stmt = select(InvitationCode.code, InvitationCode.create_time)
+    if since is not None:
+        stmt = stmt.where(InvitationCode.create_time >= since)
+    return stmt.execution_options(yield_per=BLOOM_LOAD_BATCH_SIZE)
+
+
+def _max_time(current: Optional[datetime], rows: Iterable[Tuple[str, Optional[datetime]]]) -> Optional[datetime]:
+    for _, created in rows:
+        if created is not None and (current is None or created > current):
+            current = created
+    return current
+
+
+def rebuild_invitation_filter(db=None) -> int:
+    """全量构建过滤器，返回加载的邀请码数量"""
+    global _filter, _watermark
+    from app.db.base import SessionLocal
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        bloom = _new_filter(db.query(func.count(InvitationCode.id)).scalar() or 0)
+        watermark = None
+        for code, created in db.execute(_select_codes()):
+            bloom.add(code)
+            if created is not None and (watermark is None or created > watermark):
+                watermark = created
+    finally:
+        if own_session:
+            db.close()
+
+    with _lock:
+        _filter, _watermark = bloom, watermark
+    logger.info(f"邀请码过滤器已构建: {bloom.count} 个，位数组 {bloom.size // 8 // 1024}KB")
+    return bloom.count
+
+
+def sync_invitation_filter(db=None) -> int:
+    """
+    增量同步其他进程生成的邀请码，返回新加入的数量
+    ★ 在锁外查询，只在写入位数组时持锁
+    """
+    global _watermark
+    from app.db.base import SessionLocal
+
+    if _filter is None:
+        return 0
+    since = _watermark - timedelta(seconds=settings.INVITATION_BLOOM_SYNC_OVERLAP) if _watermark else None
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        rows: List[Tuple[str, Optional[datetime]]] = db.execute(_select_codes(since)).all()
+    finally:
+        if own_session:
+            db.close()
+
+    added = 0
+    with _lock:
+        if _filter is None:
+            return 0
+        for code, _ in rows:
+            if code not in _filter:
+                _filter.add(code)
+                added += 1
+        _watermark = _max_time(_watermark, rows)
+    if added:
+        logger.info(f"邀请码过滤器增量同步: {added} 个")
+    return added
+
+
+def add_invitation_codes(codes: Iterable[str]):
+    """新生成的邀请码加入过滤器（未构建时忽略）"""
+    with _lock:
+        if _filter is None:
+            return
+        for code in codes:
+            _filter.add(code)
+        if _filter.count > _filter.capacity:
+            logger.warning("邀请码过滤器容量已满，误判率上升，将在下次启动时扩容")
+
+
+def _code_exists(db, code: str) -> bool:
+    """按唯一索引点查邀请码是否存在"""
+    stmt = select(InvitationCode.id).where(InvitationCode.code == code).limit(1)
+    return db.execute(stmt).first() is not None
+
+
+def invitation_code_may_exist(db, code: str) -> bool:
+    """
+    邀请码是否可能存在
+    ★ 返回 False 时一定不存在（或回查次数已用完）；过滤器未构建或关闭时一律返回 True
+    ★ 未命中时在回查次数内点查数据库，查到的码补进过滤器
+    """
+    if not settings.INVITATION_BLOOM_ENABLED or _filter is None:
+        return True
+    if code in _filter:
+        return True
+    if settings.INVITATION_BLOOM_FALLBACK_LIMIT <= 0 or _fallback_limiter.hit(FALLBACK_KEY) is not None:
+        return False
+    if not _code_exists(db, code):
+        return False
+    add_invitation_codes([code])
+    return True
+
+
+async def _sync_loop(interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        if stop.is_set():
+            break
+        try:
+            await asyncio.to_thread(sync_invitation_filter)
+        except Exception as e:
+            logger.error(f"邀请码过滤器同步失败: {e}")
+
+
+def start_invitation_filter_sync() -> Optional[asyncio.Task]:
+    """启动后台增量同步（过滤器关闭或 INVITATION_BLOOM_SYNC_INTERVAL <= 0 时不启动）"""
+    if not settings.INVITATION_BLOOM_ENABLED or settings.INVITATION_BLOOM_SYNC_INTERVAL <= 0:
+        return None
+    global _stop_event
+    _stop_event = asyncio.Event()
+    return asyncio.create_task(_sync_loop(settings.INVITATION_BLOOM_SYNC_INTERVAL, _stop_event))
+
+
+async def stop_invitation_filter_sync(task: Optional[asyncio.Task], timeout: float):
+    """停止增量同步（进行中的一次同步在线程里执行，等它完成，超时才强制取消）"""
+    if task is None:
+        return
+    if _stop_event is not None:
+        _stop_event.set()
+    try:
+        await asyncio.wait_for(task, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("邀请码过滤器同步未在关闭超时内完成，已取消")
@@ -0,0 +1,67 @@
+"""
+邀请码定时清扫
+★ 周期性停用已过期的邀请码，并校准用户剩余邀请名额
+★ 多进程部署时每个进程都会执行，操作幂等，不会重复生效
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.crud import crud_invitation
+
+logger = logging.getLogger(__name__)
+
+_stop_event: Optional[asyncio.Event] = None
+
+
+def sweep_invitations() -> dict:
+    """执行一次清扫（同步，内部自行管理数据库会话）"""
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        expired = crud_invitation.deactivate_expired_codes(db)
+        reconciled = crud_invitation.reconcile_invitation_quotas(db)
+    finally:
+        db.close()
+
+    if expired or reconciled:
+        logger.info(f"邀请码清扫: 停用过期 {expired} 个，校准名额 {reconciled} 人")
+    return {"expired": expired, "reconciled": reconciled}
+
+
+async def _sweep_loop(interval: int, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(sweep_invitations)
+        except Exception as e:
+            logger.error(f"邀请码清扫失败: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_invitation_sweeper() -> Optional[asyncio.Task]:
+    """启动后台清扫任务（INVITATION_SWEEP_INTERVAL <= 0 时不启动）"""
+    if settings.INVITATION_SWEEP_INTERVAL <= 0:
+        return None
+    global _stop_event
+    _stop_event = asyncio.Event()
+    return asyncio.create_task(_sweep_loop(settings.INVITATION_SWEEP_INTERVAL, _stop_event))
+
+
+async def stop_invitation_sweeper(task: Optional[asyncio.Task], timeout: float):
+    """
+    停止清扫任务
+    ★ 进行中的一次清扫在线程里执行，无法中途取消，等它完成后再退出，超时才强制取消
+    """
+    if task is None:
+        return
+    if _stop_event is not None:
+        _stop_event.set()
+    try:
+        await asyncio.wait_for(task, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning("邀请码清扫未在关闭超时内完成，已取消")
@@ -0,0 +1,116 @@
+"""
+公众号文案批量导出服务
+把一批资料的文案并发生成后，边生成边写入 ZIP 流
+★ AI 调用数受信号量限制（POST_EXPORT_CONCURRENCY），AI 未开启时直接走 _fallback_body 模板
+★ ZIP 以流式方式输出，内存中只保留正在生成的少量文案
+"""
+import asyncio
+import json
+import logging
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.ai_post_generator import _build_profile_summary, _call_ai_for_post, _generate_html
+
+logger = logging.getLogger(__name__)
+
+
+class _ZipChunkBuffer:
+    """
+    只写缓冲区：zipfile 写入的字节先暂存，由生成器逐段取走
+    不提供 seek/tell，zipfile 会自动切换为流式（data descriptor）写法
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _render_post(
+    profile: Dict[str, Any],
+    style: Optional[str],
+    use_ai: bool,
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    """生成单份文案，AI 失败时自动回退模板正文"""
+    ai_content = None
+    if use_ai:
+        async with semaphore:
+            ai_content = await _call_ai_for_post(_build_profile_summary(profile))
+
+    serial = profile.get("serial_number") or "???"
+    title = f"档案 №{serial}"
+    if ai_content:
+        title = ai_content.get("title", title)
+
+    return {
+        "serial_number": serial,
+        "title": title,
+        "ai_generated": ai_content is not None,
+        "html": _generate_html(profile, ai_content, style),
+    }
+
+
+async def iter_posts_zip(
+    profiles: List[Dict[str, Any]],
+    style: Optional[str] = None,
+    use_ai: bool = True,
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    并发生成文案并以 ZIP 字节流输出
+    每份文案写入 {编号}.html，最后追加 manifest.json 汇总生成结果
+    """
+    use_ai = use_ai and bool(settings.AI_API_KEY)
+    semaphore = asyncio.Semaphore(concurrency or settings.POST_EXPORT_CONCURRENCY)
+    buffer = _ZipChunkBuffer()
+    manifest = []
+
+    tasks = [asyncio.ensure_future(_render_post(p, style, use_ai, semaphore)) for p in profiles]
+    try:
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    post = await future
+                except Exception as e:
+                    logger.error(f"批量导出文案失败: {e}")
+                    manifest.append({"serial_number": None, "error": str(e)})
+                    continue
+
+                zf.writestr(f"{post['serial_number']}.html", post["html"])
+                manifest.append({
+                    "serial_number": post["serial_number"],
+                    "title": post["title"],
+                    "ai_generated": post["ai_generated"],
+                })
+                yield buffer.drain()
+
+            zf.writestr("manifest.json", json.dumps({
+                "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+                "style": style,
+                "count": len(manifest),
+                "posts": sorted(manifest, key=lambda m: m.get("serial_number") or ""),
+            }, ensure_ascii=False, indent=2))
+        yield buffer.drain()
+    finally:
+        # 客户端中途断开时取消尚未完成的生成任务
+        for task in tasks:
+            task.cancel()
+
+
+def export_filename() -> str:
+    """导出文件名"""
+    return f"posts_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
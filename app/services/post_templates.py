@@ -0,0 +1,69 @@
+"""
+公众号文案 HTML 模板注册表
+★ 使用 Jinja2 预编译模板（自动转义），模板文件位于 app/templates/posts/
+★ 配置 POST_TEMPLATE_CACHE_DIR 后，编译结果会写入字节码缓存，多进程/重启后无需重新编译
+"""
+import os
+from typing import Any, Dict, List
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from app.core.config import settings
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+# ============================================================
+# 文案风格注册表：新增风格只需在 templates/posts/ 下加模板并在此登记
+# ============================================================
+POST_STYLES: Dict[str, Dict[str, str]] = {
+    "classic": {
+        "template": "posts/classic.html",
+        "label": "经典渐变",
+    },
+    "minimal": {
+        "template": "posts/minimal.html",
+        "label": "极简白",
+    },
+}
+
+DEFAULT_POST_STYLE = "classic"
+
+
+def _create_environment() -> Environment:
+    bytecode_cache = None
+    if settings.POST_TEMPLATE_CACHE_DIR:
+        os.makedirs(settings.POST_TEMPLATE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(settings.POST_TEMPLATE_CACHE_DIR)
+
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        bytecode_cache=bytecode_cache,
+        # 模板随代码发布，运行期不检查文件变更
+        auto_reload=settings.DEBUG,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+
+_env = _create_environment()
+
+
+def list_post_styles() -> List[Dict[str, str]]:
+    """获取可用的文案风格列表"""
+    return [{"key": key, "label": conf["label"]} for key, conf in POST_STYLES.items()]
+
+
+def resolve_post_style(style: str = None) -> str:
+    """未指定或未登记的风格回退到配置的默认风格"""
+    if style in POST_STYLES:
+        return style
+    if settings.POST_TEMPLATE_STYLE in POST_STYLES:
+        return settings.POST_TEMPLATE_STYLE
+    return DEFAULT_POST_STYLE
+
+
+def render_post(context: Dict[str, Any], style: str = None) -> str:
+    """按风格渲染文案 HTML（模板首次使用时编译，之后复用）"""
+    template = _env.get_template(POST_STYLES[resolve_post_style(style)]["template"])
+    return template.render(**context)
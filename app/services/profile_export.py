@@ -0,0 +1,168 @@
+"""
+用户资料导出服务（CSV / Excel）
+★ 按批次从数据库游标读取（yield_per），不一次性加载全部资料
+★ CSV 边读边输出；Excel 使用 openpyxl 只写模式写入临时文件后分块输出
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+from typing import Iterator, List
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from sqlalchemy import select
+
+from app.models.user_profile import UserProfile
+
+# 每批从数据库读取的行数
+EXPORT_BATCH_SIZE = 500
+# 文件分块输出大小
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# (字段, 表头)
+EXPORT_COLUMNS = [
+    ("id", "ID"),
+    ("serial_number", "编号"),
+    ("status", "状态"),
+    ("name", "姓名/昵称"),
+    ("gender", "性别"),
+    ("birthday", "生日"),
+    ("age", "年龄"),
+    ("height", "身高cm"),
+    ("weight", "体重kg"),
+    ("marital_status", "婚姻状况"),
+    ("body_type", "体型"),
+    ("hometown", "籍贯"),
+    ("work_location", "工作地"),
+    ("industry", "行业"),
+    ("constellation", "星座"),
+    ("mbti", "MBTI"),
+    ("health_condition", "健康状况"),
+    ("housing_status", "住房情况"),
+    ("dating_purpose", "交友目的"),
+    ("want_children", "是否需要孩子"),
+    ("coming_out_status", "出柜状态"),
+    ("wechat_id", "微信号"),
+    ("hobbies", "兴趣爱好"),
+    ("lifestyle", "生活方式"),
+    ("activity_expectation", "对活动的期望"),
+    ("expectation", "期待对象"),
+    ("special_requirements", "特殊要求"),
+    ("referred_by", "推荐人"),
+    ("invitation_code_used", "使用的邀请码"),
+    ("create_time", "创建时间"),
+    ("reviewed_at", "审核时间"),
+    ("reviewed_by", "审核人"),
+]
+
+# 以这些字符开头的文本会被 Excel / WPS 当作公式执行（CSV 注入）
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _safe_text(text: str) -> str:
+    """
+    用户填写的文本写入表格前的处理
+    ★ 去掉 xlsx 不允许的控制字符（openpyxl 遇到会抛异常，下载中途截断）
+    ★ 公式开头的文本前加单引号，按纯文本显示
+    """
+    text = ILLEGAL_CHARACTERS_RE.sub("", text)
+    if text.startswith(FORMULA_PREFIXES):
+        text = "'" + text
+    return text
+
+
+def _format_value(value):
+    """把 JSON / 时间字段转成表格可读的文本"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, list):
+        value = "、".join(str(v) for v in value if v)
+    elif isinstance(value, dict):
+        value = "；".join(f"{k}: {v}" for k, v in value.items() if v)
+    if isinstance(value, str):
+        return _safe_text(value)
+    return value
+
+
+def _iter_rows(status: str = None) -> Iterator[List]:
+    """
+    逐行读取资料（只查询导出列）
+    ★ 自行管理数据库会话：响应流式输出期间请求依赖的会话可能已关闭
+    """
+    from app.db.base import SessionLocal
+
+    stmt = select(*[getattr(UserProfile, field) for field, _ in EXPORT_COLUMNS]).order_by(UserProfile.id.asc())
+    if status and status != "all":
+        stmt = stmt.where(UserProfile.status == status)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            yield [_format_value(v) for v in row]
+    finally:
+        db.close()
+
+
+def iter_profiles_csv(status: str = None) -> Iterator[bytes]:
+    """CSV 流（带 BOM，Excel 直接打开不乱码）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")
+    writer.writerow([header for _, header in EXPORT_COLUMNS])
+    # 表头立即输出，客户端无需等待第一批数据即可开始下载
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    for i, row in enumerate(_iter_rows(status), 1):
+        writer.writerow(row)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_profiles_xlsx(status: str = None) -> Iterator[bytes]:
+    """
+    Excel 流
+    xlsx 是 zip 格式，必须写完才能输出；只写模式下行数据直接落盘，内存占用不随行数增长
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("用户资料")
+    ws.append([header for _, header in EXPORT_COLUMNS])
+    for row in _iter_rows(status):
+        ws.append(row)
+
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_profiles_export(fmt: str, status: str = None) -> Iterator[bytes]:
+    """按格式返回导出流"""
+    if fmt == "xlsx":
+        return iter_profiles_xlsx(status)
+    return iter_profiles_csv(status)
+
+
+def export_filename(fmt: str) -> str:
+    """导出文件名"""
+    return f"profiles_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
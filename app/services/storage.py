@@ -0,0 +1,170 @@
+"""
+对象存储（照片 / 公众号文案）
+★ STORAGE_BACKEND=cos（默认）：腾讯云 COS，访问地址为 COS_DOMAIN/{key}
+★ STORAGE_BACKEND=local：写入 LOCAL_STORAGE_DIR，由 /uploads 静态路由提供访问，开发和压测时代替 COS
+★ 接口均为同步调用，在 async 接口中请用 run_in_threadpool 调用
+"""
+import logging
+import os
+import posixpath
+import shutil
+from typing import BinaryIO, Optional, Union
+
+from app.core.config import settings
+from app.core.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+# 本地存储对外的 URL 前缀（与 main.py 中的静态路由一致）
+LOCAL_URL_PREFIX = "/uploads"
+
+_cos_client = None
+
+
+def is_local() -> bool:
+    return settings.STORAGE_BACKEND == "local"
+
+
+def is_configured() -> bool:
+    """存储是否可用（COS 未配置密钥时跳过清理等非必要操作）"""
+    if is_local():
+        return True
+    return bool(settings.COS_SECRET_ID and settings.COS_DOMAIN)
+
+
+def _get_cos_client():
+    """COS 客户端（进程内复用）"""
+    global _cos_client
+    if _cos_client is None:
+        try:
+            from qcloud_cos import CosConfig, CosS3Client
+        except ImportError:
+            logger.error("cos-python-sdk-v5 未安装，请运行: pip install cos-python-sdk-v5")
+            raise
+        config = CosConfig(
+            Region=settings.COS_REGION,
+            SecretId=settings.COS_SECRET_ID,
+            SecretKey=settings.COS_SECRET_KEY,
+        )
+        _cos_client = CosS3Client(config)
+    return _cos_client
+
+
+def close_client():
+    """释放 COS 客户端的连接（应用关闭时调用）"""
+    global _cos_client
+    if _cos_client is not None:
+        # SDK 没有公开的关闭方法，连接由内部的 requests 会话持有
+        session = getattr(_cos_client, "_session", None)
+        if session is not None:
+            session.close()
+        _cos_client = None
+
+
+def _local_path(key: str) -> str:
+    root = os.path.abspath(settings.LOCAL_STORAGE_DIR)
+    path = os.path.abspath(os.path.join(root, key))
+    # key 来自用户 openid / 文件名拼接，防止 ../ 跳出存储目录
+    if not path.startswith(root + os.sep):
+        raise ValueError(f"非法的存储路径: {key}")
+    return path
+
+
+def normalize_key(key: str) -> Optional[str]:
+    """
+    规范化对象 key（合并 ./、//，解析 ../），跳出根目录或含反斜杠时返回 None
+    ★ 按前缀做归属校验前必须先规范化，否则 photos/{自己}/../{别人}/a.jpg 能通过前缀检查
+    """
+    if not key or "\\" in key or key.startswith("/"):
+        return None
+    normalized = posixpath.normpath(key)
+    if normalized == ".." or normalized.startswith("../"):
+        return None
+    return normalized
+
+
+def url_for(key: str) -> str:
+    """对象的访问地址"""
+    if is_local():
+        return f"{LOCAL_URL_PREFIX}/{key}"
+    return f"{settings.COS_DOMAIN}/{key}"
+
+
+def key_from_url(url: str) -> Optional[str]:
+    """由访问地址反推对象 key，不是当前存储的地址时返回 None"""
+    prefix = f"{LOCAL_URL_PREFIX}/" if is_local() else f"{settings.COS_DOMAIN}/"
+    if (is_local() or settings.COS_DOMAIN) and url.startswith(prefix):
+        return url[len(prefix):]
+    return None
+
+
+def put_object(key: str, body: Union[bytes, BinaryIO], content_type: str) -> str:
+    """上传对象，返回访问地址"""
+    if is_local():
+        with track_upstream("local", "put_object"):
+            path = _local_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                if isinstance(body, (bytes, bytearray)):
+                    f.write(body)
+                else:
+                    shutil.copyfileobj(body, f)
+        return url_for(key)
+
+    client = _get_cos_client()
+    with track_upstream("cos", "put_object"):
+        response = client.put_object(
+            Bucket=settings.COS_BUCKET,
+            Body=body,
+            Key=key,
+            ContentType=content_type,
+        )
+    logger.debug(f"COS上传成功: {key}, ETag: {response.get('ETag', '')}")
+    return url_for(key)
+
+
+def delete_object(key: str):
+    """删除单个对象（不存在时不报错）"""
+    if is_local():
+        with track_upstream("local", "delete_object"):
+            try:
+                os.remove(_local_path(key))
+            except FileNotFoundError:
+                pass
+        return
+
+    client = _get_cos_client()
+    with track_upstream("cos", "delete_object"):
+        client.delete_object(Bucket=settings.COS_BUCKET, Key=key)
+
+
+def delete_prefix(prefix: str) -> int:
+    """删除某个目录下的所有对象，返回删除数量"""
+    if is_local():
+        with track_upstream("local", "delete_objects"):
+            directory = _local_path(prefix.rstrip("/"))
+            if not os.path.isdir(directory):
+                return 0
+            count = sum(len(files) for _, _, files in os.walk(directory))
+            shutil.rmtree(directory, ignore_errors=True)
+        return count
+
+    client = _get_cos_client()
+    with track_upstream("cos", "list_objects"):
+        response = client.list_objects(
+            Bucket=settings.COS_BUCKET,
+            Prefix=prefix,
+            MaxKeys=100,
+        )
+
+    contents = response.get('Contents', [])
+    if not contents:
+        return 0
+
+    delete_objects = [{'Key': obj['Key']} for obj in contents]
+    with track_upstream("cos", "delete_objects"):
+        client.delete_objects(
+            Bucket=settings.COS_BUCKET,
+            Delete={'Object': delete_objects, 'Quiet': 'true'},
+        )
+    return len(delete_objects)
@@ -1,22 +1,84 @@
 """
 微信相关服务
+★ 共享一个带连接池的 httpx 客户端，超时严格限制
+★ code → openid/session_key 短期缓存：小程序重试、auto-login 失败后转 verify 时
+  会拿同一个 wx_code 再请求一次，微信侧会返回 code been used，缓存后直接复用
+★ 同一个 code 的并发请求只调用一次微信接口
+★ 微信接口连续异常时熔断，快速失败而不是每个请求都等到超时
 """
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
 import httpx
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
-from typing import Optional
+from app.core.metrics import track_upstream
 
+logger = logging.getLogger(__name__)
 
-async def get_openid_from_code(wx_code: str) -> Optional[str]:
-    """
-    通过微信code获取openid
-    """
-    # 如果没有配置微信参数，返回模拟openid（开发用）
-    if not settings.WECHAT_APP_ID or not settings.WECHAT_APP_SECRET:
-        # 开发模式：使用code作为openid
-        return f"dev_openid_{wx_code}"
+_client: Optional[httpx.AsyncClient] = None
+_session_cache: Dict[str, Tuple[float, dict]] = {}
+_in_flight: Dict[str, asyncio.Future] = {}
+_breaker = CircuitBreaker(
+    "微信接口",
+    failure_threshold=settings.WECHAT_BREAKER_THRESHOLD,
+    cooldown=settings.WECHAT_BREAKER_COOLDOWN,
+)
+
+# 缓存条目上限，超出时先清理过期条目
+SESSION_CACHE_MAX = 10000
 
-    # 生产模式：调用微信API
-    url = "https://api.weixin.qq.com/sns/jscode2session"
+
+def get_client() -> httpx.AsyncClient:
+    """共享 HTTP 客户端（首次使用时创建）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.WECHAT_API_BASE,
+            timeout=httpx.Timeout(settings.WECHAT_TIMEOUT, connect=min(settings.WECHAT_TIMEOUT, 2.0)),
+            limits=httpx.Limits(
+                max_connections=settings.WECHAT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WECHAT_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """关闭共享客户端（应用关闭时调用）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _cache_get(wx_code: str) -> Optional[dict]:
+    entry = _session_cache.get(wx_code)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        _session_cache.pop(wx_code, None)
+        return None
+    return entry[1]
+
+
+def _cache_set(wx_code: str, session: dict):
+    if settings.WECHAT_SESSION_CACHE_TTL <= 0:
+        return
+    now = time.monotonic()
+    if len(_session_cache) >= SESSION_CACHE_MAX:
+        for key in [k for k, (expires, _) in _session_cache.items() if expires < now]:
+            del _session_cache[key]
+        if len(_session_cache) >= SESSION_CACHE_MAX:
+            _session_cache.clear()
+    _session_cache[wx_code] = (now + settings.WECHAT_SESSION_CACHE_TTL, session)
+
+
+async def _request_session(wx_code: str) -> Optional[dict]:
+    """调用 jscode2session"""
     params = {
         "appid": settings.WECHAT_APP_ID,
         "secret": settings.WECHAT_APP_SECRET,
@@ -25,15 +87,74 @@ async def get_openid_from_code(wx_code: str) -> Optional[str]:
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            data = response.json()
+        is_trial = _breaker.before_call()
+    except CircuitOpenError:
+        logger.warning("微信接口熔断中，跳过调用")
+        return None
 
-            if "openid" in data:
-                return data["openid"]
-            else:
-                print(f"微信API错误: {data}")
-                return None
+    try:
+        with track_upstream("wechat", "jscode2session"):
+            response = await get_client().get("/sns/jscode2session", params=params)
+            response.raise_for_status()
+            data = response.json()
     except Exception as e:
-        print(f"调用微信API异常: {e}")
-        return None
\ No newline at end of file
+        _breaker.record_failure()
+        logger.error(f"调用微信API异常: {e!r}")
+        return None
+    except BaseException:
+        # 被取消（客户端断开、应用关闭、外层超时）不代表微信接口异常，但必须释放试探名额
+        if is_trial:
+            _breaker.release_trial()
+        raise
+
+    # 微信正常返回了结果（包括 code 无效等业务错误），接口本身可用
+    _breaker.record_success()
+    if "openid" not in data:
+        logger.warning(f"微信API错误: {data}")
+        return None
+
+    return {
+        "openid": data["openid"],
+        "session_key": data.get("session_key"),
+        "unionid": data.get("unionid"),
+    }
+
+
+async def get_wechat_session(wx_code: str) -> Optional[dict]:
+    """
+    通过微信code获取会话信息 {openid, session_key, unionid}
+    """
+    cached = _cache_get(wx_code)
+    if cached is not None:
+        return cached
+
+    pending = _in_flight.get(wx_code)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[wx_code] = future
+    try:
+        session = await _request_session(wx_code)
+        if session:
+            _cache_set(wx_code, session)
+        future.set_result(session)
+        return session
+    finally:
+        _in_flight.pop(wx_code, None)
+        # 本次请求被取消时，等待同一个 code 的其他请求一并取消
+        if not future.done():
+            future.cancel()
+
+
+async def get_openid_from_code(wx_code: str) -> Optional[str]:
+    """
+    通过微信code获取openid
+    """
+    # 如果没有配置微信参数，返回模拟openid（开发用）
+    if not settings.WECHAT_APP_ID or not settings.WECHAT_APP_SECRET:
+        # 开发模式：使用code作为openid
+        return f"dev_openid_{wx_code}"
+
+    session = await get_wechat_session(wx_code)
+    return session["openid"] if session else None
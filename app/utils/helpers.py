@@ -4,12 +4,17 @@
 from datetime import datetime, date
 
 
+def format_serial_number(number: int) -> str:
+    """编号格式化（至少3位，如 051）"""
+    return f"{number:03d}"
+
+
 def generate_serial_number(last_number: int) -> str:
     """
     生成编号
     """
     next_number = (last_number or 0) + 1
-    return f"{next_number:03d}"
+    return format_serial_number(next_number)
 
 
 def datetime_to_str(dt: datetime) -> str:
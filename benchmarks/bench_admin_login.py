@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+管理员登录吞吐基准
+用法: python benchmarks/bench_admin_login.py [-n 40] [-c 8] [--rounds 12]
+
+在临时 SQLite 数据库中创建管理员，通过 ASGI 进程内调用：
+1. 并发发起 n 次登录，统计登录吞吐和延迟
+2. 登录进行期间持续请求 /health，统计其延迟，反映 bcrypt 是否阻塞事件循环
+"""
+import sys
+import os
+import asyncio
+import statistics
+import tempfile
+import time
+
+# 使用独立的临时数据库，不影响开发库
+_db_path = os.path.join(tempfile.mkdtemp(prefix="bench_login_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ["DEBUG"] = "False"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(n: int, concurrency: int) -> None:
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        login_times, health_times = [], []
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                start = time.perf_counter()
+                r = await client.post("/api/v1/admin/login", json={"username": "bench", "password": "bench-pw"})
+                login_times.append(time.perf_counter() - start)
+                assert r.status_code == 200, r.text
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_times.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*[login() for _ in range(n)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    print(f"登录 {n} 次（并发 {concurrency}）: {elapsed:.2f}s  {n / elapsed:.1f} 次/秒  "
+          f"平均={statistics.mean(login_times) * 1000:.0f}ms  p95={percentile(login_times, 0.95) * 1000:.0f}ms")
+    print(f"同期 /health {len(health_times)} 次: 平均={statistics.mean(health_times) * 1000:.1f}ms  "
+          f"p99={percentile(health_times, 0.99) * 1000:.1f}ms  最大={max(health_times) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="管理员登录吞吐基准")
+    parser.add_argument("-n", "--count", type=int, default=40, help="登录次数")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="并发数")
+    parser.add_argument("--rounds", type=int, default=None, help="BCRYPT_ROUNDS（默认取配置）")
+    args = parser.parse_args()
+
+    if args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    from app.db.base import Base, engine, SessionLocal
+    from app.crud.crud_admin import create_admin
+    import app.models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    create_admin(db, "bench", "bench-pw")
+    db.close()
+
+    asyncio.run(run(args.count, args.concurrency))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+AI 审核 / AI 文案生成吞吐基准（离线，对接 mock_llm_server.py）
+用法: python benchmarks/bench_ai_pipeline.py [-n 200] [-c 20] [--pipeline review,post] [--api-type openai]
+      python benchmarks/bench_ai_pipeline.py --api-url http://127.0.0.1:9200/v1/chat/completions
+
+不传 --api-url 时自动在子进程启动 mock_llm_server.py（随机端口），--latency / --error-rate / --rate-limit-rate /
+--max-concurrency / --bad-json-rate 原样转发给模拟服务；传 --api-url 时压测已启动的模拟服务（参数以该服务为准）。
+
+直接调用 auto_review_profile / generate_ai_post_html，并发 c 个协程共处理 n 份资料，输出：
+- 吞吐、延迟 p50 / p95 / p99
+- 结果分布（审核：pass / reject / error；文案：AI 生成 / 回退到模板）
+- 模拟服务收到的请求统计（429 / 500 / 格式异常次数）
+审核用的资料缺少必填字段但写了自我描述，保证每份都会调用 AI。
+"""
+import sys
+import os
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PIPELINES = ["review", "post"]
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_llm_server.py")
+MOCK_ARGS = ("latency", "jitter", "tokens_per_second", "error_rate", "rate_limit_rate",
+             "max_concurrency", "bad_json_rate", "fence_rate")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def make_profile(i: int) -> dict:
+    """只填了基础信息和自由文本的资料（审核时缺字段，需要 AI 提取）"""
+    return {
+        "serial_number": f"{i:03d}",
+        "name": f"用户{i}",
+        "gender": random.choice(["男", "女"]),
+        "age": random.randint(20, 40),
+        "height": random.randint(155, 190),
+        "weight": random.randint(45, 90),
+        "work_location": random.choice(["北京朝阳", "上海浦东", "深圳南山", "杭州西湖"]),
+        "industry": random.choice(["互联网", "金融", "教育", "医疗"]),
+        "constellation": "天秤座",
+        "hobbies": random.sample(["健身", "读书", "旅行", "摄影", "音乐", "电影", "烹饪"], k=4),
+        "lifestyle": "单身，身体健康，目前租房。想找一个长期伴侣，孩子的话可以考虑。"
+                     "家里人知道，同事不知道。希望对方 25-35 岁、性格温和、同城。",
+        "activity_expectation": "希望认识聊得来的朋友",
+        "special_requirements": "不抽烟",
+        "expectation": {},
+        "admin_contact": "casper_gb",
+        "photos": [f"https://example.com/photos/mock/{i}_{k}.jpg" for k in range(3)],
+    }
+
+
+# ============================================================
+# 模拟服务
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock_server(args) -> tuple:
+    """子进程启动模拟服务，返回 (进程, 服务根地址)"""
+    port = _free_port()
+    cmd = [sys.executable, MOCK_SERVER, "--port", str(port)]
+    for name in MOCK_ARGS:
+        cmd += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    process = subprocess.Popen(cmd)
+    base = f"http://127.0.0.1:{port}"
+
+    import httpx
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("模拟服务启动失败")
+        try:
+            httpx.get(f"{base}/stats", timeout=0.5)
+            return process, base
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("模拟服务启动超时")
+
+
+def api_path(api_type: str) -> str:
+    return "/v1/messages" if api_type == "claude" else "/v1/chat/completions"
+
+
+def server_root(api_url: str) -> str:
+    """模拟服务的 /stats 在根路径下"""
+    parts = urlsplit(api_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# ============================================================
+# 压测
+# ============================================================
+
+async def run_pipeline(name: str, profiles: list, concurrency: int) -> dict:
+    from app.services.ai_post_generator import generate_ai_post_html
+    from app.services.ai_review import auto_review_profile
+
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    outcomes = Counter()
+
+    async def one(profile):
+        async with semaphore:
+            start = time.perf_counter()
+            if name == "review":
+                action, _, _ = await auto_review_profile(dict(profile))
+                outcomes[action] += 1
+            else:
+                result = await generate_ai_post_html(dict(profile))
+                outcomes["ai" if result["ai_generated"] else "fallback"] += 1
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(p) for p in profiles])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "pipeline": name,
+        "count": len(profiles),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "rps": round(len(profiles) / elapsed, 1),
+        "mean_ms": round(statistics.mean(timings) * 1000, 1),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 1),
+        "outcomes": dict(outcomes),
+    }
+
+
+async def fetch_stats(root: str, reset: bool = False) -> dict:
+    import httpx
+    async with httpx.AsyncClient(timeout=5) as client:
+        if reset:
+            await client.post(f"{root}/stats/reset")
+            return {}
+        return (await client.get(f"{root}/stats")).json()
+
+
+async def main(args, api_url: str) -> list:
+    random.seed(args.seed_value)
+    profiles = [make_profile(i) for i in range(1, args.count + 1)]
+    root = server_root(api_url)
+
+    results = []
+    print(f"{'流程':<8}{'数量':>6}{'并发':>6}{'吞吐/s':>10}{'平均ms':>10}{'p50':>9}{'p95':>9}{'p99':>9}  结果")
+    for name in args.pipeline.split(","):
+        await fetch_stats(root, reset=True)
+        result = await run_pipeline(name, profiles, args.concurrency)
+        result["server"] = await fetch_stats(root)
+        results.append(result)
+        outcomes = " ".join(f"{k}={v}" for k, v in sorted(result["outcomes"].items()))
+        print(f"{name:<8}{result['count']:>6}{result['concurrency']:>6}{result['rps']:>10}{result['mean_ms']:>10}"
+              f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}  {outcomes}")
+
+    print("\n模拟服务统计")
+    for result in results:
+        server = {k: v for k, v in result["server"].items() if k not in ("in_flight",)}
+        print(f"  {result['pipeline']:<8}" + " ".join(f"{k}={v}" for k, v in sorted(server.items())))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI 审核 / AI 文案生成吞吐基准")
+    parser.add_argument("-n", "--count", type=int, default=200, help="资料数量")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--pipeline", type=str, default=",".join(PIPELINES), help=f"逗号分隔，可选 {','.join(PIPELINES)}")
+    parser.add_argument("--api-type", choices=["openai", "claude"], default="openai", help="AI_API_TYPE")
+    parser.add_argument("--api-url", type=str, default=None, help="已启动的模拟服务接口地址，不传则自动启动")
+    parser.add_argument("--seed-value", type=int, default=42, help="随机种子")
+    parser.add_argument("--json", type=str, default=None, help="结果写入 JSON 文件")
+    mock = parser.add_argument_group("模拟服务参数（自动启动时生效）")
+    mock.add_argument("--latency", type=float, default=1.5, help="首字延迟（秒）")
+    mock.add_argument("--jitter", type=float, default=0.3, help="延迟抖动（秒）")
+    mock.add_argument("--tokens-per-second", type=float, default=0.0, help="生成速度，0 表示不按输出长度增加延迟")
+    mock.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 比例")
+    mock.add_argument("--rate-limit-rate", type=float, default=0.0, help="HTTP 429 比例")
+    mock.add_argument("--max-concurrency", type=int, default=0, help="同时处理上限，超过返回 429")
+    mock.add_argument("--bad-json-rate", type=float, default=0.0, help="返回无法解析内容的比例")
+    mock.add_argument("--fence-rate", type=float, default=0.0, help="用 markdown 代码块包裹 JSON 的比例")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.pipeline.split(",") if name not in PIPELINES]
+    if unknown:
+        parser.error(f"未知流程: {', '.join(unknown)}")
+
+    process = None
+    api_url = args.api_url
+    if not api_url:
+        process, root = start_mock_server(args)
+        api_url = root + api_path(args.api_type)
+
+    # 导入 app 之前设置，AI 服务在调用时读取配置
+    os.environ.update({
+        "AI_API_KEY": "mock",
+        "AI_API_TYPE": args.api_type,
+        "AI_API_URL": api_url,
+        "DEBUG": "False",
+    })
+    import logging
+    logging.basicConfig(level=logging.CRITICAL)  # AI 失败路径会逐条打错误日志，压测时不输出
+
+    try:
+        results = asyncio.run(main(args, api_url))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"api_type": args.api_type, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+邀请码批量生成基准
+用法: python benchmarks/bench_invitation_codes.py [-n 100000] [--batch 5000] [--legacy 2000]
+
+在临时 SQLite 数据库中：
+1. 用 create_invitation_codes_bulk 分批生成 n 个邀请码
+2. 用旧方式（逐个 create_invitation_code，每个 commit 一次）生成 legacy 个，折算到 n 个做对比
+"""
+import sys
+import os
+import tempfile
+import time
+
+# 使用独立的临时数据库，不影响开发库
+_db_path = os.path.join(tempfile.mkdtemp(prefix="bench_inv_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ["DEBUG"] = "False"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base, engine, SessionLocal
+from app.models.invitation_code import InvitationCode
+from app.crud.crud_invitation import create_invitation_code, create_invitation_codes_bulk
+from app.services.invitation import generate_invitation_code, calculate_expire_time
+
+
+def bench_bulk(n: int, batch: int) -> float:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        done = 0
+        while done < n:
+            size = min(batch, n - done)
+            create_invitation_codes_bulk(db, count=size, notes="基准测试", expire_at=calculate_expire_time())
+            done += size
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def bench_legacy(n: int) -> float:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            create_invitation_code(db, code=generate_invitation_code(), notes="基准测试(旧)",
+                                   expire_at=calculate_expire_time())
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="邀请码批量生成基准")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="批量生成数量")
+    parser.add_argument("--batch", type=int, default=5000, help="每次调用生成的数量")
+    parser.add_argument("--legacy", type=int, default=2000, help="旧方式采样数量（0 跳过）")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"数据库: {_db_path}")
+
+    elapsed = bench_bulk(args.count, args.batch)
+    print(f"批量生成 {args.count} 个: {elapsed:.2f}s  ({args.count / elapsed:,.0f} 个/秒)")
+
+    if args.legacy:
+        elapsed_legacy = bench_legacy(args.legacy)
+        rate = args.legacy / elapsed_legacy
+        print(f"逐个生成 {args.legacy} 个: {elapsed_legacy:.2f}s  ({rate:,.0f} 个/秒，"
+              f"折算 {args.count} 个约 {args.count / rate:.1f}s)")
+
+    db = SessionLocal()
+    total = db.query(InvitationCode).count()
+    distinct = db.query(InvitationCode.code).distinct().count()
+    db.close()
+    print(f"校验: 共 {total} 个，去重后 {distinct} 个")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+JSON 响应序列化基准
+用法: python benchmarks/bench_json_encoding.py [-n 2000] [--repeat 20]
+
+按网络树 / 地图分布 / 资料列表三个最大接口的响应结构构造 n 个用户的数据，对比：
+1. jsonable_encoder + json.dumps（旧版 FastAPI 对 response_model 的默认路径）
+2. pydantic TypeAdapter.dump_json（新版 FastAPI 对 response_model 的默认路径）
+3. app.core.responses.dumps（orjson，接口直接返回 ORJSONResponse 时的路径）
+
+资料列表中的 create_time 为 datetime：orjson 一列包含时间格式化的开销，
+另外两列按新版 FastAPI 的默认行为输出 ISO 格式，旧接口里逐行 strftime 的开销未计入。
+"""
+import sys
+import os
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import dumps
+from app.schemas.common import ResponseModel
+
+CITIES = ["北京朝阳", "上海浦东", "深圳南山", "杭州西湖", "成都武侯", "广州天河"]
+STATUSES = ["approved", "published", "pending", "rejected"]
+
+
+def make_users(n: int) -> list:
+    base = datetime(2025, 1, 1)
+    return [{
+        "id": i, "serial_number": f"{i:03d}", "name": f"用户{i}",
+        "gender": random.choice(["男", "女"]), "age": random.randint(20, 40),
+        "work_location": random.choice(CITIES), "industry": "互联网",
+        "status": random.choice(STATUSES),
+        "create_time": base + timedelta(minutes=i),
+        "invited_by": random.randint(1, i - 1) if i > 10 else None,
+    } for i in range(1, n + 1)]
+
+
+def tree_payload(users: list) -> dict:
+    children = {}
+    roots = []
+    for u in users:
+        (children.setdefault(u["invited_by"], []) if u["invited_by"] else roots).append(u)
+
+    def node(u, depth):
+        kids = [node(c, depth + 1) for c in children.get(u["id"], [])]
+        return {**u, "create_time": u["create_time"].strftime("%Y-%m-%d"), "depth": depth,
+                "quality": {"invited_count": len(kids), "approval_rate": None, "quality_label": "待评估"},
+                "descendant_count": sum(k["descendant_count"] + 1 for k in kids), "children": kids}
+
+    return {"tree": [node(u, 0) for u in roots], "stats": {"total_users": len(users)}}
+
+
+def map_payload(users: list) -> dict:
+    cities = {}
+    for u in users:
+        cities.setdefault(u["work_location"], []).append(
+            {k: u[k] for k in ("id", "name", "serial_number", "gender", "age", "status", "work_location", "industry")})
+    return {"cities": [{"city": c, "lat": 30.0, "lng": 120.0, "count": len(us), "users": us}
+                       for c, us in cities.items()]}
+
+
+def list_payload(users: list) -> dict:
+    return {"total": len(users), "page": 1, "limit": len(users),
+            "list": [{k: u[k] for k in ("id", "serial_number", "name", "gender", "age",
+                                        "work_location", "create_time", "status")} for u in users]}
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSON 响应序列化基准")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="模拟用户数")
+    parser.add_argument("--repeat", type=int, default=20, help="每项重复次数（取中位数）")
+    args = parser.parse_args()
+
+    random.seed(42)
+    users = make_users(args.count)
+    adapter = TypeAdapter(ResponseModel)
+
+    print(f"{'接口':<8}{'大小':>10}{'jsonable+json':>16}{'pydantic':>12}{'orjson':>10}  (ms, 中位数)")
+    for name, payload in (("网络树", tree_payload(users)), ("地图", map_payload(users)), ("资料列表", list_payload(users))):
+        model = ResponseModel(success=True, message="获取成功", data=payload)
+        size = len(dumps(model))
+        legacy = timeit(lambda: json.dumps(jsonable_encoder(model), ensure_ascii=False).encode("utf-8"), args.repeat)
+        pydantic_ms = timeit(lambda: adapter.dump_json(adapter.validate_python(model)), args.repeat)
+        orjson_ms = timeit(lambda: dumps(model), args.repeat)
+        print(f"{name:<8}{size:>10,}{legacy:>16.2f}{pydantic_ms:>12.2f}{orjson_ms:>10.2f}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+公众号文案渲染微基准
+用法: python benchmarks/bench_post_render.py [-n 500] [--style classic]
+
+构造 n 份模拟资料，逐份调用 _generate_html（不调用 AI，正文走 _fallback_body），
+输出每份资料的平均 / p95 渲染耗时，用于评估批量导出时模板层的开销。
+"""
+import sys
+import os
+import random
+import statistics
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_post_generator import _generate_html
+from app.services.post_templates import POST_STYLES
+
+
+def make_profile(i: int) -> dict:
+    """生成一份字段较全的模拟资料"""
+    return {
+        "serial_number": f"{i:03d}",
+        "gender": random.choice(["男", "女"]),
+        "age": random.randint(20, 40),
+        "height": random.randint(155, 190),
+        "weight": random.randint(45, 90),
+        "body_type": random.choice(["匀称", "偏瘦", "微胖", "运动型"]),
+        "work_location": random.choice(["北京朝阳", "上海浦东", "深圳南山", "杭州西湖"]),
+        "industry": random.choice(["互联网", "金融", "教育", "医疗"]),
+        "marital_status": "单身",
+        "constellation": "天秤座",
+        "mbti": "INFJ",
+        "dating_purpose": "寻找长期伴侣",
+        "hobbies": random.sample(["健身", "读书", "旅行", "摄影", "音乐", "电影", "烹饪", "游泳"], k=5),
+        "lifestyle": "喜欢周末去爬山，平时下班会做饭。\n养了一只猫，<认真生活>的人。" * 3,
+        "expectation": {"age_range": "25-35", "personality": "温和", "location": "同城"},
+        "admin_contact": "casper_gb",
+        "photos": [f"https://example.com/photos/mock/{i}_{k}.jpg" for k in range(4)],
+    }
+
+
+def bench(n: int, style: str) -> None:
+    profiles = [make_profile(i) for i in range(n)]
+
+    # 预热：首次渲染包含模板编译
+    start = time.perf_counter()
+    _generate_html(profiles[0], style=style)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    total_bytes = 0
+    for p in profiles:
+        start = time.perf_counter()
+        html = _generate_html(p, style=style)
+        timings.append((time.perf_counter() - start) * 1000)
+        total_bytes += len(html.encode("utf-8"))
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"[{style}] n={n}  首次(含编译)={first_ms:.2f}ms  "
+          f"平均={statistics.mean(timings):.3f}ms  p95={p95:.3f}ms  "
+          f"合计={sum(timings):.1f}ms  平均大小={total_bytes // n}B")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="公众号文案渲染微基准")
+    parser.add_argument("-n", "--count", type=int, default=500, help="模拟资料数量")
+    parser.add_argument("--style", type=str, default=None, help="文案风格，不传则测试全部风格")
+    args = parser.parse_args()
+
+    random.seed(42)
+    for style in ([args.style] if args.style else list(POST_STYLES)):
+        bench(args.count, style)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+接口压测
+用法:
+  python benchmarks/loadtest.py                              # 进程内（ASGI），临时 SQLite
+  python benchmarks/loadtest.py -n 1000 -c 50 --profiles 5000
+  python benchmarks/loadtest.py --scenarios tree,map --json out.json
+  python benchmarks/loadtest.py --baseline out.json          # 与上一次结果对比
+  python benchmarks/loadtest.py --base-url http://127.0.0.1:8000 --database-url sqlite:///./rainbow_register.db
+
+1. 按 scripts/seed_network_data.py 的方式生成 N 个用户的邀请关系网络（城市取自两个种子脚本），
+   并生成压测用邀请码、压测管理员
+2. 依次对每个场景发起 n 次请求（并发 c），统计吞吐与 p50 / p95 / p99 延迟
+   verify  邀请码校验（每次使用新的邀请码和微信 code）
+   submit  提交资料（预先校验好邀请码的新用户）
+   upload  上传照片（进程内模式使用本地存储代替 COS）
+   list    管理端资料列表（随机翻页）
+   tree    邀请关系树
+   map     用户地图
+进程内模式下客户端和服务端共用一个事件循环，延迟中包含客户端开销，适合做前后对比，不代表线上绝对值。
+--base-url 模式压测已启动的服务，--database-url 必须与服务使用同一个数据库（用于写入种子数据）；
+微信登录需服务端未配置 WECHAT_APP_ID（开发模式）或指向 benchmarks/mock_wechat_server.py。
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIOS = ["verify", "submit", "upload", "list", "tree", "map"]
+
+ADMIN_USERNAME = "loadtest"
+ADMIN_PASSWORD = "loadtest-pw"
+CODE_NOTES = "压测"
+
+
+def configure_env(args) -> None:
+    """导入 app 之前设置环境变量"""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    elif not args.base_url:
+        # 使用独立的临时数据库，不影响开发库
+        db_path = os.path.join(tempfile.mkdtemp(prefix="loadtest_"), "loadtest.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    if not args.base_url:
+        os.environ.update({
+            "DEBUG": "False",
+            "LOG_LEVEL": "WARNING",
+            "STORAGE_BACKEND": "local",
+            "LOCAL_STORAGE_DIR": tempfile.mkdtemp(prefix="loadtest_storage_"),
+            "WECHAT_APP_ID": "",
+            "AI_API_KEY": "",
+            "SLOW_REQUEST_MS": "0",
+            "PROFILING_CONTINUOUS_ENABLED": "False",
+            # 进程内模式所有请求来自同一个客户端地址，关闭按 IP 限流
+            "INVITATION_VERIFY_IP_LIMIT": "0",
+            # 接口是 async 函数里同步查库，连接池耗尽时会阻塞事件循环直到 pool_timeout，
+            # 连接池按并发数放大（提交资料每个请求最多占两个连接）
+            "DB_POOL_SIZE": str(max(args.concurrency * 2, 5)),
+            "DB_MAX_OVERFLOW": "10",
+        })
+
+
+# ============================================================
+# 种子数据
+# ============================================================
+
+def seed(profiles: int, codes: int) -> None:
+    """生成邀请网络（profiles 为 0 时保留现有数据）、压测邀请码和压测管理员"""
+    from datetime import datetime, timedelta
+
+    from app.db.base import Base, engine, SessionLocal
+    from app.models.user_profile import UserProfile
+    from app.models.invitation_code import InvitationCode
+    from app.crud.crud_admin import create_admin, get_admin_by_username, update_password_hash, bump_token_version
+    from app.crud.crud_invitation import create_invitation_codes_bulk
+    from app.crud.crud_sequence import get_max_serial_number, sync_serial_sequence
+    from app.core.security import get_password_hash
+    from app.services.invitation import generate_invitation_code, calculate_expire_time
+    from scripts.seed_network_data import (
+        MOCK_USERS, STATUS_CHOICES, clear_mock_data, create_user, create_invitation,
+    )
+    from scripts.seed_more_users import NEW_USERS
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if profiles:
+            clear_mock_data(db)
+        db.query(InvitationCode).filter(InvitationCode.notes == CODE_NOTES).delete(synchronize_session=False)
+        db.query(UserProfile).filter(UserProfile.openid.like("%loadtest_%")).delete(synchronize_session=False)
+        db.commit()
+
+        start = time.perf_counter()
+        pool = MOCK_USERS + NEW_USERS
+        serial = get_max_serial_number(db) + 1
+        base_time = datetime.utcnow() - timedelta(days=90)
+        inviters = []
+        for i in range(profiles):
+            user_data = dict(random.choice(pool))
+            status = random.choice(STATUS_CHOICES)
+            time_offset = base_time + timedelta(minutes=i)
+            parent = random.choice(inviters) if inviters and random.random() < 0.9 else None
+
+            code = generate_invitation_code()
+            if parent:
+                inv = create_invitation(db, code, parent.id, "user", is_used=True, base_time=time_offset)
+                referred_by = f"{parent.name}（{parent.serial_number}）"
+            else:
+                inv = create_invitation(db, code, 0, "admin", is_used=True, base_time=time_offset)
+                referred_by = "管理员"
+            profile = create_user(db, user_data, serial, status,
+                                  invited_by_id=parent.id if parent else None,
+                                  invitation_code_used=code, referred_by=referred_by,
+                                  base_time=time_offset)
+            inv.used_by = profile.id
+            inv.used_by_openid = profile.openid
+            if status in ("approved", "published"):
+                inviters.append(profile)
+            serial += 1
+            if i % 500 == 499:
+                db.commit()
+        db.commit()
+        sync_serial_sequence(db)
+
+        create_invitation_codes_bulk(db, count=codes, notes=CODE_NOTES, expire_at=calculate_expire_time())
+
+        admin = get_admin_by_username(db, ADMIN_USERNAME)
+        if admin:
+            update_password_hash(db, admin.id, get_password_hash(ADMIN_PASSWORD))
+            bump_token_version(db, admin.id)
+        else:
+            create_admin(db, ADMIN_USERNAME, ADMIN_PASSWORD)
+        print(f"种子数据: {profiles} 个用户，{codes} 个邀请码，耗时 {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+def load_codes(limit: int) -> list:
+    from app.db.base import SessionLocal
+    from app.models.invitation_code import InvitationCode
+
+    db = SessionLocal()
+    try:
+        rows = db.query(InvitationCode.code).filter(
+            InvitationCode.notes == CODE_NOTES, InvitationCode.is_used == False
+        ).limit(limit).all()
+        return [r.code for r in rows]
+    finally:
+        db.close()
+
+
+# ============================================================
+# 压测
+# ============================================================
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+class Context:
+    """场景之间共享的数据：邀请码、用户 token、管理员 token"""
+
+    def __init__(self, client, codes):
+        self.client = client
+        self.codes = codes
+        self.run_id = uuid.uuid4().hex[:8]
+        self.wx_seq = 0
+        self.admin_headers = None
+        self.user_tokens = []
+        self.submitted_tokens = []
+
+    def next_code(self) -> str:
+        if not self.codes:
+            raise RuntimeError("压测邀请码已用完，请调大 --codes")
+        return self.codes.pop()
+
+    def next_wx_code(self) -> str:
+        self.wx_seq += 1
+        return f"loadtest_{self.run_id}_{self.wx_seq}"
+
+    @staticmethod
+    def client_headers(i: int) -> dict:
+        # 模拟不同客户端（经 nginx 转发），避免按 IP 限流；
+        # --base-url 模式下压测机地址需在服务端 FORWARDED_ALLOW_IPS 中才会生效
+        return {"X-Forwarded-For": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"}
+
+    async def verify(self, i: int):
+        return await self.client.post(
+            "/api/v1/invitation/verify",
+            json={"invitation_code": self.next_code(), "wx_code": self.next_wx_code()},
+            headers=self.client_headers(i),
+        )
+
+    async def ensure_admin(self):
+        if self.admin_headers is None:
+            r = await self.client.post("/api/v1/admin/login",
+                                       json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+            r.raise_for_status()
+            self.admin_headers = {"Authorization": f"Bearer {r.json()['token']}"}
+
+    async def ensure_user_tokens(self, n: int, concurrency: int):
+        """准备 n 个已校验邀请码、尚未提交资料的用户（不计时）"""
+        missing = n - len(self.user_tokens)
+        if missing <= 0:
+            return
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                r = await self.verify(100000 + i)
+                r.raise_for_status()
+                self.user_tokens.append(r.json()["token"])
+
+        await asyncio.gather(*(one(i) for i in range(missing)))
+
+
+def make_submit_payload() -> dict:
+    from scripts.seed_network_data import MOCK_USERS
+
+    user = random.choice(MOCK_USERS)
+    return {
+        "name": user["name"],
+        "gender": user["gender"],
+        "age": user["age"],
+        "height": user["height"],
+        "weight": user["weight"],
+        "work_location": user["work_location"],
+        "industry": user["industry"],
+        "constellation": user["constellation"],
+        "mbti": user["mbti"],
+        "marital_status": "未婚",
+        "hobbies": random.sample(["健身", "读书", "旅行", "摄影", "音乐", "电影", "烹饪", "游泳"], k=3),
+        "lifestyle": "周末爬山，平时下班做饭，养了一只猫。" * 3,
+        "dating_purpose": "寻找长期伴侣",
+        "expectation": {"age_range": "25-35", "personality": "温和", "location": "同城"},
+    }
+
+
+PHOTO_BYTES = b"\xff\xd8\xff\xe0" + os.urandom(48 * 1024) + b"\xff\xd9"
+
+
+async def prepare(name: str, ctx: Context, n: int, concurrency: int):
+    """场景开始前的准备（不计时），返回单次请求函数"""
+    client = ctx.client
+
+    if name == "verify":
+        return ctx.verify
+
+    if name == "submit":
+        await ctx.ensure_user_tokens(n, concurrency)
+        tokens = ctx.user_tokens[:n]
+        del ctx.user_tokens[:n]
+
+        async def submit(i):
+            r = await client.post("/api/v1/profile/submit", json=make_submit_payload(),
+                                  headers={"Authorization": f"Bearer {tokens[i]}"})
+            if r.status_code == 200:
+                ctx.submitted_tokens.append(r.json()["data"]["token"])
+            return r
+        return submit
+
+    if name == "upload":
+        if not ctx.submitted_tokens:
+            await ctx.ensure_user_tokens(concurrency, concurrency)
+            ctx.submitted_tokens.extend(ctx.user_tokens[:concurrency])
+        tokens = list(ctx.submitted_tokens)
+
+        async def upload(i):
+            return await client.post(
+                "/api/v1/upload/photo",
+                files={"file": ("photo.jpg", PHOTO_BYTES, "image/jpeg")},
+                headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"},
+            )
+        return upload
+
+    await ctx.ensure_admin()
+    headers = ctx.admin_headers
+    if name == "list":
+        async def list_page(i):
+            status = random.choice(["approved", "pending", "rejected", "published"])
+            return await client.get(f"/api/v1/admin/profiles/list?status={status}&page={random.randint(1, 20)}&limit=20",
+                                    headers=headers)
+        return list_page
+    if name == "tree":
+        return lambda i: client.get("/api/v1/admin/network/tree", headers=headers)
+    if name == "map":
+        return lambda i: client.get("/api/v1/admin/map/users", headers=headers)
+    raise ValueError(f"未知场景: {name}")
+
+
+async def run_scenario(request, n: int, concurrency: int) -> dict:
+    latencies = []
+    statuses = Counter()
+    indexes = iter(range(n))
+
+    async def worker():
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                r = await request(i)
+                key = r.status_code
+            except Exception as e:
+                key = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[key] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ok = sum(v for k, v in statuses.items() if isinstance(k, int) and 200 <= k < 300)
+    return {
+        "requests": n,
+        "concurrency": concurrency,
+        "ok": ok,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "rps": round(n / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+async def run(args, scenarios) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits)
+        lifespan = None
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60.0)
+        lifespan = app.router.lifespan_context(app)
+
+    results = {}
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            ctx = Context(client, load_codes(args.codes))
+            for name in scenarios:
+                request = await prepare(name, ctx, args.requests, args.concurrency)
+                # 预热：连接池、首次查询编译等不计入
+                if name not in ("verify", "submit"):
+                    for i in range(min(5, args.requests)):
+                        await request(i)
+                results[name] = await run_scenario(request, args.requests, args.concurrency)
+                print_row(name, results[name])
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results
+
+
+HEADER = f"{'场景':<8}{'请求':>7}{'并发':>6}{'成功':>7}{'吞吐/s':>9}{'平均ms':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'最大':>9}"
+
+
+def print_row(name: str, r: dict) -> None:
+    print(f"{name:<10}{r['requests']:>7}{r['concurrency']:>6}{r['ok']:>7}{r['rps']:>10}"
+          f"{r['mean_ms']:>10}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+    failed = {k: v for k, v in r["statuses"].items() if not k.startswith("2")}
+    if failed:
+        print(f"{'':<10}失败: {failed}")
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> bool:
+    """与基线对比 p95 和吞吐，返回是否存在超过阈值的退化"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\n与基线对比（{baseline_path}，退化阈值 {threshold:.0%}）")
+    regressed = False
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95_change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_change = (r["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        flag = p95_change > threshold or rps_change < -threshold
+        regressed = regressed or flag
+        print(f"  {name:<8} p95 {base['p95_ms']}ms → {r['p95_ms']}ms ({p95_change:+.1%})  "
+              f"吞吐 {base['rps']} → {r['rps']} ({rps_change:+.1%}){'  ⚠️ 退化' if flag else ''}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="接口压测")
+    parser.add_argument("-n", "--requests", type=int, default=300, help="每个场景的请求数")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--profiles", type=int, default=1000, help="种子用户数")
+    parser.add_argument("--codes", type=int, default=0, help="压测邀请码数量（默认按场景自动计算）")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS), help=f"逗号分隔，可选 {','.join(SCENARIOS)}")
+    parser.add_argument("--base-url", type=str, default=None, help="压测已启动的服务，不传则进程内调用")
+    parser.add_argument("--database-url", type=str, default=None, help="写入种子数据的数据库（--base-url 时需与服务一致）")
+    parser.add_argument("--no-seed", action="store_true", help="跳过用户网络生成（仍会生成邀请码和管理员）")
+    parser.add_argument("--seed-value", type=int, default=42, help="随机种子")
+    parser.add_argument("--json", type=str, default=None, help="结果写入 JSON 文件")
+    parser.add_argument("--baseline", type=str, default=None, help="与之前的 JSON 结果对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定退化的变化比例")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知场景: {','.join(sorted(unknown))}")
+    if not args.codes:
+        # verify 每次一个；submit 和无前置 submit 的 upload 需要预先校验的用户
+        args.codes = args.requests * (scenarios.count("verify") + scenarios.count("submit")) + args.concurrency + 100
+
+    random.seed(args.seed_value)
+    configure_env(args)
+    seed(0 if args.no_seed else args.profiles, args.codes)
+
+    print(HEADER)
+    results = asyncio.run(run(args, scenarios))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
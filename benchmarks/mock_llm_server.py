@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+本地模拟大模型对话接口，用于离线压测 AI 审核 / AI 文案生成
+用法: python benchmarks/mock_llm_server.py [--port 9200] [--latency 1.5] [--error-rate 0]
+                                           [--rate-limit-rate 0] [--max-concurrency 0] [--bad-json-rate 0]
+
+后端 .env 中配置（OpenAI 兼容格式，与智谱一致）:
+    AI_API_KEY=mock
+    AI_API_TYPE=openai
+    AI_API_URL=http://127.0.0.1:9200/v1/chat/completions
+Claude 格式:
+    AI_API_TYPE=claude
+    AI_API_URL=http://127.0.0.1:9200/v1/messages
+
+行为：
+- 任意以 /chat/completions 结尾的路径按 OpenAI 格式返回，/v1/messages 按 Claude 格式返回
+- 按 system prompt 判断调用方：数据提取（AI 审核）返回字段齐全的提取结果，其余按公众号文案返回
+- 延迟 = 首字延迟 + 按输出字数计算的生成时间，模拟真实接口耗时随输出长度增长
+- --error-rate 返回 HTTP 500；--rate-limit-rate 按比例返回 429；
+  --max-concurrency 超过同时处理数时返回 429（与按账号并发限流的行为一致）
+- --bad-json-rate 返回夹杂说明文字、无法解析的内容；--fence-rate 用 ```json 代码块包裹（调用方会清理）
+"""
+import sys
+import os
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = 1.5
+LATENCY_JITTER = 0.3
+TOKENS_PER_SECOND = 0.0
+ERROR_RATE = 0.0
+RATE_LIMIT_RATE = 0.0
+MAX_CONCURRENCY = 0
+BAD_JSON_RATE = 0.0
+FENCE_RATE = 0.0
+
+app = FastAPI(title="Mock LLM API")
+stats = Counter()
+_in_flight = 0
+
+REVIEW_RESPONSE = {
+    "marital_status": "单身",
+    "health_condition": "健康",
+    "housing_status": "租房",
+    "dating_purpose": "寻找长期伴侣",
+    "want_children": "可以考虑",
+    "coming_out_status": "半出柜",
+    "expectation": {
+        "relationship": "长期伴侣", "age_range": "25-35", "personality": "温和",
+        "location": "同城", "body_type": None, "appearance": None,
+        "habits": "不抽烟", "children": None, "other": None,
+    },
+}
+
+POST_RESPONSE = {
+    "title": "周末爬山的温柔理工男",
+    "intro": "他说自己是一个认真生活的人，冰箱里永远有自己做的小菜。",
+    "body": (
+        "工作日在写字楼里和代码打交道，周末就背上包去郊外爬山。🏔️\n\n"
+        "他喜欢读书和摄影，镜头里大多是路边的猫和傍晚的云。"
+        "朋友评价他温和、靠谱，答应的事一定做到。\n\n"
+        "他希望遇到一个同城、愿意一起做饭、一起散步的人，慢慢了解，认真相处。"
+    ),
+    "closing": "如果你也喜欢简单踏实的日子，不妨认识一下他。💌",
+}
+
+
+def _completion_text(system_prompt: str) -> str:
+    """按调用方返回预置的 JSON 文本，按比例混入格式异常的回复"""
+    if "数据提取" in system_prompt:
+        kind, content = "review", REVIEW_RESPONSE
+    else:
+        kind, content = "post", POST_RESPONSE
+    stats[kind] += 1
+
+    text = json.dumps(content, ensure_ascii=False)
+    roll = random.random()
+    if roll < BAD_JSON_RATE:
+        stats["bad_json"] += 1
+        return f"好的，以下是结果：\n{text}\n希望对你有帮助！"
+    if roll < BAD_JSON_RATE + FENCE_RATE:
+        stats["fenced"] += 1
+        return f"```json\n{text}\n```"
+    return text
+
+
+async def _simulate(output_chars: int):
+    """首字延迟 + 生成时间（中文按 1 字 ≈ 1 token 估算）"""
+    delay = max(0.0, LATENCY + random.uniform(-LATENCY_JITTER, LATENCY_JITTER))
+    if TOKENS_PER_SECOND > 0:
+        delay += output_chars / TOKENS_PER_SECOND
+    await asyncio.sleep(delay)
+
+
+async def _handle(system_prompt: str, build_body):
+    """公共流程：限流 / 错误注入 / 延迟，成功时用 build_body(text) 生成响应体"""
+    global _in_flight
+    stats["requests"] += 1
+
+    if MAX_CONCURRENCY and _in_flight >= MAX_CONCURRENCY:
+        stats["http_429_concurrency"] += 1
+        return JSONResponse(status_code=429, headers={"Retry-After": "1"},
+                            content={"error": {"type": "rate_limit_error", "message": "too many concurrent requests"}})
+    if random.random() < RATE_LIMIT_RATE:
+        stats["http_429"] += 1
+        return JSONResponse(status_code=429, headers={"Retry-After": "1"},
+                            content={"error": {"type": "rate_limit_error", "message": "rate limit exceeded"}})
+
+    _in_flight += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], _in_flight)
+    try:
+        text = _completion_text(system_prompt)
+        await _simulate(len(text))
+    finally:
+        _in_flight -= 1
+
+    if random.random() < ERROR_RATE:
+        stats["http_500"] += 1
+        return JSONResponse(status_code=500, content={"error": {"type": "server_error", "message": "internal error"}})
+
+    stats["ok"] += 1
+    return build_body(text)
+
+
+@app.post("/{prefix:path}/chat/completions")
+async def chat_completions(prefix: str, request: Request, authorization: str = Header("")):
+    """OpenAI 兼容格式（智谱 / DeepSeek / 通义千问）"""
+    if not authorization.startswith("Bearer "):
+        return JSONResponse(status_code=401, content={"error": {"message": "missing api key"}})
+    payload = await request.json()
+    system_prompt = "".join(m.get("content", "") for m in payload.get("messages", []) if m.get("role") == "system")
+    model = payload.get("model", "mock")
+
+    def build_body(text):
+        return {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(json.dumps(payload, ensure_ascii=False)),
+                      "completion_tokens": len(text), "total_tokens": 0},
+        }
+
+    return await _handle(system_prompt, build_body)
+
+
+@app.post("/v1/messages")
+async def messages(request: Request, x_api_key: str = Header("")):
+    """Claude 格式"""
+    if not x_api_key:
+        return JSONResponse(status_code=401, content={"type": "error", "error": {"type": "authentication_error"}})
+    payload = await request.json()
+    system_prompt = payload.get("system", "")
+    if isinstance(system_prompt, list):
+        system_prompt = "".join(block.get("text", "") for block in system_prompt)
+    model = payload.get("model", "mock")
+
+    def build_body(text):
+        return {
+            "id": f"msg_mock_{stats['requests']}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": len(json.dumps(payload, ensure_ascii=False)), "output_tokens": len(text)},
+        }
+
+    return await _handle(system_prompt, build_body)
+
+
+@app.get("/stats")
+async def get_stats():
+    """查看模拟接口收到的请求统计"""
+    return dict(stats, in_flight=_in_flight)
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    stats.clear()
+    return {"ok": True}
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="模拟大模型对话接口（OpenAI 兼容 / Claude 格式）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--latency", type=float, default=1.5, help="首字延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.3, help="延迟抖动（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="生成速度，0 表示不按输出长度增加延迟")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的比例")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回 HTTP 429 的比例")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="同时处理的请求上限，超过返回 429，0 表示不限")
+    parser.add_argument("--bad-json-rate", type=float, default=0.0, help="返回无法解析内容的比例")
+    parser.add_argument("--fence-rate", type=float, default=0.0, help="用 markdown 代码块包裹 JSON 的比例")
+    args = parser.parse_args()
+
+    LATENCY, LATENCY_JITTER, TOKENS_PER_SECOND = args.latency, args.jitter, args.tokens_per_second
+    ERROR_RATE, RATE_LIMIT_RATE, MAX_CONCURRENCY = args.error_rate, args.rate_limit_rate, args.max_concurrency
+    BAD_JSON_RATE, FENCE_RATE = args.bad_json_rate, args.fence_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+本地模拟微信 jscode2session 接口，用于离线压测登录吞吐
+用法: python benchmarks/mock_wechat_server.py [--port 9100] [--latency 0.05] [--error-rate 0]
+
+后端 .env 中配置:
+    WECHAT_APP_ID=mock
+    WECHAT_APP_SECRET=mock
+    WECHAT_API_BASE=http://127.0.0.1:9100
+
+行为与微信一致的部分：
+- 同一个 js_code 只能换取一次，再次使用返回 errcode 40163（code been used）
+- openid 由 js_code 推导，同一个 code 总是对应同一个 openid
+- 以 "invalid" 开头的 code 返回 errcode 40029
+可选地按 --error-rate 返回 HTTP 500，用于验证熔断
+"""
+import sys
+import os
+import asyncio
+import hashlib
+import random
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+LATENCY = 0.05
+LATENCY_JITTER = 0.02
+ERROR_RATE = 0.0
+
+app = FastAPI(title="Mock WeChat API")
+_used_codes = set()
+stats = Counter()
+
+
+@app.get("/sns/jscode2session")
+async def jscode2session(
+        appid: str = Query(...),
+        secret: str = Query(...),
+        js_code: str = Query(...),
+        grant_type: str = Query("authorization_code"),
+):
+    stats["requests"] += 1
+    await asyncio.sleep(max(0.0, LATENCY + random.uniform(-LATENCY_JITTER, LATENCY_JITTER)))
+
+    if random.random() < ERROR_RATE:
+        stats["http_500"] += 1
+        return JSONResponse(status_code=500, content={"errcode": -1, "errmsg": "system error"})
+    if js_code.startswith("invalid"):
+        stats["invalid"] += 1
+        return {"errcode": 40029, "errmsg": "invalid code"}
+    if js_code in _used_codes:
+        stats["reused"] += 1
+        return {"errcode": 40163, "errmsg": "code been used"}
+
+    _used_codes.add(js_code)
+    digest = hashlib.sha1(js_code.encode("utf-8")).hexdigest()
+    return {"openid": f"mock_{digest[:24]}", "session_key": digest[24:40]}
+
+
+@app.get("/stats")
+async def get_stats():
+    """查看模拟接口收到的请求统计"""
+    return dict(stats)
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="模拟微信 jscode2session 接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.05, help="平均响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 HTTP 500 的比例")
+    args = parser.parse_args()
+
+    LATENCY, LATENCY_JITTER, ERROR_RATE = args.latency, args.jitter, args.error_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,113 @@
+"""
+逐份资料调用的纯 Python 函数微基准（pytest-benchmark）
+用法:
+  python -m pytest benchmarks/test_hot_functions.py                                   # 只看结果
+  python -m pytest benchmarks/test_hot_functions.py --benchmark-storage=benchmarks/baselines --benchmark-save=hot_functions
+  python -m pytest benchmarks/test_hot_functions.py --benchmark-storage=benchmarks/baselines \
+      --benchmark-compare --benchmark-compare-fail=median:20%
+  python -m pytest benchmarks/test_hot_functions.py -k "extract_city or _generate_html"
+
+覆盖批量路径（地图分布、AI 审核、批量导出文案）里每份资料都会调用的函数。
+每个用例跑一遍同一批固定的模拟资料（随机种子固定），统计值是整批的耗时，除以 FIXTURE_SIZE 即单次调用耗时。
+--benchmark-compare 默认对比同一机器目录下最近一次保存的结果，超过 --benchmark-compare-fail 阈值时失败，可以放进 CI。
+基线与机器相关（按 机器/Python 版本分目录保存），换机器后请重新 --benchmark-save。
+不在 testpaths 中，常规 pytest 不会执行。
+"""
+import sys
+import os
+import random
+from typing import Callable, Dict, List
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pytest_benchmark")
+
+from app.api.v1.endpoints.admin import extract_city  # noqa: E402
+from app.services.ai_post_generator import _build_profile_summary, _generate_html  # noqa: E402
+from app.services.ai_review import _get_missing_fields  # noqa: E402
+from app.services.post_generator import generate_post_content  # noqa: E402
+from app.utils.helpers import calculate_age, calculate_constellation  # noqa: E402
+
+FIXTURE_SIZE = 200
+
+LOCATIONS = [
+    "北京朝阳", "上海浦东", "深圳南山", "杭州西湖", "成都武侯", "广州天河", "重庆渝北",
+    "乌鲁木齐天山", "呼和浩特新城", "石家庄长安", "香港中环", "海外 东京", "  南京鼓楼 ", "",
+]
+HOBBIES = ["健身", "读书", "旅行", "摄影", "音乐", "电影", "烹饪", "游泳", "运动", "徒步"]
+
+
+def make_profile(i: int) -> dict:
+    """字段较全、部分字段缺失的模拟资料（与提交接口写入的结构一致）"""
+    birthday = f"{random.randint(1980, 2004)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+    sparse = i % 5 == 0  # 每 5 份有一份只填了必填项，覆盖 AI 审核的缺字段分支
+    return {
+        "serial_number": f"{i:03d}",
+        "name": f"用户{i}",
+        "gender": random.choice(["男", "女"]),
+        "birthday": birthday,
+        "age": calculate_age(birthday),
+        "height": random.randint(155, 190),
+        "weight": random.randint(45, 90),
+        "body_type": None if sparse else random.choice(["匀称", "偏瘦", "微胖", "运动型"]),
+        "hometown": None if sparse else random.choice(["湖南长沙", "四川成都", "山东济南"]),
+        "work_location": random.choice(LOCATIONS),
+        "industry": random.choice(["互联网", "金融", "教育", "医疗"]),
+        "marital_status": "单身",
+        "constellation": calculate_constellation(birthday),
+        "mbti": None if sparse else random.choice(["INFJ", "ENTP", "ISTJ"]),
+        "health_condition": None if sparse else "健康",
+        "housing_status": None if sparse else "租房",
+        "coming_out_status": None if sparse else "已出柜",
+        "dating_purpose": "寻找长期伴侣",
+        "want_children": None if sparse else "随缘",
+        "hobbies": random.sample(HOBBIES, k=random.randint(0 if sparse else 3, 6)),
+        "lifestyle": "" if sparse else "喜欢周末去爬山，平时下班会做饭。\n养了一只猫，<认真生活>的人。" * 3,
+        "activity_expectation": None if sparse else "希望认识聊得来的朋友",
+        "expectation": {} if sparse else {
+            "age_range": "25-35", "personality": "温和", "relationship": "长期",
+            "location": "同城", "appearance": random.choice(["短发", "干净", ""]),
+        },
+        "special_requirements": None if sparse else "不抽烟",
+        "admin_contact": "casper_gb",
+        "photos": [f"https://example.com/photos/mock/{i}_{k}.jpg" for k in range(4)],
+    }
+
+
+def make_fixtures(n: int) -> List[dict]:
+    random.seed(42)
+    return [make_profile(i) for i in range(1, n + 1)]
+
+
+def build_cases(profiles: List[dict]) -> Dict[str, Callable[[], None]]:
+    """每个用例跑一遍整批资料"""
+    locations = [p["work_location"] for p in profiles]
+    birthdays = [p["birthday"] for p in profiles]
+
+    def run(func, items):
+        def case():
+            for item in items:
+                func(item)
+        return case
+
+    return {
+        "extract_city": run(extract_city, locations),
+        "calculate_constellation": run(calculate_constellation, birthdays),
+        "calculate_age": run(calculate_age, birthdays),
+        "_get_missing_fields": run(_get_missing_fields, profiles),
+        "_build_profile_summary": run(_build_profile_summary, profiles),
+        "generate_post_content": run(generate_post_content, profiles),
+        "_generate_html": run(_generate_html, profiles),
+    }
+
+
+CASES = build_cases(make_fixtures(FIXTURE_SIZE))
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_hot_function(benchmark, name):
+    benchmark.group = "hot_functions"
+    benchmark.extra_info["profiles"] = FIXTURE_SIZE
+    benchmark.pedantic(CASES[name], warmup_rounds=1, rounds=20, iterations=5)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Rainbow Register Backend - 生产环境启动脚本
+多 worker 进程运行，收到 SIGTERM / Ctrl+C 时优雅关闭：
+停止接收新请求 → 等待进行中的请求和后台任务（最多 GRACEFUL_SHUTDOWN_TIMEOUT 秒）→ 各 worker 执行 lifespan 关闭逻辑
+
+用法: python run_prod.py [--workers 4] [--port 8000]
+"""
+import glob
+import os
+import tempfile
+
+import uvicorn
+from app.core.config import settings
+
+
+def available_cpus() -> int:
+    """当前进程可用的 CPU 核数（考虑 taskset / 容器 cpuset 限制）"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    """
+    每个核一个 worker
+    ★ 接口在事件循环里同步查库，单进程同一时刻只能处理一个查询，多核机器靠多进程扩展
+    ★ 每个 worker 都有自己的数据库连接池，总连接数约为 workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    """
+    return max(1, min(available_cpus(), settings.WORKERS_MAX))
+
+
+def prepare_metrics_dir(port: int) -> str:
+    """
+    多 worker 共用一个端口，/metrics 每次落到随机的 worker，需要汇总所有 worker 的指标
+    ★ 未配置 METRICS_MULTIPROC_DIR 时使用临时目录，通过环境变量传给 worker 进程
+    ★ 启动前清掉上次运行留下的文件，避免旧进程的计数混入
+    """
+    directory = settings.METRICS_MULTIPROC_DIR or os.path.join(tempfile.gettempdir(), f"rainbow_metrics_{port}")
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        os.remove(path)
+    os.environ["METRICS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生产环境启动（多 worker）")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS or None, help="worker 数，默认按 CPU 核数")
+    args = parser.parse_args()
+
+    workers = args.workers or default_workers()
+
+    if settings.DEBUG:
+        print("⚠️ DEBUG=True，生产环境请在 .env 中关闭")
+    if workers > 1 and settings.DATABASE_URL.startswith("sqlite"):
+        print("⚠️ SQLite 不适合多进程并发写入，生产环境请使用 MySQL / PostgreSQL")
+
+    if workers > 1 and settings.METRICS_ENABLED:
+        print(f"📊 Metrics dir: {prepare_metrics_dir(args.port)}（/metrics 汇总所有 worker）")
+
+    print(f"🌈 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    print(f"📍 Server: http://{args.host}:{args.port}")
+    print(f"👷 Workers: {workers}（可用 CPU {available_cpus()} 核）")
+    print(f"⏱️ Graceful shutdown: {settings.GRACEFUL_SHUTDOWN_TIMEOUT}s")
+    print("-" * 50)
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=settings.LOG_LEVEL.lower(),
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        server_header=False,
+    )
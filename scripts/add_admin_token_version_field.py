@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：admin_users 表添加 token_version 字段（管理员登出使 token 失效）
+运行: python scripts/add_admin_token_version_field.py
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import engine
+from sqlalchemy import text, inspect
+
+def main():
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns("admin_users")]
+    with engine.connect() as conn:
+        if 'token_version' in columns:
+            print("⏭  token_version 字段已存在，跳过")
+        else:
+            conn.execute(text("ALTER TABLE admin_users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+            print("✅ 已添加 token_version 字段")
+        conn.commit()
+    print("🎉 迁移完成！")
+
+if __name__ == "__main__":
+    main()
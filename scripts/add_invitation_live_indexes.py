@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：为未使用且可用的邀请码创建部分索引
+运行: python scripts/add_invitation_live_indexes.py
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import engine
+from app.models.invitation_code import InvitationCode
+from sqlalchemy import inspect
+
+LIVE_INDEXES = ("ix_invitation_codes_live_expire_at", "ix_invitation_codes_live_created_by")
+
+def main():
+    inspector = inspect(engine)
+    existing = {idx['name'] for idx in inspector.get_indexes("invitation_codes")}
+    for index in InvitationCode.__table__.indexes:
+        if index.name not in LIVE_INDEXES:
+            continue
+        if index.name in existing:
+            print(f"⏭  {index.name} 已存在，跳过")
+        else:
+            index.create(bind=engine)
+            print(f"✅ 已创建索引 {index.name}")
+    print("🎉 迁移完成！")
+
+if __name__ == "__main__":
+    main()
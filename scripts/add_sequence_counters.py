@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：创建 sequence_counters 表，并以现有最大编号初始化资料编号序列
+运行: python scripts/add_sequence_counters.py
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import engine, SessionLocal
+from app.models.sequence_counter import SequenceCounter
+from app.crud.crud_sequence import sync_serial_sequence
+from sqlalchemy import inspect
+
+def main():
+    inspector = inspect(engine)
+    if "sequence_counters" in inspector.get_table_names():
+        print("⏭  sequence_counters 表已存在")
+    else:
+        SequenceCounter.__table__.create(bind=engine)
+        print("✅ sequence_counters 表创建成功")
+
+    db = SessionLocal()
+    try:
+        value = sync_serial_sequence(db)
+        print(f"✅ 资料编号序列当前值: {value}")
+    finally:
+        db.close()
+    print("🎉 迁移完成！")
+
+if __name__ == "__main__":
+    main()
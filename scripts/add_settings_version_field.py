@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：system_settings 表添加 version 字段（配置缓存失效判断用）
+运行: python scripts/add_settings_version_field.py
+"""
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import engine
+from sqlalchemy import text, inspect
+
+def main():
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns("system_settings")]
+    with engine.connect() as conn:
+        if 'version' in columns:
+            print("⏭  version 字段已存在，跳过")
+        else:
+            conn.execute(text("ALTER TABLE system_settings ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+            print("✅ 已添加 version 字段")
+        conn.commit()
+    print("🎉 迁移完成！")
+
+if __name__ == "__main__":
+    main()
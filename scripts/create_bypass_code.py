@@ -34,6 +34,8 @@ def main():
                     existing.used_by = None
                     existing.used_by_openid = None
                     existing.used_at = None
+                    existing.is_active = True
+                    existing.disable_reason = None
                     existing.expire_at = datetime.utcnow() + timedelta(days=30)
                     db.commit()
                     print(f"   ✅ 已重置为未使用，有效期延长30天")
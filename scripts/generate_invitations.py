@@ -8,8 +8,8 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from app.db.base import SessionLocal
-from app.services.invitation import generate_invitation_code, calculate_expire_time
-from app.crud.crud_invitation import create_invitation_code
+from app.services.invitation import calculate_expire_time
+from app.crud.crud_invitation import create_invitation_codes_bulk
 
 
 def generate_invitations(count: int = 10, notes: str = "脚本生成"):
@@ -24,19 +24,16 @@ def generate_invitations(count: int = 10, notes: str = "脚本生成"):
     try:
         expire_at = calculate_expire_time()
 
-        for i in range(count):
-            code = generate_invitation_code()
+        codes = create_invitation_codes_bulk(
+            db=db,
+            count=count,
+            created_by=0,
+            created_by_type="admin",
+            notes=notes,
+            expire_at=expire_at
+        )
 
-            invitation = create_invitation_code(
-                db=db,
-                code=code,
-                created_by=0,
-                created_by_type="admin",
-                notes=notes,
-                expire_at=expire_at
-            )
-
-            codes.append(code)
+        for i, code in enumerate(codes):
             print(f"{i + 1}. {code}")
 
         print("\n✅ 生成成功！")
@@ -16,6 +16,7 @@ from app.db.base import SessionLocal
 from app.models.user_profile import UserProfile
 from app.models.invitation_code import InvitationCode
 from app.services.invitation import generate_invitation_code
+from app.crud.crud_sequence import sync_serial_sequence
 
 # ========== 新用户数据 - 分布在各种城市 ==========
 NEW_USERS = [
@@ -168,6 +169,8 @@ def seed_more():
             serial += 1
 
         db.commit()
+        # 脚本直接写入了编号，推进编号序列避免线上提交撞号
+        sync_serial_sequence(db)
 
         # 统计
         approved = sum(1 for p in created if p.status in ('approved', 'published'))
@@ -18,6 +18,7 @@ from app.db.base import SessionLocal, engine, Base
 from app.models.user_profile import UserProfile
 from app.models.invitation_code import InvitationCode
 from app.services.invitation import generate_invitation_code
+from app.crud.crud_sequence import sync_serial_sequence
 
 # ========== 模拟用户数据池 ==========
 MOCK_USERS = [
@@ -269,6 +270,8 @@ def seed_data():
             serial += 1
 
         db.commit()
+        # 脚本直接写入了编号，推进编号序列避免线上提交撞号
+        sync_serial_sequence(db)
 
         # ====== 统计 ======
         total = len(created_profiles)
@@ -0,0 +1,77 @@
+"""
+测试公共配置
+★ 导入 app 之前把数据库指向临时 SQLite 文件，不影响开发库
+★ 每个测试结束后清空所有表
+"""
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="rr_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}",
+    "DEBUG": "False",
+    "LOG_LEVEL": "WARNING",
+    "STORAGE_BACKEND": "local",
+    "LOCAL_STORAGE_DIR": os.path.join(_tmp_dir, "uploads"),
+    "PROFILING_OUTPUT_DIR": os.path.join(_tmp_dir, "profiling"),
+    "WECHAT_APP_ID": "",
+    "AI_API_KEY": "",
+    "INVITATION_SWEEP_INTERVAL": "0",
+    "INVITATION_BLOOM_SYNC_INTERVAL": "0",
+    "SERIAL_BLOCK_SIZE": "1",
+})
+os.makedirs(os.environ["LOCAL_STORAGE_DIR"], exist_ok=True)
+
+import pytest
+
+import app.models  # noqa: F401,E402
+from app.db.base import Base, SessionLocal, engine  # noqa: E402
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def client(db):
+    """不执行 lifespan 的测试客户端（不启动清扫等后台任务）"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_headers(db):
+    """测试管理员的 Authorization 头（直接签发 token，跳过 bcrypt 登录）"""
+    from app.core.security import create_access_token
+    from app.models.admin_user import AdminUser
+
+    admin = AdminUser(username="test_admin", password_hash="x")
+    db.add(admin)
+    db.commit()
+    token = create_access_token(data={"sub": admin.username, "admin_id": admin.id, "ver": 0})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_profile(db, openid: str = "openid_test", **fields):
+    """插入一份必填字段齐全的资料"""
+    from app.models.user_profile import UserProfile
+
+    data = dict(openid=openid, name="测试用户", gender="男", age=28, height=175, weight=65, status="pending")
+    data.update(fields)
+    profile = UserProfile(**data)
+    db.add(profile)
+    db.commit()
+    db.refresh(profile)
+    return profile
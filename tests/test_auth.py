@@ -0,0 +1,58 @@
+"""
+用户 token 与管理员 token 的区分，以及按 token 中资料ID取资料
+"""
+from app.core.security import USER_TOKEN_TYPE, create_access_token, create_user_token
+from tests.conftest import make_profile
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_admin_endpoint_accepts_admin_token(client, admin_headers):
+    assert client.get("/api/v1/admin/profiles/pending", headers=admin_headers).status_code == 200
+
+
+def test_admin_endpoint_rejects_user_token(client, db, admin_headers):
+    profile = make_profile(db, "openid_user", status="published")
+    token = create_user_token("openid_user", profile.id, "published")
+
+    resp = client.get("/api/v1/admin/profiles/pending", headers=_bearer(token))
+    assert resp.status_code == 401
+
+
+def test_admin_endpoint_rejects_user_token_with_admin_claims(client, db, admin_headers):
+    # 同一个密钥签名，即使带上 admin_id 也按 typ 拒绝
+    token = create_access_token(data={"typ": USER_TOKEN_TYPE, "sub": "test_admin", "admin_id": 1, "ver": 0})
+
+    resp = client.get("/api/v1/admin/profiles/pending", headers=_bearer(token))
+    assert resp.status_code == 401
+
+
+def test_my_profile_by_token_profile_id(client, db):
+    profile = make_profile(db, "openid_me", name="本人")
+    make_profile(db, "openid_other", name="别人")
+    token = create_user_token("openid_me", profile.id, "pending")
+
+    resp = client.get("/api/v1/profile/my", headers=_bearer(token))
+    assert resp.status_code == 200
+    assert resp.json()["data"]["name"] == "本人"
+
+
+def test_stale_token_profile_id_falls_back_to_openid(client, db):
+    other = make_profile(db, "openid_other", name="别人")
+    mine = make_profile(db, "openid_me", name="本人")
+    # token 中的资料ID指向别人的资料（资料删除后ID被复用）
+    token = create_user_token("openid_me", other.id, "pending")
+
+    resp = client.get("/api/v1/profile/my", headers=_bearer(token))
+    assert resp.json()["data"]["id"] == mine.id
+
+
+def test_token_status_does_not_bypass_status_check(client, db):
+    profile = make_profile(db, "openid_me", status="published")
+    # token 签发时还是 pending，之后已发布
+    token = create_user_token("openid_me", profile.id, "pending")
+
+    resp = client.patch("/api/v1/profile/update", json={"name": "新名字"}, headers=_bearer(token))
+    assert resp.status_code == 400
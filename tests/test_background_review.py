@@ -0,0 +1,37 @@
+"""
+AI 审核后台任务在应用主事件循环上执行
+★ 共享的 AI httpx 客户端绑定创建时的事件循环，后台任务若在临时事件循环里执行并关闭，
+  下一次调用会报 "Event loop is closed"
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import ai_review_trigger, invitation_filter
+from tests.conftest import make_profile
+
+HEADERS = {"Authorization": "Bearer openid_review"}
+
+
+def test_review_runs_on_app_loop(db, monkeypatch):
+    make_profile(db, "openid_review")
+    monkeypatch.setattr(settings, "AI_API_KEY", "test")
+    monkeypatch.setattr(invitation_filter, "_filter", None)
+
+    loops = []
+
+    async def fake_trigger(session, profile_id):
+        loops.append(asyncio.get_running_loop())
+        return {"action": "pass", "message": "", "extracted_fields": None}
+
+    monkeypatch.setattr(ai_review_trigger, "trigger_ai_review", fake_trigger)
+
+    with TestClient(app) as client:
+        for text in ("第一次修改", "第二次修改"):
+            resp = client.patch("/api/v1/profile/update", json={"lifestyle": text}, headers=HEADERS)
+            assert resp.json()["data"]["ai_review"] is True
+        assert len(loops) == 2
+        assert loops[0] is loops[1]
+        assert not loops[0].is_closed()
@@ -0,0 +1,53 @@
+"""
+熔断器：半开试探调用被取消后熔断器仍能恢复
+"""
+import asyncio
+
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services import wechat
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_half_open_allows_single_trial():
+    breaker = _open_breaker()
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.before_call() is False
+
+
+class _HangingClient:
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def get(self, *args, **kwargs):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+def test_cancelled_trial_releases_breaker(monkeypatch):
+    breaker = _open_breaker()
+    client = _HangingClient()
+    monkeypatch.setattr(wechat, "_breaker", breaker)
+    monkeypatch.setattr(wechat, "get_client", lambda: client)
+
+    async def cancel_trial():
+        task = asyncio.create_task(wechat._request_session("wx_code"))
+        await client.started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    # 取消不计失败，下一次调用仍可作为试探调用
+    assert breaker.before_call() is True
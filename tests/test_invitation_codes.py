@@ -0,0 +1,33 @@
+"""
+邀请码批量生成
+"""
+import pytest
+
+from app.crud import crud_invitation
+from app.models.invitation_code import InvitationCode
+
+
+def test_bulk_codes_are_unique(db):
+    codes = crud_invitation.create_invitation_codes_bulk(db, count=200)
+    assert len(codes) == len(set(codes)) == 200
+    assert db.query(InvitationCode).count() == 200
+
+
+def test_bulk_conflict_raises_and_rolls_back(db, monkeypatch):
+    crud_invitation.create_invitation_codes_bulk(db, count=1)
+    taken = db.query(InvitationCode.code).scalar()
+    monkeypatch.setattr(crud_invitation, "generate_invitation_codes", lambda n: {taken})
+
+    with pytest.raises(crud_invitation.InvitationCodeConflictError):
+        crud_invitation.create_invitation_codes_bulk(db, count=3)
+    assert db.query(InvitationCode).count() == 1
+
+
+def test_generate_endpoint_returns_503_on_conflict(client, db, admin_headers, monkeypatch):
+    crud_invitation.create_invitation_codes_bulk(db, count=1)
+    taken = db.query(InvitationCode.code).scalar()
+    monkeypatch.setattr(crud_invitation, "generate_invitation_codes", lambda n: {taken})
+
+    resp = client.post("/api/v1/admin/invitation/generate", params={"count": 5}, headers=admin_headers)
+    assert resp.status_code == 503
+    assert resp.json()["detail"] == "邀请码生成冲突，请稍后重试"
@@ -0,0 +1,92 @@
+"""
+邀请码布隆过滤器：未命中在内存中拒绝，其他进程生成的码靠增量同步和限量回查
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import SlidingWindowLimiter
+from app.models.invitation_code import InvitationCode
+from app.services import invitation_filter
+
+
+@pytest.fixture
+def bloom(db, monkeypatch):
+    monkeypatch.setattr(invitation_filter, "_filter", None)
+    monkeypatch.setattr(invitation_filter, "_watermark", None)
+    monkeypatch.setattr(invitation_filter, "_fallback_limiter", SlidingWindowLimiter(2, 60))
+    monkeypatch.setattr(settings, "INVITATION_BLOOM_FALLBACK_LIMIT", 2)
+    invitation_filter.rebuild_invitation_filter(db)
+    return invitation_filter
+
+
+@pytest.fixture
+def lookups(bloom, monkeypatch):
+    """记录未命中时回查数据库的邀请码"""
+    lookups = []
+    code_exists = invitation_filter._code_exists
+
+    def counting_code_exists(session, code):
+        lookups.append(code)
+        return code_exists(session, code)
+
+    monkeypatch.setattr(invitation_filter, "_code_exists", counting_code_exists)
+    return lookups
+
+
+def _insert_elsewhere(db, code: str, create_time: datetime = None):
+    # 其他进程 / 脚本写入的邀请码不会经过 add_invitation_codes
+    db.add(InvitationCode(code=code, created_by=0, created_by_type="admin", create_time=create_time))
+    db.commit()
+
+
+def test_guessed_codes_rejected_without_query_once_budget_is_spent(db, bloom, lookups):
+    assert not bloom.invitation_code_may_exist(db, "GUESS001")
+    assert not bloom.invitation_code_may_exist(db, "GUESS002")
+    assert len(lookups) == 2
+
+    for i in range(3, 50):
+        assert not bloom.invitation_code_may_exist(db, f"GUESS{i:03d}")
+    assert len(lookups) == 2
+
+
+def test_fallback_accepts_code_created_since_last_sync(db, bloom, lookups):
+    _insert_elsewhere(db, "OUTSIDE1")
+
+    assert bloom.invitation_code_may_exist(db, "OUTSIDE1")
+    # 确认存在后补进过滤器，下次不再查库
+    assert bloom.invitation_code_may_exist(db, "OUTSIDE1")
+    assert lookups == ["OUTSIDE1"]
+
+
+def test_sync_picks_up_codes_without_fallback(db, bloom, lookups, monkeypatch):
+    monkeypatch.setattr(settings, "INVITATION_BLOOM_FALLBACK_LIMIT", 0)
+    _insert_elsewhere(db, "OUTSIDE2")
+    assert not bloom.invitation_code_may_exist(db, "OUTSIDE2")
+
+    assert bloom.sync_invitation_filter(db) == 1
+    assert bloom.invitation_code_may_exist(db, "OUTSIDE2")
+    assert lookups == []
+
+
+def test_sync_covers_out_of_order_commits(db, bloom, monkeypatch):
+    monkeypatch.setattr(settings, "INVITATION_BLOOM_FALLBACK_LIMIT", 0)
+    now = datetime.utcnow()
+    _insert_elsewhere(db, "NEWER001", now)
+    bloom.sync_invitation_filter(db)
+
+    # 更早开始、更晚提交的事务：create_time 低于水位，但在回扫范围内
+    _insert_elsewhere(db, "OLDER001", now - timedelta(seconds=settings.INVITATION_BLOOM_SYNC_OVERLAP // 2))
+    assert bloom.sync_invitation_filter(db) == 1
+    assert bloom.invitation_code_may_exist(db, "OLDER001")
+
+
+def test_verify_endpoint_rejects_unknown_code(client, db, bloom):
+    _insert_elsewhere(db, "OUTSIDE3")
+
+    resp = client.post("/api/v1/invitation/verify", json={"invitation_code": "OUTSIDE3", "wx_code": "wx_1"})
+    assert resp.status_code == 200, resp.text
+    resp = client.post("/api/v1/invitation/verify", json={"invitation_code": "NOSUCH02", "wx_code": "wx_2"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "邀请码不存在"
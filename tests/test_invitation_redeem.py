@@ -0,0 +1,44 @@
+"""
+邀请码核销：同一个码并发核销只有一个成功
+"""
+import threading
+
+from app.crud import crud_invitation
+from app.db.base import SessionLocal
+from app.models.invitation_code import InvitationCode
+
+
+def test_concurrent_redeem_single_winner(db):
+    code = crud_invitation.create_invitation_codes_bulk(db, count=1)[0]
+    workers = 8
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def redeem(i):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            results.append((f"openid_{i}", crud_invitation.redeem_invitation_code(session, code, f"openid_{i}")))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=redeem, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    winners = [openid for openid, ok in results if ok]
+    assert len(results) == workers
+    assert len(winners) == 1
+
+    db.expire_all()
+    invitation = db.query(InvitationCode).filter(InvitationCode.code == code).one()
+    assert invitation.is_used
+    assert invitation.used_by_openid == winners[0]
+
+
+def test_redeem_used_code_fails(db):
+    code = crud_invitation.create_invitation_codes_bulk(db, count=1)[0]
+    assert crud_invitation.redeem_invitation_code(db, code, "openid_a")
+    assert not crud_invitation.redeem_invitation_code(db, code, "openid_b")
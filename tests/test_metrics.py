@@ -0,0 +1,164 @@
+"""
+请求指标：文本格式输出、路由标签、状态码、/metrics 鉴权、多 worker 汇总
+"""
+import importlib
+import json
+import os
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, MetricsMiddleware, Registry
+
+
+def _value(metric, *labels):
+    return metric._values.get(tuple(str(v) for v in labels))
+
+
+def test_counter_and_histogram_rendering():
+    registry = Registry()
+    counter = registry.register(Counter("demo_total", "计数", ("route",)))
+    histogram = registry.register(Histogram("demo_seconds", "耗时", ("route",), buckets=(0.1, 1.0)))
+    counter.inc("/a")
+    counter.inc("/a", amount=2)
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = registry.render().splitlines()
+    assert lines[:3] == ["# HELP demo_total 计数", "# TYPE demo_total counter", 'demo_total{route="/a"} 3']
+    assert lines[3:] == [
+        "# HELP demo_seconds 耗时",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="/a",le="0.1"} 1',
+        'demo_seconds_bucket{route="/a",le="1"} 2',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 3',
+        'demo_seconds_sum{route="/a"} 5.55',
+        'demo_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.register(Counter("demo_total", "计数", ("route",)))
+    counter.inc('/a"b\\c')
+    assert 'demo_total{route="/a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_route_label_uses_template_for_path_params(client, admin_headers):
+    resp = client.get("/api/v1/admin/profile/987654/detail", headers=admin_headers)
+    assert resp.status_code == 404
+
+    assert _value(metrics.HTTP_REQUESTS, "GET", "/api/v1/admin/profile/{profile_id}/detail", 404)
+    assert not any("987654" in key[1] for key in metrics.HTTP_REQUESTS._values)
+
+
+def test_route_label_for_static_files_and_unmatched(client):
+    before_static = _value(metrics.HTTP_REQUESTS, "GET", "/uploads/{path}", 404) or 0
+    before_unmatched = _value(metrics.HTTP_REQUESTS, "GET", "unmatched", 404) or 0
+
+    client.get("/uploads/photos/someone/a.jpg")
+    client.get("/no/such/route")
+
+    assert _value(metrics.HTTP_REQUESTS, "GET", "/uploads/{path}", 404) == before_static + 1
+    assert _value(metrics.HTTP_REQUESTS, "GET", "unmatched", 404) == before_unmatched + 1
+
+
+def test_route_label_with_repeated_param_values():
+    inner = APIRouter()
+
+    @inner.get("/a/{x}/b/{y}")
+    def endpoint(x: int, y: int):
+        return {"x": x, "y": y}
+
+    outer = APIRouter()
+    outer.include_router(inner, prefix="/nested")
+    test_app = FastAPI()
+    test_app.include_router(outer, prefix="/metrics-test")
+    test_app.add_middleware(MetricsMiddleware, slow_request_ms=0)
+
+    resp = TestClient(test_app).get("/metrics-test/nested/a/1/b/1")
+    assert resp.status_code == 200
+    assert _value(metrics.HTTP_REQUESTS, "GET", "/metrics-test/nested/a/{x}/b/{y}", 200)
+
+
+def test_status_code_is_recorded(client):
+    route = "/api/v1/profile/my"
+    before = _value(metrics.HTTP_REQUESTS, "GET", route, 401) or 0
+    assert client.get(route).status_code == 401
+    assert _value(metrics.HTTP_REQUESTS, "GET", route, 401) == before + 1
+
+
+def test_metrics_not_registered_without_token(client):
+    assert settings.METRICS_TOKEN == ""
+    assert client.get("/metrics").status_code == 404
+
+
+@pytest.fixture
+def metrics_app(monkeypatch):
+    """设置 METRICS_TOKEN 后重新加载 app.main（/metrics 在导入时按配置注册）"""
+    import app.main as main
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    yield importlib.reload(main).app
+    monkeypatch.undo()
+    importlib.reload(main)
+
+
+def test_metrics_requires_token(metrics_app):
+    client = TestClient(metrics_app)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_requests_total counter" in resp.text
+
+
+def _write_snapshot(directory, pid: int, metrics_data: dict):
+    with open(os.path.join(directory, f"{pid}.json"), "w", encoding="utf-8") as f:
+        json.dump({"pid": pid, "metrics": metrics_data}, f)
+
+
+def test_multiprocess_aggregation(tmp_path):
+    registry = Registry()
+    registry.configure_multiprocess(str(tmp_path), flush_interval=0)
+    counter = registry.register(Counter("demo_total", "计数", ("route",)))
+    histogram = registry.register(Histogram("demo_seconds", "耗时", (), buckets=(1.0,)))
+    in_flight = registry.register(Gauge("demo_in_flight", "并发"))
+    started = registry.register(Gauge("demo_start", "启动时间", multiprocess_mode="all"))
+
+    counter.inc("/a")
+    histogram.observe(0.5)
+    in_flight.set(2)
+    started.set(100)
+
+    alive_pid, dead_pid = os.getppid(), 2 ** 22 + 4321
+    other = {
+        "demo_total": [[["/a"], 4], [["/b"], 1]],
+        "demo_seconds": [[[], [[1, 1], 3.5, 2]]],
+        "demo_in_flight": [[[], 3]],
+        "demo_start": [[[], 200]],
+    }
+    _write_snapshot(tmp_path, alive_pid, other)
+    _write_snapshot(tmp_path, dead_pid, other)
+
+    lines = registry.render().splitlines()
+
+    # 计数器 / 直方图累加所有 worker（包括已退出的）
+    assert 'demo_total{route="/a"} 9' in lines
+    assert 'demo_total{route="/b"} 2' in lines
+    assert 'demo_seconds_bucket{le="1"} 3' in lines
+    assert 'demo_seconds_bucket{le="+Inf"} 5' in lines
+    assert "demo_seconds_count 5" in lines
+    # Gauge 只算存活的 worker
+    assert "demo_in_flight 5" in lines
+    assert f'demo_start{{pid="{os.getpid()}"}} 100' in lines
+    assert f'demo_start{{pid="{alive_pid}"}} 200' in lines
+    assert not any(str(dead_pid) in line for line in lines)
+    # 本进程的快照已写入共享目录，供其他 worker 汇总
+    assert (tmp_path / f"{os.getpid()}.json").exists()
@@ -0,0 +1,28 @@
+"""
+/profile/my 的 ETag
+"""
+from tests.conftest import make_profile
+
+
+def test_etag_changes_within_same_second(client, db):
+    profile = make_profile(db, "openid_etag", name="原名")
+    headers = {"Authorization": "Bearer openid_etag"}
+
+    first = client.get("/api/v1/profile/my", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get("/api/v1/profile/my", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # 修改资料但 update_time 不变（MySQL 秒级精度下同一秒内的两次修改）
+    update_time = profile.update_time
+    profile.name = "新名字"
+    db.commit()
+    db.query(type(profile)).filter_by(id=profile.id).update({"update_time": update_time})
+    db.commit()
+
+    changed = client.get("/api/v1/profile/my", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["data"]["name"] == "新名字"
+    assert changed.headers["etag"] != etag
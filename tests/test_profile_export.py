@@ -0,0 +1,44 @@
+"""
+资料导出：公式注入和非法字符
+"""
+import csv
+import io
+
+from openpyxl import load_workbook
+
+from app.services.profile_export import EXPORT_COLUMNS, iter_profiles_csv, iter_profiles_xlsx
+from tests.conftest import make_profile
+
+NAME_COLUMN = [field for field, _ in EXPORT_COLUMNS].index("name")
+LIFESTYLE_COLUMN = [field for field, _ in EXPORT_COLUMNS].index("lifestyle")
+HOBBIES_COLUMN = [field for field, _ in EXPORT_COLUMNS].index("hobbies")
+
+
+def _seed(db):
+    make_profile(db, "openid_a", name='=HYPERLINK("http://evil","点我")',
+                 lifestyle="正常\x07文本\x1b", hobbies=["@SUM(1+1)", "读书"])
+    make_profile(db, "openid_b", name="普通用户", lifestyle="-1+1")
+
+
+def test_csv_escapes_formulas(db):
+    _seed(db)
+    content = b"".join(iter_profiles_csv()).decode("utf-8-sig")
+    rows = list(csv.reader(io.StringIO(content)))[1:]
+
+    assert rows[0][NAME_COLUMN] == '\'=HYPERLINK("http://evil","点我")'
+    assert rows[0][HOBBIES_COLUMN].startswith("'@SUM")
+    assert rows[1][NAME_COLUMN] == "普通用户"
+    assert rows[1][LIFESTYLE_COLUMN] == "'-1+1"
+
+
+def test_xlsx_strips_control_characters(db):
+    _seed(db)
+    data = b"".join(iter_profiles_xlsx())
+    ws = load_workbook(io.BytesIO(data)).active
+    rows = list(ws.iter_rows(min_row=2, values_only=True))
+
+    assert len(rows) == 2
+    assert rows[0][LIFESTYLE_COLUMN] == "正常文本"
+    assert rows[0][NAME_COLUMN].startswith("'=")
+    # 数字字段不受影响
+    assert rows[0][[field for field, _ in EXPORT_COLUMNS].index("age")] == 28
@@ -0,0 +1,39 @@
+"""
+PATCH /profile/update：必填字段传 null 返回 422
+"""
+import pytest
+
+from app.models.user_profile import UserProfile
+from tests.conftest import make_profile
+
+HEADERS = {"Authorization": "Bearer openid_patch"}
+
+
+@pytest.mark.parametrize("field", ["name", "gender", "age", "height", "weight"])
+def test_null_required_field_is_rejected(client, db, field):
+    make_profile(db, "openid_patch")
+
+    resp = client.patch("/api/v1/profile/update", json={field: None}, headers=HEADERS)
+    assert resp.status_code == 422
+
+    db.expire_all()
+    assert getattr(db.query(UserProfile).one(), field) is not None
+
+
+def test_null_optional_field_is_cleared(client, db):
+    make_profile(db, "openid_patch", lifestyle="旧描述")
+
+    resp = client.patch("/api/v1/profile/update", json={"lifestyle": None}, headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json()["data"]["changed_fields"] == ["lifestyle"]
+
+
+def test_omitted_required_fields_are_kept(client, db):
+    make_profile(db, "openid_patch", name="原名")
+
+    resp = client.patch("/api/v1/profile/update", json={"height": 180}, headers=HEADERS)
+    assert resp.status_code == 200
+
+    db.expire_all()
+    profile = db.query(UserProfile).one()
+    assert (profile.name, profile.height) == ("原名", 180)
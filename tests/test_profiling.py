@@ -0,0 +1,44 @@
+"""
+按请求采样：只有管理员请求会采样，采样结果可以下载
+"""
+from app.core import profiling
+
+
+def test_non_admin_request_is_not_profiled(client, db):
+    resp = client.get("/health", headers={"X-Profile": "1", "Authorization": "Bearer openid_x"})
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+
+    resp = client.get("/health?_profile=1")
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+
+
+def test_admin_request_profile_can_be_downloaded(client, admin_headers):
+    resp = client.get("/health", headers={**admin_headers, "X-Profile": "1"})
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-profile-id"]
+    assert profiling.PROFILE_ID_PATTERN.match(profile_id)
+
+    download = client.get(f"/api/v1/admin/debug/profiles/{profile_id}", headers=admin_headers)
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/plain")
+
+    listed = client.get("/api/v1/admin/debug/profiles", headers=admin_headers).json()["data"]["items"]
+    meta = next(item for item in listed if item["id"] == profile_id)
+    assert meta["kind"] == "request"
+    assert meta["path"] == "/health"
+    assert meta["admin"] == "test_admin"
+
+
+def test_download_requires_admin(client, admin_headers):
+    profile_id = client.get("/health", headers={**admin_headers, "X-Profile": "1"}).headers["x-profile-id"]
+    assert client.get(f"/api/v1/admin/debug/profiles/{profile_id}").status_code == 401
+
+
+def test_get_profile_path_rejects_invalid_ids(admin_headers, client):
+    profile_id = client.get("/health", headers={**admin_headers, "X-Profile": "1"}).headers["x-profile-id"]
+    assert profiling.get_profile_path(profile_id)
+
+    for bad in ("../etc/passwd", profile_id.upper(), profile_id[:-1], profile_id + "0", f"{profile_id}.json", ""):
+        assert profiling.get_profile_path(bad) is None
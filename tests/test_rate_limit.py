@@ -0,0 +1,23 @@
+"""
+按 IP 限流取的客户端地址
+"""
+from starlette.requests import Request
+
+from app.core.rate_limit import get_client_ip
+
+
+def _request(headers: dict, client=("203.0.113.7", 50000)) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": client,
+    })
+
+
+def test_forwarded_headers_are_ignored():
+    request = _request({"X-Forwarded-For": "10.0.0.1", "X-Real-IP": "10.0.0.2"})
+    assert get_client_ip(request) == "203.0.113.7"
+
+
+def test_missing_client():
+    assert get_client_ip(_request({}, client=None)) == "unknown"
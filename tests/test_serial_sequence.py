@@ -0,0 +1,48 @@
+"""
+资料编号分配：SERIAL_BLOCK_SIZE=1 时并发分配连续且不重复
+"""
+import threading
+
+from app.core.config import settings
+from app.crud import crud_sequence
+from app.db.base import SessionLocal
+from tests.conftest import make_profile
+
+
+def _allocate_concurrently(workers: int, per_worker: int) -> list:
+    barrier = threading.Barrier(workers)
+    values = []
+    lock = threading.Lock()
+
+    def allocate():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            for _ in range(per_worker):
+                value = crud_sequence.next_sequence_value(session, crud_sequence.SERIAL_SEQUENCE)
+                with lock:
+                    values.append(value)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=allocate) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return values
+
+
+def test_concurrent_allocation_is_gap_free(db):
+    assert settings.SERIAL_BLOCK_SIZE == 1
+    make_profile(db, "openid_old", serial_number="041")
+
+    values = _allocate_concurrently(workers=8, per_worker=10)
+
+    # 以现有最大编号为起点，连续、无重复、无空号
+    assert sorted(values) == list(range(42, 42 + 80))
+
+
+def test_serial_number_format(db):
+    assert crud_sequence.next_serial_number(db) == "001"
+    assert crud_sequence.next_serial_number(db) == "002"
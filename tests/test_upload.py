@@ -0,0 +1,62 @@
+"""
+删除照片：只能删除自己目录下的照片，../ 不能绕过归属校验
+"""
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services import storage
+
+
+def _photo(openid: str, name: str = "a.jpg") -> str:
+    path = os.path.join(settings.LOCAL_STORAGE_DIR, settings.COS_UPLOAD_PREFIX, openid, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"jpg")
+    return path
+
+
+def _delete(client, openid: str, url: str):
+    return client.post("/api/v1/upload/photo/delete", json={"url": url},
+                       headers={"Authorization": f"Bearer {openid}"})
+
+
+def test_delete_own_photo(client):
+    path = _photo("openid_owner")
+    resp = _delete(client, "openid_owner", "/uploads/photos/openid_owner/a.jpg")
+    assert resp.status_code == 200
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("url", [
+    "/uploads/photos/openid_attacker/../openid_victim/a.jpg",
+    "/uploads/photos/openid_attacker/./../openid_victim/a.jpg",
+    "/uploads/photos/openid_attacker/..\\openid_victim\\a.jpg",
+    "/uploads/photos/openid_victim/a.jpg",
+])
+def test_cannot_delete_other_users_photo(client, url):
+    path = _photo("openid_victim")
+    resp = _delete(client, "openid_attacker", url)
+    assert resp.status_code == 403
+    assert os.path.exists(path)
+
+
+def test_legacy_local_url_is_checked_too(client, monkeypatch, tmp_path):
+    # 旧数据的 /uploads 地址按工作目录下的 ./uploads 删除
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "cos")
+    monkeypatch.setattr(settings, "COS_DOMAIN", "https://cdn.example.com")
+    monkeypatch.chdir(tmp_path)
+    secret = tmp_path / "secret.txt"
+    secret.write_text("x")
+
+    resp = _delete(client, "openid_attacker", "/uploads/photos/openid_attacker/../../secret.txt")
+    assert resp.status_code == 403
+    assert secret.exists()
+
+
+def test_normalize_key():
+    assert storage.normalize_key("photos/a/./b//c.jpg") == "photos/a/b/c.jpg"
+    assert storage.normalize_key("photos/a/../b/c.jpg") == "photos/b/c.jpg"
+    for bad in ("", "/etc/passwd", "../x", "photos/../../x", "photos\\..\\x", ".."):
+        assert storage.normalize_key(bad) is None